@@ -0,0 +1,107 @@
+"""Compare the per-request REST calls of the old command line path with the
+pooled, concurrent snapshot fetch.
+
+A local HTTP server stands in for Home Assistant and adds a fixed latency to
+every request.  Run with
+``python benchmarks/bench_cli_snapshot.py [entities] [latency_ms]``.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from common import DOMAINS, install_ha_stubs, timeit
+
+install_ha_stubs()
+
+from custom_components.smart_dashboard.snapshot import (  # noqa: E402
+    HassSnapshot,
+    create_session,
+)
+
+
+def _responses(entities: int):
+    states = [
+        {
+            "entity_id": f"{DOMAINS[i % len(DOMAINS)]}.entity_{i}",
+            "state": "on",
+            "attributes": {"friendly_name": f"Entity {i}"},
+        }
+        for i in range(entities)
+    ]
+    return {
+        "/api/states": states,
+        "/api/areas": [{"area_id": f"a{i}", "name": f"Area {i}"} for i in range(30)],
+        "/api/devices": [
+            {"id": f"d{i}", "area_id": f"a{i % 30}"} for i in range(entities // 4)
+        ],
+        "/api/entities": [
+            {"entity_id": s["entity_id"], "device_id": f"d{i // 4}"}
+            for i, s in enumerate(states)
+        ],
+        "/api/lovelace": {"views": []},
+    }
+
+
+def _serve(responses, latency: float) -> ThreadingHTTPServer:
+    bodies = {path: json.dumps(data).encode() for path, data in responses.items()}
+    compressed = {path: gzip.compress(body) for path, body in bodies.items()}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            time.sleep(latency)
+            use_gzip = "gzip" in self.headers.get("Accept-Encoding", "")
+            body = (compressed if use_gzip else bodies)[self.path]
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            if use_gzip:
+                self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main() -> None:
+    entities = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 20) / 1000
+    server = _serve(_responses(entities), latency)
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    headers = {"Authorization": "Bearer x", "Accept-Encoding": "identity"}
+
+    def legacy():
+        # Filter, discovery and the Lovelace plugin each opened new
+        # connections and requested uncompressed bodies one after another
+        for path in ("/api/states", "/api/states", "/api/areas", "/api/devices",
+                     "/api/entities", "/api/lovelace"):
+            requests.get(f"{url}{path}", headers=headers, timeout=10).json()
+
+    def pooled():
+        with create_session("x") as session:
+            HassSnapshot.fetch(url, "x", lovelace=True, session=session)
+
+    old = timeit(legacy, 3)
+    new = timeit(pooled, 3)
+    server.shutdown()
+    print(f"command line snapshot, {entities} entities, {latency * 1000:.0f} ms latency")
+    print(f"  sequential requests:          {old * 1000:8.2f} ms")
+    print(f"  pooled concurrent session:    {new * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
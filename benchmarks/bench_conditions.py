@@ -0,0 +1,57 @@
+"""Compare per-call ``eval`` of condition strings with compiled conditions.
+
+The old ``apply_conditions`` copied ``os.environ`` into a new context and
+parsed every expression on each evaluation.  Run with
+``python benchmarks/bench_conditions.py [rooms]``.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+
+from common import install_ha_stubs, timeit
+
+install_ha_stubs()
+
+from custom_components.smart_dashboard.conditions import (  # noqa: E402
+    ConditionContext,
+    evaluate,
+)
+
+EXPRESSIONS = [
+    "user == 'admin'",
+    "user in ('alice', 'bob') or HOME == '/root'",
+    "not SD_GUEST == '1' and user != 'guest'",
+]
+
+
+def old(rooms: int) -> int:
+    shown = 0
+    for index in range(rooms):
+        ctx = dict(os.environ)
+        ctx.setdefault("user", ctx.get("USER"))
+        try:
+            shown += bool(eval(EXPRESSIONS[index % 3], {"__builtins__": {}}, ctx))
+        except Exception:
+            pass
+    return shown
+
+
+def new(rooms: int) -> int:
+    ctx = ConditionContext()
+    return sum(evaluate(EXPRESSIONS[index % 3], ctx) for index in range(rooms))
+
+
+def main() -> None:
+    rooms = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    os.environ.setdefault("USER", "admin")
+    os.environ.setdefault("SD_GUEST", "0")
+    print(f"conditions, {rooms} rooms with one condition each")
+    for name, func in (("eval per call", old), ("compiled", new)):
+        elapsed = timeit(lambda: func(rooms), 5)
+        print(f"  {name:14} {elapsed * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
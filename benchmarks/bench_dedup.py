@@ -0,0 +1,77 @@
+"""Compare ``json.dumps`` set keys with :func:`card_key`.
+
+Rooms hold nested stack cards with repeated subtrees, as produced by
+``auto_discover`` and tile templates.  Run with
+``python benchmarks/bench_dedup.py [stacks]``.
+"""
+
+from __future__ import annotations
+
+import copy
+import json
+import sys
+from typing import Any, Dict, List, Set
+
+from common import DOMAINS, install_ha_stubs, timeit
+
+install_ha_stubs()
+
+from custom_components.smart_dashboard.generator import (  # noqa: E402
+    deduplicate_across_rooms,
+    deduplicate_cards,
+)
+
+
+def _config(stacks: int, rooms: int = 30) -> Dict[str, Any]:
+    room_list: List[Dict[str, Any]] = [{"name": f"Room {r}", "cards": []} for r in range(rooms)]
+    for i in range(stacks):
+        tiles = [
+            {
+                "type": "custom:button-card",
+                "template": "device_tile",
+                "entity": f"{DOMAINS[j % len(DOMAINS)]}.entity_{(i * 3 + j) % (stacks * 2)}",
+                "styles": {"card": [{"border-radius": "12px"}, {"padding": "8px"}]},
+            }
+            for j in range(8)
+        ]
+        stack = {"type": "vertical-stack", "cards": tiles}
+        room = room_list[i % rooms]
+        room["cards"].append(stack)
+        if i % 4 == 0:
+            # Same stack repeated, as when discovery re-adds a room's devices
+            room["cards"].append(copy.deepcopy(stack))
+    return {"rooms": room_list}
+
+
+def _legacy(config: Dict[str, Any]) -> None:
+    for room in config.get("rooms", []):
+        seen: Set[str] = set()
+        unique = []
+        for card in room.get("cards", []):
+            key = json.dumps(card, sort_keys=True)
+            if key in seen:
+                continue
+            seen.add(key)
+            unique.append(card)
+        room["cards"] = unique
+
+
+def main() -> None:
+    stacks = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    base = _config(stacks)
+
+    copies = [copy.deepcopy(base) for _ in range(10)]
+    old = timeit(lambda: _legacy(copies.pop()))
+    new = timeit(lambda: deduplicate_cards(copies.pop()))
+
+    cfg = copy.deepcopy(base)
+    removed = deduplicate_cards(cfg)
+    across = deduplicate_across_rooms(cfg)
+    print(f"deduplicate {stacks} stacks of 8 tiles")
+    print(f"  json.dumps keys:              {old * 1000:8.2f} ms")
+    print(f"  card_key:                     {new * 1000:8.2f} ms")
+    print(f"  removed per room: {removed}, dashboard-wide: {across}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Compare one generation run per language with a single multi-language run.
+
+The separate runs repeat discovery, filtering, deduplication, tile building
+and the dashboard structure for each language; the shared run builds them
+once with translatable slots and only fills in the strings and serialises
+per language.  Run with
+``python benchmarks/bench_languages.py [entities] [rooms]``.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import yaml
+from common import install_ha_stubs, synthetic_config, timeit
+
+install_ha_stubs()
+
+from custom_components.smart_dashboard import generator  # noqa: E402
+from custom_components.smart_dashboard.snapshot import HassSnapshot  # noqa: E402
+from custom_components.smart_dashboard.translation import (  # noqa: E402
+    preload_translations,
+)
+
+LANGUAGES = ["en", "ru", "bg", "es", "fr"]
+
+
+def main() -> None:
+    entities = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    rooms = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    config = synthetic_config(entities, rooms)
+    snapshot = HassSnapshot(
+        [card["entity"] for room in config["rooms"] for card in room["cards"]]
+    )
+    preload_translations()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config_path = Path(tmp, "smart_dashboard.yaml")
+        config_path.write_text(yaml.safe_dump(config))
+        output = Path(tmp, "dashboard.yaml")
+
+        def separate() -> None:
+            for lang in LANGUAGES:
+                os.environ["SHI_LANG"] = lang
+                generator.generate_dashboard(
+                    config_path, output, snapshot=snapshot, force=True
+                )
+
+        def shared() -> None:
+            os.environ["SHI_LANG"] = LANGUAGES[0]
+            generator.generate_dashboard(
+                config_path,
+                output,
+                snapshot=snapshot,
+                force=True,
+                languages=LANGUAGES[1:],
+            )
+
+        print(f"languages, {entities} entities, {len(LANGUAGES)} languages")
+        for name, func in (("run per language", separate), ("shared build", shared)):
+            elapsed = timeit(func, 3)
+            print(f"  {name:16} {elapsed * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
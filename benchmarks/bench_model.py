@@ -0,0 +1,59 @@
+"""Compare the memory held by dict rooms and slotted model rooms.
+
+Both variants run the fused room pipeline, which creates a tile for every
+card; the dict variant keeps one dict per card and per tile, the model
+variant one :class:`Card` object each.  Run with
+``python benchmarks/bench_model.py [entities] [rooms]``.
+"""
+
+from __future__ import annotations
+
+import copy
+import sys
+import tracemalloc
+
+from common import install_ha_stubs, synthetic_config, timeit
+
+install_ha_stubs()
+
+from custom_components.smart_dashboard.model import rooms_from_config  # noqa: E402
+from custom_components.smart_dashboard.pipeline import RoomPipeline  # noqa: E402
+
+
+def as_dicts(rooms):
+    config = {"rooms": rooms}
+    return config, RoomPipeline().run(config)
+
+
+def as_model(rooms):
+    config = {"rooms": rooms_from_config(rooms)}
+    return config, RoomPipeline().run(config)
+
+
+def _measure(func, base):
+    elapsed = timeit(lambda: func(copy.deepcopy(base["rooms"])), 3)
+    elapsed -= timeit(lambda: copy.deepcopy(base["rooms"]), 3)
+    tracemalloc.start()
+    rooms = copy.deepcopy(base["rooms"])
+    result = func(rooms)
+    # The parsed config dicts are released once the model is built
+    del rooms
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return elapsed, current
+
+
+def main() -> None:
+    entities = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    rooms = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    base = synthetic_config(entities, rooms)
+
+    print(f"room model, {entities} cards in {rooms} rooms")
+    for name, func in (("dict rooms", as_dicts), ("slotted model", as_model)):
+        elapsed, current = _measure(func, base)
+        print(f"  {name:14} {elapsed * 1000:8.2f} ms  retained {current / 1e6:6.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Compare the separate per-room passes with the fused ``RoomPipeline``.
+
+The old flow walked every room's card list in ``filter_existing_entities``,
+``deduplicate_cards``, twice in ``apply_tile_templates`` (overview and room
+view) and once more in ``_group_cards_by_type`` for the Devices view.  Run
+with ``python benchmarks/bench_pipeline.py [entities] [rooms]``.
+"""
+
+from __future__ import annotations
+
+import copy
+import sys
+import tracemalloc
+
+from common import install_ha_stubs, synthetic_config, timeit
+
+install_ha_stubs()
+
+from custom_components.smart_dashboard.auto_discovery import (  # noqa: E402
+    _group_cards_by_type,
+)
+from custom_components.smart_dashboard.generator import (  # noqa: E402
+    deduplicate_cards,
+    filter_existing_entities,
+)
+from custom_components.smart_dashboard.pipeline import (  # noqa: E402
+    RoomPipeline,
+    group_stacks,
+)
+from custom_components.smart_dashboard.templates import (  # noqa: E402
+    apply_tile_templates,
+)
+
+
+def separate(config, known, passes):
+    filter_existing_entities(config, known=known)
+    deduplicate_cards(config)
+    passes[0] += 2 * len(config["rooms"])
+    views = []
+    device_cards = []
+    for room in config["rooms"]:
+        views.append(apply_tile_templates(room["cards"]))  # overview
+        views.append(apply_tile_templates(room["cards"]))  # room view
+        device_cards.extend(room["cards"])
+        passes[0] += 3
+    views.append(_group_cards_by_type(device_cards))  # Devices view
+    return views
+
+
+def fused(config, known, passes):
+    pipeline = RoomPipeline(known, deduplicate=True)
+    plans = pipeline.run(config)
+    passes[0] += pipeline.stats["traversals"]
+    return plans, group_stacks(plans)
+
+
+def _tiles(result):
+    """Count the distinct tile dicts held by *result*."""
+    seen = set()
+
+    def walk(node):
+        if isinstance(node, dict):
+            if node.get("type") == "custom:button-card":
+                seen.add(id(node))
+            for value in node.values():
+                walk(value)
+        elif isinstance(node, (list, tuple)):
+            for value in node:
+                walk(value)
+        elif hasattr(node, "tiles"):
+            walk(node.tiles)
+
+    walk(result)
+    return len(seen)
+
+
+def _measure(func, base, known):
+    passes = [0]
+    # Copies are made up front so only the processing itself is timed
+    repeat = 5
+    copies = iter([copy.deepcopy(base) for _ in range(repeat)])
+    elapsed = timeit(lambda: func(next(copies), known, [0]), repeat)
+    config = copy.deepcopy(base)
+    tracemalloc.start()
+    result = func(config, known, passes)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return passes[0] / len(base["rooms"]), elapsed, peak, _tiles(result)
+
+
+def main() -> None:
+    entities = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    rooms = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    base = synthetic_config(entities, rooms)
+    known = {c["entity"] for r in base["rooms"] for c in r["cards"] if c["entity"][-1] != "7"}
+
+    print(f"room processing, {entities} cards in {rooms} rooms")
+    for name, func in (("separate passes", separate), ("fused pipeline", fused)):
+        passes, elapsed, peak, tiles = _measure(func, base, known)
+        print(
+            f"  {name:16} {passes:4.0f} passes/room  {elapsed * 1000:8.2f} ms  "
+            f"peak {peak / 1e6:6.2f} MB  {tiles:6d} tile dicts"
+        )
+
+
+if __name__ == "__main__":
+    main()
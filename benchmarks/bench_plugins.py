@@ -0,0 +1,75 @@
+"""Measure the cost of running plugins isolated in worker threads.
+
+Compares calling ``process_config`` inline on the configuration with the
+registry run, which copies the configuration for each plugin and merges the
+changes, with the registry run reusing the cached changes of the
+unchanged inputs ``dwains_style`` declares, and shows two independent plugins that each wait 100 ms on I/O
+running concurrently.  Run with ``python benchmarks/bench_plugins.py
+[entities]``.
+"""
+
+from __future__ import annotations
+
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+from common import install_ha_stubs, synthetic_config, timeit
+
+install_ha_stubs()
+
+from custom_components.smart_dashboard.plugins import (  # noqa: E402
+    PLUGINS_DIR,
+    PluginRegistry,
+)
+
+SLOW_PLUGIN = """\
+import time
+INDEPENDENT = {independent}
+def process_config(config):
+    time.sleep(0.1)
+    config.setdefault("resources", []).append({{"url": "/local/{name}.js"}})
+"""
+
+
+def main() -> None:
+    entities = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    config = synthetic_config(entities)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        shutil.copy(PLUGINS_DIR / "dwains_style.py", directory)
+        registry = PluginRegistry(directory)
+        registry.load()
+        (plugin,) = registry.plugins()
+
+        print(f"plugins, {entities} entities")
+        elapsed = timeit(lambda: plugin.func(dict(config)))
+        print(f"  {'inline':22} {elapsed * 1000:8.2f} ms")
+
+        def isolated() -> None:
+            registry.cache.clear()
+            registry.run(dict(config))
+
+        elapsed = timeit(isolated)
+        print(f"  {'isolated':22} {elapsed * 1000:8.2f} ms")
+        elapsed = timeit(lambda: registry.run(dict(config)))
+        print(f"  {'cached':22} {elapsed * 1000:8.2f} ms")
+
+        for independent in (False, True):
+            slow = Path(tmp, "slow")
+            shutil.rmtree(slow, ignore_errors=True)
+            slow.mkdir()
+            for name in ("a", "b"):
+                source = SLOW_PLUGIN.format(independent=independent, name=name)
+                (slow / f"{name}.py").write_text(source)
+            registry = PluginRegistry(slow)
+            registry.load()
+            elapsed = timeit(lambda: registry.run({}), 3)
+            label = "2 x 100 ms concurrent" if independent else "2 x 100 ms in turn"
+            print(f"  {label:22} {elapsed * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Compare rebuilding the registry maps on every generation with the live
+incrementally maintained ``RegistryIndex``.
+
+Generations read the index through its snapshot, so a run after a registry
+change pays for a fresh copy and digest; only unchanged runs hit the cache.
+
+Run with ``python benchmarks/bench_registry_index.py [entities]``.
+"""
+
+from __future__ import annotations
+
+import sys
+import types
+
+from common import install_ha_stubs, timeit
+
+install_ha_stubs()
+
+from custom_components.smart_dashboard import snapshot as snapshot_mod  # noqa: E402
+from custom_components.smart_dashboard.registry_index import RegistryIndex  # noqa: E402
+from custom_components.smart_dashboard.snapshot import HassSnapshot  # noqa: E402
+
+
+def _fake_hass(entities: int):
+    ns = types.SimpleNamespace
+    areas = [ns(id=f"area_{i}", name=f"Area {i}") for i in range(50)]
+    devices = {
+        f"dev_{i}": ns(id=f"dev_{i}", area_id=f"area_{i % 50}")
+        for i in range(entities // 4)
+    }
+    entries = {
+        f"light.e{i}": ns(entity_id=f"light.e{i}", device_id=f"dev_{i // 4}")
+        for i in range(entities)
+    }
+    states = [ns(entity_id=f"light.e{i}", state="on") for i in range(entities)]
+    snapshot_mod.ar.async_get = lambda h: ns(async_list_areas=lambda: areas)
+    snapshot_mod.dr.async_get = lambda h: ns(devices=devices)
+    snapshot_mod.er.async_get = lambda h: ns(entities=entries)
+    return ns(states=ns(async_all=lambda: states))
+
+
+def main() -> None:
+    entities = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    hass = _fake_hass(entities)
+
+    def full_rebuild():
+        snap = HassSnapshot.async_capture(hass)
+        known = {state.entity_id for state in hass.states.async_all()}
+        return snap.digest, [snap.area_id(e) for e in snap.entities], known
+
+    index = RegistryIndex.async_build(hass)
+    counter = iter(range(10**9))
+
+    def incremental():
+        # One registry change followed by a generation
+        index.set_device("dev_0", f"area_{next(counter) % 50}")
+        snap = index.snapshot()
+        return snap.digest, [snap.area_id(e) for e in snap.entities], snap.known
+
+    def unchanged():
+        snap = index.snapshot()
+        return snap.digest, [snap.area_id(e) for e in snap.entities], snap.known
+
+    lookups = [f"light.e{i}" for i in range(0, entities, 7)]
+
+    def index_lookups():
+        for e in lookups:
+            index.is_known(e)
+            index.area_id(e)
+
+    rebuild = timeit(full_rebuild)
+    inc = timeit(incremental)
+    same = timeit(unchanged)
+    look = timeit(index_lookups)
+    print(f"registry data per generation, {entities} entities")
+    print(f"  full rebuild:                 {rebuild * 1000:8.2f} ms")
+    print(f"  index, one change:            {inc * 1000:8.2f} ms")
+    print(f"  index, no change (cached):    {same * 1000:8.2f} ms")
+    print(f"  {len(lookups)} index lookups:          {look * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Compare voluptuous validation with the compiled fast path.
+
+Validates a synthetic configuration shaped like one produced by
+``lovelace_cards_loader``: many rooms with thousands of free-form cards.
+Run with ``python benchmarks/bench_schema.py [entities] [rooms]``.
+"""
+
+from __future__ import annotations
+
+import copy
+import sys
+
+from common import install_ha_stubs, synthetic_config, timeit
+
+install_ha_stubs()
+
+from custom_components.smart_dashboard.schema import (  # noqa: E402
+    CONFIG_SCHEMA,
+    validate_config,
+)
+
+
+def _raw(entities: int, rooms: int):
+    config = synthetic_config(entities, rooms)
+    for index, room in enumerate(config["rooms"]):
+        # Leave the defaults to the validator and use a string order
+        del room["columns"], room["hidden"]
+        room["order"] = str(index)
+        for card in room["cards"]:
+            card["name"] = card["entity"].split(".")[1]
+    return config
+
+
+def main() -> None:
+    entities = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    rooms = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    raw = _raw(entities, rooms)
+    assert validate_config(copy.deepcopy(raw)) == CONFIG_SCHEMA(copy.deepcopy(raw))
+
+    print(f"config validation, {entities} cards in {rooms} rooms")
+    for name, func in (("voluptuous", CONFIG_SCHEMA), ("fast path", validate_config)):
+        elapsed = timeit(lambda: func(raw), 5)
+        print(f"  {name:12} {elapsed * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
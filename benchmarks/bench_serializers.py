@@ -0,0 +1,79 @@
+"""Compare the dashboard serializer backends and the YAML loaders.
+
+Each backend writes a generated dashboard to a temporary file; the loaders
+parse the synthetic configuration.  Run with
+``python benchmarks/bench_serializers.py [entities] [rooms]``.
+"""
+
+from __future__ import annotations
+
+import io
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+import yaml
+
+from common import install_ha_stubs, synthetic_config, timeit
+
+install_ha_stubs()
+
+from custom_components.smart_dashboard import serializers  # noqa: E402
+from custom_components.smart_dashboard.dashboard import build_dashboard  # noqa: E402
+from custom_components.smart_dashboard.fingerprint import (  # noqa: E402
+    write_if_changed,
+    write_stream_if_changed,
+)
+from custom_components.smart_dashboard.model import rooms_from_config  # noqa: E402
+
+
+def main() -> None:
+    entities = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    rooms = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    config = synthetic_config(entities, rooms)
+    config["rooms"] = rooms_from_config(config["rooms"])
+    dashboard = build_dashboard(config, "en")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "dashboard.yaml"
+        print(f"dashboard output, {entities} cards in {rooms} rooms")
+
+        def old():
+            # The previous behaviour: pure-Python emitter into one string
+            write_if_changed(path, serializers.dumps(dashboard, "python"))
+
+        runs = [("safe_dump string", old)]
+        for backend in ("python", "libyaml", "json"):
+            if backend in serializers._DUMPERS:
+                runs.append(
+                    (
+                        f"{backend} stream",
+                        lambda b=backend: write_stream_if_changed(
+                            path, lambda f: serializers.dump(dashboard, f, b)
+                        ),
+                    )
+                )
+        for name, func in runs:
+            path.unlink(missing_ok=True)
+            elapsed = timeit(func, 3)
+            path.unlink()
+            tracemalloc.start()
+            func()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            size = path.stat().st_size
+            print(
+                f"  {name:18} {elapsed * 1000:9.2f} ms  peak {peak / 1e6:6.2f} MB  "
+                f"{size / 1e6:6.2f} MB file"
+            )
+
+    text = yaml.safe_dump(synthetic_config(entities, rooms), sort_keys=False)
+    print(f"config load, {len(text) / 1e6:.2f} MB of YAML")
+    for name, loader in (("SafeLoader", yaml.SafeLoader), ("load_yaml", serializers.SafeLoader)):
+        elapsed = timeit(lambda: yaml.load(io.StringIO(text), Loader=loader), 3)
+        print(f"  {name:18} {elapsed * 1000:9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Compare peak memory of ``resp.json()`` with the streaming state parser.
+
+A synthetic ``/api/states`` body with large attributes (forecasts, media
+metadata) is parsed both ways under ``tracemalloc``.  Run with
+``python benchmarks/bench_streaming.py [entities]``.
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import time
+import tracemalloc
+
+from common import DOMAINS, install_ha_stubs
+
+install_ha_stubs()
+
+from custom_components.smart_dashboard.streaming import iter_states  # noqa: E402
+
+
+def _payload(entities: int) -> bytes:
+    forecast = [
+        {"datetime": f"2024-01-{d:02d}T00:00:00", "temperature": 20 + d, "condition": "sunny"}
+        for d in range(1, 15)
+    ]
+    states = []
+    for i in range(entities):
+        domain = DOMAINS[i % len(DOMAINS)]
+        attributes = {"friendly_name": f"Entity {i}", "icon": "mdi:home"}
+        if i % 10 == 0:
+            attributes["forecast"] = forecast
+            attributes["entity_picture"] = "/api/media_player_proxy/" + "x" * 200
+        states.append(
+            {
+                "entity_id": f"{domain}.entity_{i}",
+                "state": "on",
+                "attributes": attributes,
+                "last_changed": "2024-01-01T00:00:00+00:00",
+                "context": {"id": "01H" + "0" * 23, "parent_id": None, "user_id": None},
+            }
+        )
+    return json.dumps(states).encode()
+
+
+def _measure(func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main() -> None:
+    entities = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    body = _payload(entities)
+    chunk = 65536
+
+    def full():
+        return [s["entity_id"] for s in json.loads(body) if s.get("entity_id")]
+
+    def streamed():
+        chunks = (body[i:i + chunk] for i in range(0, len(body), chunk))
+        return [record.entity_id for record in iter_states(chunks)]
+
+    old, old_time, old_peak = _measure(full)
+    new, new_time, new_peak = _measure(streamed)
+    assert old == new
+    print(f"/api/states with {entities} entities ({len(body) / 1e6:.1f} MB)")
+    print(f"  resp.json():      peak {old_peak / 1e6:8.2f} MB  {old_time * 1000:8.2f} ms")
+    print(f"  streaming parse:  peak {new_peak / 1e6:8.2f} MB  {new_time * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
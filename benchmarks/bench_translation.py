@@ -0,0 +1,47 @@
+"""Compare ``build_dashboard`` with per-string ``asyncio.run(t(...))`` lookups
+against the preloaded synchronous translation catalog.
+
+Run with ``python benchmarks/bench_translation.py [entities]``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+
+from common import install_ha_stubs, synthetic_config, timeit
+
+install_ha_stubs()
+
+from custom_components.smart_dashboard import generator  # noqa: E402
+from custom_components.smart_dashboard.translation import (  # noqa: E402
+    preload_translations,
+    t,
+    translate,
+)
+
+
+def _legacy_translate(key, lang, default, **kwargs):
+    """Emulate the previous lookup: one event loop per translated string."""
+    value = asyncio.run(t(key, lang, default))
+    return value.format(**kwargs) if kwargs else value
+
+
+def main() -> None:
+    entities = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    preload_translations()
+    config = synthetic_config(entities, rooms=max(1, entities // 20))
+
+    generator.translate = _legacy_translate
+    legacy = timeit(lambda: generator.build_dashboard(config, "en"), repeat=3)
+    generator.translate = translate
+    catalog = timeit(lambda: generator.build_dashboard(config, "en"))
+
+    print(f"build_dashboard, {entities} entities")
+    print(f"  asyncio.run(t(...)) per string: {legacy * 1000:8.1f} ms")
+    print(f"  preloaded catalog:              {catalog * 1000:8.1f} ms")
+    print(f"  speedup:                        {legacy / catalog:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Compare one generation run per user with a single multi-variant run.
+
+Every room but a few carries a condition on ``user``; the separate runs
+repeat filtering, deduplication and tile building for each user, the
+variant run shares them and only evaluates the conditions per user.  Run
+with ``python benchmarks/bench_variants.py [entities] [users]``.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import yaml
+from common import install_ha_stubs, synthetic_config, timeit
+
+install_ha_stubs()
+
+from custom_components.smart_dashboard import generator  # noqa: E402
+from custom_components.smart_dashboard.snapshot import HassSnapshot  # noqa: E402
+
+
+def main() -> None:
+    entities = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    users = [f"user{i}" for i in range(int(sys.argv[2]) if len(sys.argv) > 2 else 10)]
+    config = synthetic_config(entities)
+    for index, room in enumerate(config["rooms"]):
+        if index % 3:
+            room["conditions"] = [f"user != '{users[index % len(users)]}'"]
+    snapshot = HassSnapshot(
+        [card["entity"] for room in config["rooms"] for card in room["cards"]]
+    )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config_path = Path(tmp, "smart_dashboard.yaml")
+        config_path.write_text(yaml.safe_dump(config))
+        output = Path(tmp, "smart_dashboard.yaml.out")
+
+        def separate() -> None:
+            for user in users:
+                os.environ["DASHBOARD_USER"] = user
+                generator.generate_dashboard(
+                    config_path, output, snapshot=snapshot, force=True
+                )
+
+        def shared() -> None:
+            generator.generate_dashboard(
+                config_path, output, snapshot=snapshot, force=True, users=users
+            )
+
+        print(f"variants, {entities} entities, {len(users)} users")
+        for name, func in (("run per user", separate), ("shared pass", shared)):
+            elapsed = timeit(func, 3)
+            print(f"  {name:14} {elapsed * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
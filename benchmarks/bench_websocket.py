@@ -0,0 +1,58 @@
+"""Compare sequential REST registry requests with the pipelined WebSocket
+client.
+
+Both stand-in servers add the same latency to every request or command.
+Run with ``python benchmarks/bench_websocket.py [entities] [latency_ms]``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+
+import requests
+
+from common import ROOT, install_ha_stubs, timeit
+
+install_ha_stubs()
+sys.path.insert(0, str(ROOT / "tests"))
+
+from bench_cli_snapshot import _responses, _serve  # noqa: E402
+from fake_hass_ws import FakeHassWebSocket  # noqa: E402
+
+from custom_components.smart_dashboard.websocket_client import (  # noqa: E402
+    async_fetch_snapshot,
+)
+
+
+def main() -> None:
+    entities = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 20) / 1000
+    rest = _responses(entities)
+    ws_data = {
+        "get_states": rest["/api/states"],
+        "config/area_registry/list": rest["/api/areas"],
+        "config/device_registry/list": rest["/api/devices"],
+        "config/entity_registry/list": rest["/api/entities"],
+    }
+    server = _serve(rest, latency)
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    def sequential_rest():
+        with requests.Session() as session:
+            for path in ("/api/states", "/api/areas", "/api/devices", "/api/entities"):
+                session.get(f"{url}{path}", timeout=10).json()
+
+    with FakeHassWebSocket(ws_data, token="x", latency=latency) as ws_server:
+        pipelined = timeit(
+            lambda: asyncio.run(async_fetch_snapshot(ws_server.url, "x")), 3
+        )
+    sequential = timeit(sequential_rest, 3)
+    server.shutdown()
+    print(f"states and registries, {entities} entities, {latency * 1000:.0f} ms latency")
+    print(f"  sequential REST requests:     {sequential * 1000:8.2f} ms")
+    print(f"  pipelined WebSocket commands: {pipelined * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
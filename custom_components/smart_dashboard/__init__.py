@@ -2,17 +2,25 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
-import shutil
+import threading
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import voluptuous as vol
+
 try:  # pragma: no cover - optional dependency for tests
     from homeassistant.util.yaml import load_yaml_dict, save_yaml
 except Exception:  # pragma: no cover - environment without Home Assistant
     import yaml
 
+    from .serializers import load_yaml
+
     def load_yaml_dict(path: Path) -> dict:
         with open(path, encoding="utf-8") as f:
-            return yaml.safe_load(f) or {}
+            return load_yaml(f) or {}
 
     def save_yaml(path: str, data: dict) -> None:
         Path(path).write_text(yaml.safe_dump(data, sort_keys=False))
@@ -20,28 +28,60 @@ except Exception:  # pragma: no cover - environment without Home Assistant
 from homeassistant.core import HomeAssistant
 from homeassistant.config_entries import ConfigEntry
 
-from .const import DOMAIN, DASHBOARD_DIR, DASHBOARD_FILE
+try:  # pragma: no cover - service responses need Home Assistant 2023.7+
+    from homeassistant.core import SupportsResponse
+except ImportError:  # pragma: no cover - environment without Home Assistant
+    SupportsResponse = None
+
+try:
+    from homeassistant.core import callback
+except ImportError:  # pragma: no cover - environment without Home Assistant
+    def callback(func):
+        # Mark the function like Home Assistant does so it runs on the loop
+        func._hass_callback = True
+        return func
 
-from .generator import generate_dashboard
+from .const import (
+    CONF_AUTO_REGENERATE,
+    CONF_CONDITIONS,
+    CONF_DEBOUNCE,
+    CONF_MAX_WAIT,
+    CONF_PER_USER,
+    DASHBOARD_DIR,
+    DASHBOARD_FILE,
+    DEFAULT_DEBOUNCE,
+    DEFAULT_MAX_WAIT,
+    DOMAIN,
+    EVENT_AREA_REGISTRY_UPDATED,
+    EVENT_DEVICE_REGISTRY_UPDATED,
+    EVENT_ENTITY_REGISTRY_UPDATED,
+)
+
+from .coordinator import GenerationCoordinator
+from . import plugins
+from .generator import (
+    GenerationCancelled,
+    GenerationResult,
+    async_generate_dashboard,
+    generate_dashboard,
+)
+from .regeneration import ConditionWatcher, ConfigFileWatcher, DebouncedRegenerator
+from .registry_index import RegistryIndex
+from .translation import preload_translations, translations_preloaded
+from .variants import variant_path, variant_slugs
 
 _LOGGER = logging.getLogger(__name__)
 
 
-def _create_default_config(hass: HomeAssistant) -> Path:
-    """Ensure default configuration exists and return its path."""
-    config_path = Path(hass.config.path("smart_dashboard.yaml"))
-    if not config_path.exists():
-        example = Path(__file__).parent / "config" / "example_config.yaml"
-        try:
-            shutil.copy(example, config_path)
-            _LOGGER.info("Created default configuration at %s", config_path)
-        except OSError as err:
-            _LOGGER.error("Failed to copy default config: %s", err)
-    return config_path
+# Copied to a missing smart_dashboard.yaml by the generation executor job
+_EXAMPLE_CONFIG = Path(__file__).parent / "config" / "example_config.yaml"
 
 
-def _ensure_dashboard_entry(hass: HomeAssistant) -> None:
-    """Insert Smart Dashboard entry into configuration.yaml if missing."""
+def _ensure_dashboard_entry(hass: HomeAssistant, users: Sequence[str] = ()) -> None:
+    """Insert Smart Dashboard entries into configuration.yaml if missing.
+
+    Every user in *users* gets a dashboard for their own variant.
+    """
     cfg_path = Path(hass.config.path("configuration.yaml"))
     data: dict = {}
     if cfg_path.exists():
@@ -52,15 +92,24 @@ def _ensure_dashboard_entry(hass: HomeAssistant) -> None:
             return
     lovelace = data.setdefault("lovelace", {})
     dashboards = lovelace.setdefault("dashboards", {})
-    if "smart-dashboard" in dashboards:
+    wanted = {"smart-dashboard": ("Smart Dashboard", Path(DASHBOARD_FILE))}
+    for user, slug in variant_slugs(users).items():
+        wanted[f"smart-dashboard-{slug.replace('_', '-')}"] = (
+            f"Smart Dashboard ({user})",
+            variant_path(Path(DASHBOARD_FILE), slug),
+        )
+    missing = [url_path for url_path in wanted if url_path not in dashboards]
+    if not missing:
         return
-    dashboards["smart-dashboard"] = {
-        "mode": "yaml",
-        "title": "Smart Dashboard",
-        "icon": "mdi:monitor-dashboard",
-        "show_in_sidebar": True,
-        "filename": "dashboards/smart_dashboard.yaml",
-    }
+    for url_path in missing:
+        title, filename = wanted[url_path]
+        dashboards[url_path] = {
+            "mode": "yaml",
+            "title": title,
+            "icon": "mdi:monitor-dashboard",
+            "show_in_sidebar": True,
+            "filename": f"{DASHBOARD_DIR}/{filename}",
+        }
     try:
         save_yaml(str(cfg_path), data)
         _LOGGER.info("Added Smart Dashboard to %s", cfg_path)
@@ -68,45 +117,277 @@ def _ensure_dashboard_entry(hass: HomeAssistant) -> None:
         _LOGGER.error("Failed to update %s: %s", cfg_path, err)
 
 
-async def _generate_dashboard_files(hass: HomeAssistant) -> None:
-    """Generate dashboard files from configuration."""
-    config_path = _create_default_config(hass)
-    output_dir = Path(hass.config.path(DASHBOARD_DIR))
-    output_dir.mkdir(exist_ok=True)
-    output_path = output_dir / DASHBOARD_FILE
+async def _async_preload_translations(hass: HomeAssistant) -> None:
+    """Load the translation catalog once per Home Assistant run."""
+    if not translations_preloaded():
+        await hass.async_add_executor_job(preload_translations)
+
+
+async def _generate_dashboard_files(
+    hass: HomeAssistant,
+    force: bool = False,
+    cancel: Optional[threading.Event] = None,
+    index: Optional[RegistryIndex] = None,
+    conditions: Sequence[str] = (),
+    users: Sequence[str] = (),
+) -> Optional[GenerationResult]:
+    """Generate dashboard files from configuration.
+
+    With a live *index* its snapshot is used instead of capturing the
+    registries and the state machine; it is only cheaper while the index is
+    unchanged since the previous run.  *conditions* are the global
+    conditions of the config entry; each of *users* also gets a variant.
+    """
+    config_path = Path(hass.config.path("smart_dashboard.yaml"))
+    output_path = Path(hass.config.path(DASHBOARD_DIR)) / DASHBOARD_FILE
+    result = None
     try:
-        await hass.async_add_executor_job(
-            generate_dashboard, config_path, output_path, None, hass
+        result = await async_generate_dashboard(
+            hass,
+            config_path,
+            output_path,
+            None,
+            force,
+            cancel,
+            index.snapshot() if index is not None else None,
+            conditions,
+            users,
+            default_config=_EXAMPLE_CONFIG,
         )
-        _LOGGER.info("Generated dashboard at %s", output_path)
+        if result.written:
+            _LOGGER.info("Generated dashboard at %s", output_path)
+        else:
+            _LOGGER.debug("Dashboard at %s is up to date", output_path)
+    except GenerationCancelled:
+        raise
     except Exception as err:  # pragma: no cover - runtime environment
         _LOGGER.error("Dashboard generation failed: %s", err)
-    await hass.async_add_executor_job(_ensure_dashboard_entry, hass)
+    await hass.async_add_executor_job(_ensure_dashboard_entry, hass, users)
+    return result
 
 
 async def async_setup(hass: HomeAssistant, config: dict) -> bool:
     """Set up via YAML is deprecated; create files and do nothing else."""
+    await _async_preload_translations(hass)
     await _generate_dashboard_files(hass)
     return True
 
 
+# Registry changes that can alter the discovered rooms
+_ENTITY_CHANGES = {"area_id", "device_id", "entity_id", "disabled_by"}
+
+
+def _registry_event_relevant(event) -> bool:
+    """Return ``True`` if a registry update may change the dashboard."""
+    data = event.data
+    if data.get("action") != "update":
+        return True
+    changes = data.get("changes") or {}
+    if event.event_type == EVENT_DEVICE_REGISTRY_UPDATED:
+        return "area_id" in changes
+    if event.event_type == EVENT_ENTITY_REGISTRY_UPDATED:
+        return bool(_ENTITY_CHANGES.intersection(changes))
+    return True
+
+
+def _entry_conditions(entry: ConfigEntry) -> List[str]:
+    """Return the global conditions of *entry*; options override the data."""
+    return list(
+        entry.options.get(CONF_CONDITIONS, entry.data.get(CONF_CONDITIONS)) or []
+    )
+
+
+async def _async_dashboard_users(hass: HomeAssistant, entry: ConfigEntry) -> List[str]:
+    """Return the names of the users that get their own dashboard variant."""
+    if not entry.options.get(CONF_PER_USER, False):
+        return []
+    users = await hass.auth.async_get_users()
+    names = {
+        user.name
+        for user in users
+        if user.is_active and not user.system_generated and user.name
+    }
+    return sorted(names)
+
+
+@dataclass
+class SmartDashboardData:
+    """Runtime objects of a loaded config entry."""
+
+    coordinator: GenerationCoordinator
+    regenerator: DebouncedRegenerator
+    index: Optional[RegistryIndex]
+    conditions: Optional[ConditionWatcher] = None
+    # Whether the listeners for automatic regeneration were attached
+    auto_regenerate: bool = True
+
+    @property
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        stats: Dict[str, Dict[str, Any]] = {
+            "generation": self.coordinator.stats,
+            "auto_regeneration": self.regenerator.stats,
+            "plugins": plugins.REGISTRY.stats,
+        }
+        if self.conditions is not None:
+            stats["auto_regeneration"] = {
+                **stats["auto_regeneration"],
+                "condition_triggers": self.conditions.triggers,
+            }
+        return stats
+
+
+GENERATE_SCHEMA = vol.Schema(
+    {
+        vol.Optional("force", default=False): bool,
+        vol.Optional("wait", default=True): bool,
+        vol.Optional("cancel_running", default=False): bool,
+    }
+)
+
+
+def _service_response(
+    result: Optional[GenerationResult], data: SmartDashboardData
+) -> Dict[str, Any]:
+    """Return the ``generate`` service response for *result*."""
+    response: Dict[str, Any] = {"success": result is not None, "stats": data.stats}
+    if result is not None:
+        response.update(
+            skipped=result.skipped,
+            written=result.written,
+            duration=round(result.duration, 4),
+            timings={k: round(v, 4) for k, v in result.timings.items()},
+            counters=dict(result.counters),
+            plugins={k: round(v, 4) for k, v in result.plugin_timings.items()},
+            background={k: round(v, 4) for k, v in result.background.items()},
+        )
+    return response
+
+
+def _apply_options(regenerator: DebouncedRegenerator, entry: ConfigEntry) -> None:
+    """Update the debounce windows from the entry options."""
+    options = entry.options
+    regenerator.debounce = float(options.get(CONF_DEBOUNCE, DEFAULT_DEBOUNCE))
+    regenerator.max_wait = float(options.get(CONF_MAX_WAIT, DEFAULT_MAX_WAIT))
+
+
+async def _async_setup_auto_regeneration(
+    hass: HomeAssistant, entry: ConfigEntry, regenerator: DebouncedRegenerator
+) -> None:
+    """Regenerate the dashboard when registries or the config file change."""
+
+    @callback
+    def _on_registry_event(event) -> None:
+        if _registry_event_relevant(event):
+            regenerator.async_schedule(event.event_type)
+
+    for event_type in (
+        EVENT_AREA_REGISTRY_UPDATED,
+        EVENT_DEVICE_REGISTRY_UPDATED,
+        EVENT_ENTITY_REGISTRY_UPDATED,
+    ):
+        entry.async_on_unload(hass.bus.async_listen(event_type, _on_registry_event))
+
+    watcher = ConfigFileWatcher(
+        hass,
+        Path(hass.config.path("smart_dashboard.yaml")),
+        lambda: regenerator.async_schedule("config_file"),
+    )
+    await watcher.async_start()
+    entry.async_on_unload(watcher.async_stop)
+
+
+async def _async_options_updated(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Apply new options and rebuild the dashboard.
+
+    The change listeners are attached at setup, so switching automatic
+    regeneration on or off reloads the entry.
+    """
+    data = hass.data.get(DOMAIN, {}).get(entry.entry_id)
+    if data is None:
+        return
+    if entry.options.get(CONF_AUTO_REGENERATE, True) != data.auto_regenerate:
+        await hass.config_entries.async_reload(entry.entry_id)
+        return
+    _apply_options(data.regenerator, entry)
+    data.regenerator.async_schedule("options")
+
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Smart Dashboard from a config entry."""
-    await _generate_dashboard_files(hass)
-    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = True
+    await _async_preload_translations(hass)
+
+    auto_regenerate = entry.options.get(CONF_AUTO_REGENERATE, True)
+    # Without automatic regeneration nothing needs to follow registry
+    # changes between runs; each run captures its own snapshot instead
+    index: Optional[RegistryIndex] = None
+    if auto_regenerate:
+        index = RegistryIndex.async_build(hass)
+        entry.async_on_unload(index.async_track(hass))
+    watcher: Optional[ConditionWatcher] = None
+
+    async def _run(cancel: threading.Event, force: bool) -> Optional[GenerationResult]:
+        result = await _generate_dashboard_files(
+            hass,
+            force,
+            cancel,
+            index,
+            _entry_conditions(entry),
+            await _async_dashboard_users(hass, entry),
+        )
+        # Follow whatever the conditions of this run read
+        if result is not None and watcher is not None:
+            watcher.async_update(result.dependencies)
+        return result
+
+    coordinator = GenerationCoordinator(_run)
+    first = await coordinator.async_generate()
+
+    # Registry changes make an in-flight run stale, so it may be cancelled
+    regenerator = DebouncedRegenerator(
+        lambda: coordinator.async_generate(cancel_running=True)
+    )
+    _apply_options(regenerator, entry)
+    if auto_regenerate:
+        watcher = ConditionWatcher(hass, regenerator.async_schedule)
+        entry.async_on_unload(watcher.async_stop)
+        if first is not None:
+            watcher.async_update(first.dependencies)
+    data = SmartDashboardData(
+        coordinator, regenerator, index, watcher, auto_regenerate=auto_regenerate
+    )
+    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = data
+    entry.async_on_unload(regenerator.async_cancel)
+    entry.async_on_unload(entry.add_update_listener(_async_options_updated))
+    if watcher is not None:
+        await _async_setup_auto_regeneration(hass, entry, regenerator)
 
     if not hass.services.has_service(DOMAIN, "generate"):
-        async def handle_generate(call) -> None:
-            await _generate_dashboard_files(hass)
+        async def handle_generate(call) -> Optional[Dict[str, Any]]:
+            options = GENERATE_SCHEMA(dict(call.data))
+            future = coordinator.async_request(
+                options["force"], options["cancel_running"]
+            )
+            wants_response = getattr(call, "return_response", False)
+            if not options["wait"]:
+                return {"queued": True} if wants_response else None
+            result = await asyncio.shield(future)
+            if wants_response:
+                return _service_response(result, data)
+            return None
 
-        hass.services.async_register(DOMAIN, "generate", handle_generate)
+        kwargs: Dict[str, Any] = {"schema": GENERATE_SCHEMA}
+        if SupportsResponse is not None:
+            kwargs["supports_response"] = SupportsResponse.OPTIONAL
+        hass.services.async_register(DOMAIN, "generate", handle_generate, **kwargs)
 
     return True
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
-    hass.data.get(DOMAIN, {}).pop(entry.entry_id, None)
+    data = hass.data.get(DOMAIN, {}).pop(entry.entry_id, None)
+    if data is not None:
+        await data.coordinator.async_shutdown()
     if not hass.data.get(DOMAIN):
         hass.services.async_remove(DOMAIN, "generate")
     return True
@@ -114,6 +395,7 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
 __all__ = [
     "generate_dashboard",
+    "async_generate_dashboard",
     "async_setup",
     "async_setup_entry",
     "async_unload_entry",
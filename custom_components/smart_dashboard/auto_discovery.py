@@ -1,19 +1,16 @@
 from __future__ import annotations
 
-import asyncio
 import logging
 import os
 from typing import Any, Dict, List, Optional, Set
 
 import requests
 from homeassistant.core import HomeAssistant
-from homeassistant.helpers import (
-    area_registry as ar,
-    device_registry as dr,
-    entity_registry as er,
-)
 
-from .translation import t
+from .snapshot import HassSnapshot
+from .streaming import stream_states
+from .translation import translate
+from .websocket_client import fetch_snapshot
 from .templates import apply_tile_templates
 
 logger = logging.getLogger(__name__)
@@ -44,13 +41,11 @@ def _get_known_entities(hass: Optional[HomeAssistant]) -> Set[str]:
     url = os.environ.get("HASS_URL", "http://localhost:8123").rstrip("/")
     headers = {"Authorization": f"Bearer {token}"}
     try:
-        resp = requests.get(f"{url}/api/states", headers=headers, timeout=10)
-        resp.raise_for_status()
-        return {
-            item.get("entity_id")
-            for item in resp.json()
-            if item.get("entity_id") is not None
-        }
+        with requests.get(
+            f"{url}/api/states", headers=headers, timeout=10, stream=True
+        ) as resp:
+            resp.raise_for_status()
+            return {record.entity_id for record in stream_states(resp)}
     except Exception:
         logger.warning("Failed to fetch entity list", exc_info=True)
         return set()
@@ -93,79 +88,24 @@ def _group_cards_by_type(cards: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     return result
 
 
-def discover_devices(hass_url: str, token: str, lang: str) -> List[Dict[str, Any]]:
-    """Return rooms generated from available Home Assistant devices."""
-
-    headers = {"Authorization": f"Bearer {token}"}
-
-    resp = requests.get(
-        f"{hass_url.rstrip('/')}/api/states",
-        headers=headers,
-        timeout=10,
-    )
-    resp.raise_for_status()
-    states = resp.json()
-
-    # Try to fetch area, device and entity registries to map entities to areas
-    areas: Dict[str | None, str] = {}
-    try:
-        a_resp = requests.get(
-            f"{hass_url.rstrip('/')}/api/areas",
-            headers=headers,
-            timeout=10,
-        )
-        a_resp.raise_for_status()
-        for area in a_resp.json():
-            area_id = area.get("area_id") or area.get("id")
-            name = area.get("name") or "Area"
-            areas[area_id] = name
-    except Exception:
-        logger.info("Area lookup failed, falling back to single room")
-
-    device_areas: Dict[str, str | None] = {}
-    try:
-        d_resp = requests.get(
-            f"{hass_url.rstrip('/')}/api/devices",
-            headers=headers,
-            timeout=10,
-        )
-        d_resp.raise_for_status()
-        for dev in d_resp.json():
-            dev_id = dev.get("id") or dev.get("device_id")
-            device_areas[dev_id] = dev.get("area_id")
-    except Exception:
-        pass
-
-    entity_devices: Dict[str, str] = {}
-    try:
-        e_resp = requests.get(
-            f"{hass_url.rstrip('/')}/api/entities",
-            headers=headers,
-            timeout=10,
-        )
-        e_resp.raise_for_status()
-        for ent in e_resp.json():
-            entity_devices[ent.get("entity_id")] = ent.get("device_id")
-    except Exception:
-        pass
+def discover_from_snapshot(
+    snapshot: HassSnapshot, lang: str
+) -> List[Dict[str, Any]]:
+    """Return rooms generated from the entities and registries in *snapshot*."""
+    areas = snapshot.areas
 
+    fallback = translate("auto_detected", lang, "Auto Detected")
     rooms: Dict[str, List[Dict[str, Any]]] = {}
     seen_entities: Set[str] = set()
-    for state in states:
-        entity_id = state.get("entity_id")
-        if not entity_id or entity_id in seen_entities:
+    for entity_id in snapshot.entities:
+        if entity_id in seen_entities:
             continue
         seen_entities.add(entity_id)
         domain = entity_id.split(".")[0]
         card_type = DOMAIN_CARD_TYPE.get(domain, "entity")
 
-        device_id = entity_devices.get(entity_id)
-        area_id = device_areas.get(device_id)
-        area_name = (
-            areas.get(area_id, asyncio.run(t("auto_detected", lang, "Auto Detected")))
-            if areas
-            else asyncio.run(t("auto_detected", lang, "Auto Detected"))
-        )
+        area_id = snapshot.area_id(entity_id)
+        area_name = areas.get(area_id, fallback) if areas else fallback
         rooms.setdefault(area_name, []).append({"type": card_type, "entity": entity_id})
 
     return [
@@ -174,55 +114,26 @@ def discover_devices(hass_url: str, token: str, lang: str) -> List[Dict[str, Any
     ]
 
 
+def discover_devices(hass_url: str, token: str, lang: str) -> List[Dict[str, Any]]:
+    """Return rooms generated from available Home Assistant devices.
+
+    Registries are read over the WebSocket API when possible so entities are
+    mapped to their areas in one round trip; REST is the fallback.
+    """
+    return discover_from_snapshot(fetch_snapshot(hass_url, token), lang)
+
+
 async def async_discover_devices_internal(
     hass: HomeAssistant, lang: str
 ) -> List[Dict[str, Any]]:
     """Return rooms generated using Home Assistant's internal registries."""
-
-    states = hass.states.async_all()
-
-    area_reg = ar.async_get(hass)
-    device_reg = dr.async_get(hass)
-    entity_reg = er.async_get(hass)
-
-    areas: Dict[str | None, str] = {
-        area.id: area.name for area in area_reg.async_list_areas()
-    }
-    device_areas: Dict[str, str | None] = {
-        device.id: device.area_id for device in device_reg.devices.values()
-    }
-    entity_devices: Dict[str, str] = {
-        ent.entity_id: ent.device_id for ent in entity_reg.entities.values()
-    }
-
-    rooms: Dict[str, List[Dict[str, Any]]] = {}
-    seen_entities: Set[str] = set()
-    for state in states:
-        entity_id = state.entity_id
-        if entity_id in seen_entities:
-            continue
-        seen_entities.add(entity_id)
-        domain = entity_id.split(".")[0]
-        card_type = DOMAIN_CARD_TYPE.get(domain, "entity")
-
-        device_id = entity_devices.get(entity_id)
-        area_id = device_areas.get(device_id)
-        area_name = (
-            areas.get(area_id, await t("auto_detected", lang, "Auto Detected"))
-            if areas
-            else await t("auto_detected", lang, "Auto Detected")
-        )
-        rooms.setdefault(area_name, []).append({"type": card_type, "entity": entity_id})
-
-    return [
-        {"name": name, "cards": _group_cards_by_type(cards)}
-        for name, cards in rooms.items()
-    ]
+    return discover_from_snapshot(HassSnapshot.async_capture(hass), lang)
 
 
 __all__ = [
     "discover_devices",
     "async_discover_devices_internal",
+    "discover_from_snapshot",
     "_get_known_entities",
     "_group_cards_by_type",
 ]
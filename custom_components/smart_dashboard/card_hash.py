@@ -0,0 +1,29 @@
+"""Structural identity of card definitions."""
+
+from __future__ import annotations
+
+import json
+from typing import Any
+
+
+def _default(obj: Any) -> Any:
+    # Model objects encode like the dicts they were built from
+    to_dict = getattr(obj, "to_dict", None)
+    return to_dict(deep=False) if to_dict is not None else repr(obj)
+
+
+_encode = json.JSONEncoder(
+    sort_keys=True, separators=(",", ":"), default=_default
+).encode
+
+
+def card_key(card: Any) -> str:
+    """Return a key that is equal for structurally equal cards.
+
+    The key is the sorted-keys JSON encoding of *card*, produced by one
+    shared C encoder instead of a new encoder per ``json.dumps`` call.  Two
+    cards get the same key exactly when ``json.dumps(card, sort_keys=True)``
+    would produce the same string; a model :class:`~.model.Card` gets the
+    key of the dict it was built from.
+    """
+    return _encode(card)
@@ -0,0 +1,318 @@
+"""Compiled room and sidebar conditions.
+
+A condition is a Python expression restricted to names, literals,
+comparisons (including ``in``), ``and``/``or``/``not``, tuple, list or set
+displays and entity states written as ``states['light.kitchen']``.
+Expressions are parsed once, checked against that whitelist and compiled;
+anything else, such as calls or attribute access, is rejected when the
+configuration is loaded.  Without attribute access there is no way to reach
+interpreter internals from a condition.
+
+Names resolve to environment variables, ``user`` and the current time
+(:data:`TIME_NAMES`).  Each compiled condition records the names and
+entities it reads so callers can tell which changes may alter its result.
+"""
+
+from __future__ import annotations
+
+import ast
+import logging
+import os
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Any, Callable, FrozenSet, Iterable, Iterator, Mapping, Optional, Set
+
+try:
+    from homeassistant.util import dt as dt_util
+
+    _now: Callable[[], datetime] = dt_util.now
+except ImportError:  # pragma: no cover - environment without Home Assistant
+    _now = datetime.now
+
+logger = logging.getLogger(__name__)
+
+STATES = "states"
+
+# Time of day and calendar values, with the period after which each changes
+TIME_NAMES: Mapping[str, str] = {
+    "minute": "minute",
+    "time": "minute",
+    "hour": "hour",
+    "weekday": "day",
+    "date": "day",
+}
+
+
+_PERIODS = {
+    "minute": timedelta(minutes=1),
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+}
+
+
+def current_time() -> datetime:
+    """Return the current time, in Home Assistant's time zone when available."""
+    return _now()
+
+
+_EVAL_GLOBALS = {"__builtins__": {}}
+
+_ALLOWED_NODES = (
+    ast.Expression,
+    ast.Name,
+    ast.Load,
+    ast.Constant,
+    ast.Compare,
+    ast.BoolOp,
+    ast.And,
+    ast.Or,
+    ast.UnaryOp,
+    ast.Not,
+    ast.Tuple,
+    ast.List,
+    ast.Set,
+    ast.Eq,
+    ast.NotEq,
+    ast.Lt,
+    ast.LtE,
+    ast.Gt,
+    ast.GtE,
+    ast.In,
+    ast.NotIn,
+    ast.Is,
+    ast.IsNot,
+    ast.Subscript,
+)
+
+_CONSTANT_TYPES = (str, int, float, bool, type(None))
+
+
+class ConditionError(ValueError):
+    """Raised for a condition that is not a valid, allowed expression."""
+
+
+class Condition:
+    """A compiled condition with the names and entity states it reads."""
+
+    __slots__ = ("expr", "names", "entities", "_code")
+
+    def __init__(
+        self, expr: str, names: FrozenSet[str], entities: FrozenSet[str], code: Any
+    ) -> None:
+        self.expr = expr
+        self.names = names
+        self.entities = entities
+        self._code = code
+
+    def __call__(self, ctx: Mapping[str, Any]) -> bool:
+        """Evaluate the condition; names are looked up in *ctx*."""
+        return bool(eval(self._code, _EVAL_GLOBALS, ctx))
+
+    def __repr__(self) -> str:
+        return f"Condition({self.expr!r})"
+
+
+@lru_cache(maxsize=1024)
+def compile_condition(expr: str) -> Condition:
+    """Return the compiled :class:`Condition` for *expr*.
+
+    Results are cached by expression text.  Raises :class:`ConditionError`
+    for syntax errors and disallowed constructs.
+    """
+    if not isinstance(expr, str):
+        raise ConditionError(f"condition must be a string, got {type(expr).__name__}")
+    try:
+        tree = ast.parse(expr.strip(), mode="eval")
+    except SyntaxError as err:
+        raise ConditionError(f"invalid condition '{expr}': {err.msg}") from None
+    names = set()
+    entities = set()
+    indexed = set()
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise ConditionError(
+                f"invalid condition '{expr}': {type(node).__name__} is not allowed"
+            )
+        if isinstance(node, ast.Constant) and not isinstance(node.value, _CONSTANT_TYPES):
+            raise ConditionError(f"invalid condition '{expr}': unsupported literal")
+        if isinstance(node, ast.Subscript):
+            # Only states['<entity_id>'] may be indexed
+            if not (
+                isinstance(node.value, ast.Name)
+                and node.value.id == STATES
+                and isinstance(node.slice, ast.Constant)
+                and isinstance(node.slice.value, str)
+            ):
+                raise ConditionError(
+                    f"invalid condition '{expr}': only states['entity_id'] can be indexed"
+                )
+            entities.add(node.slice.value)
+            indexed.add(id(node.value))
+        elif isinstance(node, ast.Name):
+            if node.id.startswith("__"):
+                raise ConditionError(f"invalid condition '{expr}': name '{node.id}'")
+            if node.id == STATES:
+                if id(node) not in indexed:
+                    raise ConditionError(
+                        f"invalid condition '{expr}': use states['entity_id']"
+                    )
+            else:
+                names.add(node.id)
+    code = compile(tree, "<condition>", "eval")
+    return Condition(expr, frozenset(names), frozenset(entities), code)
+
+
+def check_condition(expr: Any) -> str:
+    """Validate *expr* for the configuration schema; returns it unchanged."""
+    compile_condition(expr)
+    return expr
+
+
+class StateValues(Mapping[str, Optional[str]]):
+    """``states`` as seen by conditions: the state string of an entity.
+
+    *lookup* returns the state of an entity ID or ``None``; unknown
+    entities read as ``None`` instead of failing the condition.
+    """
+
+    def __init__(self, lookup: Callable[[str], Optional[str]]) -> None:
+        self._lookup = lookup
+
+    @classmethod
+    def from_mapping(cls, states: Mapping[str, Optional[str]]) -> "StateValues":
+        return cls(states.get)
+
+    def __getitem__(self, entity_id: str) -> Optional[str]:
+        return self._lookup(entity_id)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(())
+
+    def __len__(self) -> int:
+        return 0
+
+
+def _time_value(now: datetime, name: str) -> Any:
+    if name == "hour":
+        return now.hour
+    if name == "minute":
+        return now.minute
+    if name == "weekday":
+        return now.weekday()
+    if name == "time":
+        return now.strftime("%H:%M")
+    return now.date().isoformat()
+
+
+class ConditionContext(Mapping[str, Any]):
+    """Names visible to conditions, resolved on first use.
+
+    Environment variables are read from ``os.environ`` when a condition asks
+    for them instead of being copied for every evaluation; ``user`` falls
+    back to ``DASHBOARD_USER``, ``SD_USER`` or ``USER``.  The time names
+    read *now* (the current time when not given), ``states`` reads *states*
+    and *values* take precedence over everything else.
+    """
+
+    def __init__(
+        self,
+        values: Optional[Mapping[str, Any]] = None,
+        states: Optional[Mapping[str, Optional[str]]] = None,
+        now: Optional[datetime] = None,
+    ) -> None:
+        self._values = dict(values or {})
+        self._values.setdefault(STATES, states if states is not None else {})
+        self._now = now
+
+    @property
+    def now(self) -> datetime:
+        if self._now is None:
+            self._now = current_time()
+        return self._now
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._values:
+            return self._values[key]
+        if key in TIME_NAMES:
+            return _time_value(self.now, key)
+        value = os.environ.get(key)
+        if value is None and key == "user":
+            env = os.environ
+            value = env.get("DASHBOARD_USER") or env.get("SD_USER") or env.get("USER")
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        names = set(self._values) | set(os.environ) | set(TIME_NAMES) | {"user"}
+        return (name for name in names if name in self)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __contains__(self, key: object) -> bool:
+        if not isinstance(key, str):
+            return False
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+
+def evaluate(expr: str, ctx: Mapping[str, Any]) -> bool:
+    """Evaluate *expr* in *ctx*; failures are logged and count as ``False``."""
+    try:
+        return compile_condition(expr)(ctx)
+    except ConditionError as err:
+        logger.error("%s", err)
+    except NameError as err:
+        logger.debug("Condition '%s' is false: %s", expr, err)
+    except Exception as err:
+        logger.warning("Failed to evaluate condition '%s': %s", expr, err)
+    return False
+
+
+@dataclass
+class ConditionDependencies:
+    """What a set of conditions reads.
+
+    ``period`` is the shortest time unit (``"minute"``, ``"hour"`` or
+    ``"day"``) whose change can alter a result, or ``None`` when no
+    condition reads the time.
+    """
+
+    names: Set[str] = field(default_factory=set)
+    entities: Set[str] = field(default_factory=set)
+    period: Optional[str] = None
+
+    def __bool__(self) -> bool:
+        return bool(self.names or self.entities)
+
+    def next_change(self, now: datetime) -> Optional[datetime]:
+        """Return the next time boundary at which a result may change."""
+        if self.period is None:
+            return None
+        start = now.replace(second=0, microsecond=0)
+        if self.period in ("hour", "day"):
+            start = start.replace(minute=0)
+        if self.period == "day":
+            start = start.replace(hour=0)
+        return start + _PERIODS[self.period]
+
+
+def dependencies(exprs: Iterable[str]) -> ConditionDependencies:
+    """Collect the dependencies of the valid expressions in *exprs*."""
+    deps = ConditionDependencies()
+    for expr in exprs:
+        try:
+            cond = compile_condition(expr)
+        except (ConditionError, TypeError):
+            continue
+        deps.names |= cond.names
+        deps.entities |= cond.entities
+    periods = [TIME_NAMES[name] for name in deps.names if name in TIME_NAMES]
+    if periods:
+        deps.period = min(periods, key=lambda p: _PERIODS[p])
+    return deps
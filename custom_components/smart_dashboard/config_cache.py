@@ -0,0 +1,158 @@
+"""Cache of parsed and validated configuration files."""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from .fingerprint import atomic_write_bytes, code_digest
+
+logger = logging.getLogger(__name__)
+
+CACHE_FORMAT = 1
+
+# Filesystems with coarse timestamps can store a second write within the
+# same tick; entries recorded this soon after the file's mtime are verified
+# by content hash instead of being trusted on stat alone (as git does for
+# "racily clean" index entries)
+_RACY_WINDOW_NS = 2_000_000_000
+
+
+@dataclass
+class _Entry:
+    mtime_ns: int
+    size: int
+    digest: str
+    recorded_ns: int
+    # The validated config, pickled; unpickling yields a private copy
+    blob: bytes
+
+
+class ConfigCache:
+    """Parsed and validated configs keyed on path, mtime, size and content.
+
+    *parse* turns the raw file contents into the validated config.  It runs
+    only when a file's content hash changed; a file whose mtime and size are
+    unchanged is not even read.  Every :meth:`load` returns a fresh copy, so
+    callers (and plugins) may mutate the result in place.
+
+    With *cache_dir* the entries are also pickled to disk, which lets
+    separate command line runs share them.  Entries are tied to the
+    generator's code digest, so upgrading the integration (and with it the
+    schema) invalidates them.  Only point *cache_dir* at a directory that
+    other users cannot write to.
+    """
+
+    def __init__(
+        self,
+        parse: Callable[[bytes], Dict[str, Any]],
+        cache_dir: Optional[Path] = None,
+        max_entries: int = 8,
+    ) -> None:
+        self._parse = parse
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._code: Optional[str] = None
+        self.hits = 0
+        self.misses = 0
+
+    def load(self, path: Path) -> Dict[str, Any]:
+        """Return a private copy of the validated config stored at *path*."""
+        key = os.path.abspath(path)
+        st = os.stat(key)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None and self.cache_dir is not None:
+            entry = self._read_disk(key)
+            if entry is not None:
+                self._remember(key, entry)
+        if entry is not None and self._unchanged(entry, st):
+            self.hits += 1
+            return pickle.loads(entry.blob)
+
+        data = Path(key).read_bytes()
+        digest = hashlib.sha256(data).hexdigest()
+        if entry is not None and entry.digest == digest:
+            # Touched but unchanged
+            self.hits += 1
+            blob = entry.blob
+        else:
+            self.misses += 1
+            blob = pickle.dumps(self._parse(data), pickle.HIGHEST_PROTOCOL)
+        entry = _Entry(st.st_mtime_ns, st.st_size, digest, time.time_ns(), blob)
+        self._remember(key, entry)
+        if self.cache_dir is not None:
+            self._write_disk(key, entry)
+        return pickle.loads(blob)
+
+    def _remember(self, key: str, entry: _Entry) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Forget every in-memory entry."""
+        with self._lock:
+            self._entries.clear()
+
+    @staticmethod
+    def _unchanged(entry: _Entry, st: os.stat_result) -> bool:
+        return (
+            entry.mtime_ns == st.st_mtime_ns
+            and entry.size == st.st_size
+            and entry.recorded_ns - entry.mtime_ns >= _RACY_WINDOW_NS
+        )
+
+    def _code_digest(self) -> str:
+        if self._code is None:
+            self._code = code_digest()
+        return self._code
+
+    def _disk_path(self, key: str) -> Path:
+        name = hashlib.sha256(key.encode()).hexdigest()[:32]
+        return self.cache_dir / f"config-{name}.pickle"
+
+    def _read_disk(self, key: str) -> Optional[_Entry]:
+        try:
+            with self._disk_path(key).open("rb") as f:
+                stored = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as err:  # corrupt or foreign file
+            logger.debug("Ignoring config cache for %s: %s", key, err)
+            return None
+        if (
+            not isinstance(stored, dict)
+            or stored.get("format") != CACHE_FORMAT
+            or stored.get("path") != key
+            or stored.get("code") != self._code_digest()
+        ):
+            return None
+        return stored["entry"]
+
+    def _write_disk(self, key: str, entry: _Entry) -> None:
+        stored = {
+            "format": CACHE_FORMAT,
+            "path": key,
+            "code": self._code_digest(),
+            "entry": entry,
+        }
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            atomic_write_bytes(
+                self._disk_path(key), pickle.dumps(stored, pickle.HIGHEST_PROTOCOL)
+            )
+        except OSError as err:
+            logger.warning("Failed to store config cache: %s", err)
@@ -9,7 +9,28 @@ import voluptuous as vol
 from homeassistant import config_entries
 from homeassistant.core import callback
 
-from .const import DOMAIN
+from .conditions import ConditionError, compile_condition
+from .const import (
+    CONF_AUTO_REGENERATE,
+    CONF_CONDITIONS,
+    CONF_DEBOUNCE,
+    CONF_MAX_WAIT,
+    CONF_PER_USER,
+    DEFAULT_DEBOUNCE,
+    DEFAULT_MAX_WAIT,
+    DOMAIN,
+)
+
+
+def _parse_conditions(text: str) -> list[str]:
+    """Split *text* into conditions, one per line.
+
+    Raises :class:`ConditionError` for a condition that does not compile.
+    """
+    conditions = [c.strip() for c in text.strip().splitlines() if c.strip()]
+    for cond in conditions:
+        compile_condition(cond)
+    return conditions
 
 
 class SmartDashboardConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
@@ -22,16 +43,21 @@ class SmartDashboardConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         await self.async_set_unique_id(DOMAIN)
         self._abort_if_unique_id_configured()
 
+        errors: dict[str, str] = {}
         if user_input is not None:
-            cond_text = user_input.get("conditions", "").strip()
-            conditions = [c.strip() for c in cond_text.splitlines() if c.strip()]
-            return self.async_create_entry(
-                title="Smart Dashboard", data={"conditions": conditions}
-            )
+            try:
+                conditions = _parse_conditions(user_input.get(CONF_CONDITIONS, ""))
+            except ConditionError:
+                errors[CONF_CONDITIONS] = "invalid_condition"
+            else:
+                return self.async_create_entry(
+                    title="Smart Dashboard", data={CONF_CONDITIONS: conditions}
+                )
 
         return self.async_show_form(
             step_id="user",
-            data_schema=vol.Schema({vol.Optional("conditions"): str}),
+            data_schema=vol.Schema({vol.Optional(CONF_CONDITIONS): str}),
+            errors=errors,
         )
 
     @staticmethod
@@ -49,15 +75,46 @@ class SmartDashboardOptionsFlowHandler(config_entries.OptionsFlow):
 
     async def async_step_init(self, user_input: dict[str, Any] | None = None):
         """Manage options for Smart Dashboard."""
+        errors: dict[str, str] = {}
         if user_input is not None:
-            cond_text = user_input.get("conditions", "").strip()
-            conditions = [c.strip() for c in cond_text.splitlines() if c.strip()]
-            return self.async_create_entry(data={"conditions": conditions})
-
-        cond_text = "\n".join(self.entry.data.get("conditions", []))
+            try:
+                conditions = _parse_conditions(user_input.get(CONF_CONDITIONS, ""))
+            except ConditionError:
+                errors[CONF_CONDITIONS] = "invalid_condition"
+            else:
+                return self.async_create_entry(
+                    data={
+                        CONF_CONDITIONS: conditions,
+                        CONF_AUTO_REGENERATE: user_input.get(CONF_AUTO_REGENERATE, True),
+                        CONF_DEBOUNCE: user_input.get(CONF_DEBOUNCE, DEFAULT_DEBOUNCE),
+                        CONF_MAX_WAIT: user_input.get(CONF_MAX_WAIT, DEFAULT_MAX_WAIT),
+                        CONF_PER_USER: user_input.get(CONF_PER_USER, False),
+                    }
+                )
+
+        options = self.entry.options
+        cond_text = "\n".join(
+            options.get(CONF_CONDITIONS, self.entry.data.get(CONF_CONDITIONS, []))
+        )
         return self.async_show_form(
             step_id="init",
             data_schema=vol.Schema({
-                vol.Optional("conditions", default=cond_text): str
+                vol.Optional(CONF_CONDITIONS, default=cond_text): str,
+                vol.Optional(
+                    CONF_AUTO_REGENERATE,
+                    default=options.get(CONF_AUTO_REGENERATE, True),
+                ): bool,
+                vol.Optional(
+                    CONF_DEBOUNCE,
+                    default=options.get(CONF_DEBOUNCE, DEFAULT_DEBOUNCE),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                vol.Optional(
+                    CONF_MAX_WAIT,
+                    default=options.get(CONF_MAX_WAIT, DEFAULT_MAX_WAIT),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                vol.Optional(
+                    CONF_PER_USER, default=options.get(CONF_PER_USER, False)
+                ): bool,
             }),
+            errors=errors,
         )
@@ -3,3 +3,21 @@ DASHBOARD_DIR = "dashboards"
 DASHBOARD_FILE = "smart_dashboard.yaml"
 DEFAULT_OVERVIEW_LIMIT = 4
 DEFAULT_GRID_COLUMNS = 2
+
+CONF_CONDITIONS = "conditions"
+CONF_AUTO_REGENERATE = "auto_regenerate"
+CONF_DEBOUNCE = "debounce"
+CONF_MAX_WAIT = "max_wait"
+# Write a dashboard variant for every Home Assistant user
+CONF_PER_USER = "per_user"
+# Seconds of quiet required before regenerating, and the longest a burst of
+# changes may postpone a regeneration.
+DEFAULT_DEBOUNCE = 5.0
+DEFAULT_MAX_WAIT = 60.0
+# Seconds between checks of ``smart_dashboard.yaml`` for modifications
+CONFIG_POLL_INTERVAL = 30.0
+
+EVENT_AREA_REGISTRY_UPDATED = "area_registry_updated"
+EVENT_DEVICE_REGISTRY_UPDATED = "device_registry_updated"
+EVENT_ENTITY_REGISTRY_UPDATED = "entity_registry_updated"
+EVENT_STATE_CHANGED = "state_changed"
@@ -0,0 +1,137 @@
+"""Single-flight coordination of dashboard generation runs."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from .generator import GenerationCancelled
+
+_LOGGER = logging.getLogger(__name__)
+
+RunFunc = Callable[[threading.Event, bool], Awaitable[Any]]
+
+
+class _Job:
+    """A generation run shared by every request coalesced into it."""
+
+    def __init__(self, force: bool) -> None:
+        self.force = force
+        self.cancel = threading.Event()
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        # Retrieve exceptions so unawaited requests do not log warnings
+        self.future.add_done_callback(
+            lambda fut: fut.cancelled() or fut.exception()
+        )
+
+
+class GenerationCoordinator:
+    """Run at most one generation at a time with at most one queued behind it.
+
+    Requests arriving while a run is in progress join the queued run.  A
+    request may also mark the in-flight run as stale; that run then stops at
+    its next stage boundary and its callers receive the queued run's result.
+    """
+
+    def __init__(self, run: RunFunc) -> None:
+        self._run = run
+        self._current: Optional[_Job] = None
+        self._pending: Optional[_Job] = None
+        self._task: Optional[asyncio.Task] = None
+        self.requests = 0
+        self.runs = 0
+        self.coalesced = 0
+        self.cancelled = 0
+
+    @property
+    def running(self) -> bool:
+        """Return ``True`` while a generation is in progress."""
+        return self._current is not None
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Return request counters."""
+        return {
+            "requests": self.requests,
+            "runs": self.runs,
+            "coalesced": self.coalesced,
+            "cancelled": self.cancelled,
+        }
+
+    def async_request(
+        self, force: bool = False, cancel_running: bool = False
+    ) -> asyncio.Future:
+        """Request a generation and return the shared future of its run.
+
+        ``cancel_running`` marks the in-flight run as stale.  The future is
+        shared by all coalesced requests; use :meth:`async_generate` to wait
+        for it without the risk of cancelling it for everybody.
+        """
+        self.requests += 1
+        if self._current is None:
+            job = self._current = _Job(force)
+            self._task = asyncio.get_running_loop().create_task(self._drive())
+            return job.future
+
+        if self._pending is None:
+            self._pending = _Job(force)
+        else:
+            self._pending.force |= force
+            self.coalesced += 1
+        if cancel_running:
+            self._current.cancel.set()
+        return self._pending.future
+
+    async def async_generate(
+        self, force: bool = False, cancel_running: bool = False
+    ) -> Any:
+        """Request a generation and wait for its result."""
+        return await asyncio.shield(self.async_request(force, cancel_running))
+
+    async def async_shutdown(self) -> None:
+        """Cancel queued work and wait for the in-flight run to stop."""
+        if self._pending is not None:
+            self._pending.future.cancel()
+            self._pending = None
+        if self._current is not None:
+            self._current.cancel.set()
+        if self._task is not None and not self._task.done():
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def _drive(self) -> None:
+        while self._current is not None:
+            job = self._current
+            self.runs += 1
+            try:
+                result = await self._run(job.cancel, job.force)
+            except GenerationCancelled:
+                self.cancelled += 1
+                _LOGGER.debug("Stale dashboard generation cancelled")
+                if self._pending is None:
+                    job.future.cancel()
+                else:
+                    self._pending.force |= job.force
+                    _chain(self._pending.future, job.future)
+            except Exception as err:  # pragma: no cover - run logs its own errors
+                job.future.set_exception(err)
+            else:
+                job.future.set_result(result)
+            self._current, self._pending = self._pending, None
+
+
+def _chain(source: asyncio.Future, target: asyncio.Future) -> None:
+    """Resolve *target* with the outcome of *source*."""
+
+    def _copy(fut: asyncio.Future) -> None:
+        if target.done():
+            return
+        if fut.cancelled():
+            target.cancel()
+        elif fut.exception() is not None:
+            target.set_exception(fut.exception())
+        else:
+            target.set_result(fut.result())
+
+    source.add_done_callback(_copy)
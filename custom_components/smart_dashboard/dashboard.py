@@ -4,16 +4,19 @@ import requests
 
 from .generator import (
     generate_dashboard,
+    async_generate_dashboard,
     build_dashboard,
     load_config,
     filter_existing_entities,
     deduplicate_cards,
+    deduplicate_across_rooms,
     apply_conditions,
     main,
 )
 from .auto_discovery import (
     discover_devices,
     async_discover_devices_internal,
+    discover_from_snapshot,
     _get_known_entities,
     _group_cards_by_type,
 )
@@ -28,13 +31,16 @@ from .translation import load_translations, t
 
 __all__ = [
     "generate_dashboard",
+    "async_generate_dashboard",
     "build_dashboard",
     "load_config",
     "filter_existing_entities",
     "deduplicate_cards",
+    "deduplicate_across_rooms",
     "apply_conditions",
     "discover_devices",
     "async_discover_devices_internal",
+    "discover_from_snapshot",
     "_get_known_entities",
     "_group_cards_by_type",
     "load_template",
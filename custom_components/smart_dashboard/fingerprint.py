@@ -0,0 +1,176 @@
+"""Input fingerprints used to skip unchanged dashboard generations."""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Callable, Iterable, Mapping, Optional, TextIO
+
+logger = logging.getLogger(__name__)
+
+PACKAGE_DIR = Path(__file__).parent
+PLUGINS_DIR = PACKAGE_DIR / "plugins"
+FINGERPRINT_SUFFIX = ".fingerprint"
+
+
+def file_digest(path: Path | None) -> str:
+    """Return the SHA-256 hex digest of *path* or ``"-"`` when unavailable."""
+    if path is None:
+        return "-"
+    try:
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    except OSError:
+        return "-"
+
+
+def code_digest() -> str:
+    """Return a digest of the generator's own modules and translations.
+
+    Upgrading the integration changes the output for identical inputs, so the
+    package sources and the translated strings they render take part in the
+    fingerprint as well.
+    """
+    h = hashlib.sha256()
+    paths = sorted(PACKAGE_DIR.glob("*.py"))
+    paths += sorted(PACKAGE_DIR.glob("translations/*.json"))
+    for path in paths:
+        h.update(path.relative_to(PACKAGE_DIR).as_posix().encode())
+        h.update(file_digest(path).encode())
+    return h.hexdigest()
+
+
+def plugins_digest(plugins_dir: Path = PLUGINS_DIR) -> str:
+    """Return a digest over every plugin file."""
+    h = hashlib.sha256()
+    for path in sorted(plugins_dir.glob("*.py")):
+        h.update(path.name.encode())
+        h.update(file_digest(path).encode())
+    return h.hexdigest()
+
+
+def registry_digest(
+    entities: Iterable[str], entity_areas: Mapping[str, str | None]
+) -> str:
+    """Return a digest of the known entities and their area assignment."""
+    h = hashlib.sha256()
+    for entity_id in sorted(entities):
+        h.update(entity_id.encode())
+        h.update(b"\0")
+        h.update(str(entity_areas.get(entity_id) or "").encode())
+        h.update(b"\n")
+    return h.hexdigest()
+
+
+def compute_fingerprint(
+    config_path: Path,
+    template_path: Path | None,
+    lang: str,
+    registry: str,
+    extra: Mapping[str, str] | None = None,
+) -> str:
+    """Combine every generation input into a single fingerprint string."""
+    parts = [
+        f"config={file_digest(config_path)}",
+        f"template={file_digest(template_path)}",
+        f"plugins={plugins_digest()}",
+        f"code={code_digest()}",
+        f"registry={registry}",
+        f"lang={lang}",
+    ]
+    for key, value in sorted((extra or {}).items()):
+        parts.append(f"{key}={value}")
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+
+def fingerprint_path(output_path: Path) -> Path:
+    """Return the fingerprint file stored next to *output_path*."""
+    return output_path.with_name(output_path.name + FINGERPRINT_SUFFIX)
+
+
+def read_fingerprint(output_path: Path) -> Optional[str]:
+    """Return the fingerprint of the last generation of *output_path*."""
+    try:
+        return fingerprint_path(output_path).read_text().strip() or None
+    except OSError:
+        return None
+
+
+def write_fingerprint(output_path: Path, fingerprint: str) -> None:
+    """Store *fingerprint* next to *output_path*."""
+    try:
+        atomic_write_bytes(fingerprint_path(output_path), fingerprint.encode())
+    except OSError as err:
+        logger.warning("Failed to store dashboard fingerprint: %s", err)
+
+
+def atomic_write_bytes(path: Path, data: bytes) -> None:
+    """Write *data* to *path* through a temporary file and an atomic rename."""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def write_if_changed(path: Path, text: str) -> bool:
+    """Atomically write *text* to *path* unless the file already holds it.
+
+    Returns ``True`` when the file was (re)written.
+    """
+    data = text.encode("utf-8")
+    try:
+        if path.read_bytes() == data:
+            return False
+    except OSError:
+        pass
+    atomic_write_bytes(path, data)
+    return True
+
+
+def _same_content(a: str, b: Path, chunk_size: int = 1 << 16) -> bool:
+    try:
+        if os.path.getsize(a) != b.stat().st_size:
+            return False
+        with open(a, "rb") as fa, b.open("rb") as fb:
+            while True:
+                block = fa.read(chunk_size)
+                if block != fb.read(chunk_size):
+                    return False
+                if not block:
+                    return True
+    except OSError:
+        return False
+
+
+def write_stream_if_changed(path: Path, write: Callable[[TextIO], None]) -> bool:
+    """Atomically replace *path* with the text written by *write*.
+
+    *write* receives a UTF-8 text file opened next to *path*; the result
+    only replaces *path* when it differs from the current content, so
+    output can be streamed without holding it in memory.  Returns ``True``
+    when the file was (re)written.
+    """
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            write(f)
+        if _same_content(tmp, path):
+            os.unlink(tmp)
+            return False
+        os.replace(tmp, path)
+        return True
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
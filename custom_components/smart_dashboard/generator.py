@@ -2,32 +2,62 @@ from __future__ import annotations
 
 import argparse
 import asyncio
+import hashlib
 import json
 import logging
 import os
+import shutil
 import sys
+import threading
+import time
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Set
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
 
-import yaml
 import voluptuous as vol
 from homeassistant.core import HomeAssistant
 
+from .card_hash import card_key
+from .conditions import (
+    STATES,
+    ConditionContext,
+    ConditionDependencies,
+    StateValues,
+    dependencies,
+    evaluate,
+)
+from .config_cache import ConfigCache
+from .model import rooms_from_config
+from .pipeline import RoomPipeline, RoomPlan, group_stacks
 from .const import DEFAULT_OVERVIEW_LIMIT, DEFAULT_GRID_COLUMNS
-from .plugins import load_plugins, run_plugins
-from .schema import CONFIG_SCHEMA
+from .fingerprint import (
+    compute_fingerprint,
+    read_fingerprint,
+    registry_digest,
+    write_fingerprint,
+    write_if_changed,
+    write_stream_if_changed,
+)
+from .plugins import PluginContext, load_plugins, run_plugins, start_prefetch
+from .schema import validate_config
+from .serializers import FragmentCache, dump, dumps, load_yaml, resolve_backend
 from .templates import (
-    apply_tile_templates,
     load_template,
     BUTTON_CARD_TEMPLATES,
 )
-from .translation import t
+from .translation import (
+    Localizer,
+    preload_translations,
+    slot_lang,
+    translate,
+)
+from .variants import VariantBuilder, language_path, variant_path, variant_slugs
 from .auto_discovery import (
-    discover_devices,
-    async_discover_devices_internal,
+    discover_from_snapshot,
     _get_known_entities,
-    _group_cards_by_type,
 )
+from .snapshot import HassSnapshot, create_session, load_snapshot, save_snapshot
+from .websocket_client import fetch_snapshot
 
 logger = logging.getLogger(__name__)
 
@@ -40,10 +70,16 @@ def _slugify(text: str) -> str:
 
 
 def filter_existing_entities(
-    config: Dict[str, Any], hass: Optional[HomeAssistant] = None
+    config: Dict[str, Any],
+    hass: Optional[HomeAssistant] = None,
+    known: Optional[Set[str]] = None,
 ) -> None:
-    """Remove cards referencing missing entities from *config*."""
-    known = _get_known_entities(hass)
+    """Remove cards referencing missing entities from *config*.
+
+    *known* may be passed to reuse an entity set fetched earlier in the run.
+    """
+    if known is None:
+        known = _get_known_entities(hass)
     if not known:
         logger.warning("Entity list empty; skipping entity filtering")
         return
@@ -58,48 +94,104 @@ def filter_existing_entities(
         room["cards"] = cards
 
 
-def deduplicate_cards(config: Dict[str, Any]) -> None:
-    """Remove duplicate card definitions within each room."""
+def deduplicate_cards(config: Dict[str, Any]) -> int:
+    """Remove duplicate card definitions within each room.
+
+    Cards are compared structurally through :func:`card_key`.  Returns the
+    number of removed cards.
+    """
+    removed = 0
     for room in config.get("rooms", []):
         seen: Set[str] = set()
         unique: List[Dict[str, Any]] = []
         for card in room.get("cards", []):
             if isinstance(card, dict):
-                key = json.dumps(card, sort_keys=True)
+                key = card_key(card)
                 if key in seen:
+                    removed += 1
                     continue
                 seen.add(key)
             unique.append(card)
         room["cards"] = unique
+    return removed
 
 
-def _build_condition_context() -> Dict[str, Any]:
-    """Return evaluation context populated with environment variables."""
-    ctx: Dict[str, Any] = dict(os.environ)
-    user = ctx.get("DASHBOARD_USER") or ctx.get("SD_USER") or ctx.get("USER")
-    if user is not None:
-        ctx.setdefault("user", user)
-    return ctx
+def _drop_seen_entities(
+    cards: List[Any], seen: Set[str], shown: Set[str]
+) -> Tuple[List[Any], int]:
+    """Return *cards* without entity cards in *seen*, recursing into stacks.
 
+    Entities of the kept cards are added to *shown*.  Stacks left empty are
+    dropped as well.
+    """
+    kept: List[Any] = []
+    removed = 0
+    for card in cards:
+        if isinstance(card, dict):
+            nested = card.get("cards")
+            if isinstance(nested, list) and nested:
+                inner, count = _drop_seen_entities(nested, seen, shown)
+                removed += count
+                if not inner:
+                    continue
+                if count:
+                    card = {**card, "cards": inner}
+            else:
+                entity = card.get("entity")
+                if isinstance(entity, str):
+                    if entity in seen:
+                        removed += 1
+                        continue
+                    shown.add(entity)
+        kept.append(card)
+    return kept, removed
 
-def _eval_condition(expr: str, ctx: Dict[str, Any]) -> bool:
-    """Safely evaluate a condition expression using *ctx*."""
-    try:
-        return bool(eval(expr, {"__builtins__": {}}, ctx))
-    except Exception:
-        logger.error("Failed to evaluate condition '%s'", expr)
-        return False
 
+def deduplicate_across_rooms(config: Dict[str, Any]) -> int:
+    """Show every entity in the first visible room that contains it.
 
-def apply_conditions(config: Dict[str, Any]) -> None:
-    """Remove rooms and sidebar items whose conditions evaluate to False."""
-    ctx = _build_condition_context()
+    Entity cards repeated in later rooms (for example rooms appended by
+    ``auto_discover`` next to hand-written ones) are removed; hidden rooms
+    are left alone.  Returns the number of removed cards.
+    """
+    seen: Set[str] = set()
+    removed = 0
+    for room in config.get("rooms", []):
+        if room.get("hidden"):
+            continue
+        shown: Set[str] = set()
+        room["cards"], count = _drop_seen_entities(room.get("cards", []), seen, shown)
+        removed += count
+        seen |= shown
+    return removed
+
+
+def _condition_exprs(config: Dict[str, Any]) -> List[str]:
+    exprs = [c for room in config.get("rooms", []) for c in room.get("conditions") or []]
+    exprs.extend(
+        item["condition"] for item in config.get("sidebar", []) if item.get("condition")
+    )
+    return exprs
+
+
+def apply_conditions(
+    config: Dict[str, Any],
+    ctx: Optional[ConditionContext] = None,
+    global_conditions: Sequence[str] = (),
+) -> None:
+    """Remove rooms and sidebar items whose conditions evaluate to False.
+
+    *global_conditions* apply to every room and sidebar item.
+    """
+    if ctx is None:
+        ctx = ConditionContext()
+    shown = all(evaluate(c, ctx) for c in global_conditions)
 
     if "rooms" in config:
         filtered_rooms = []
         for room in config["rooms"]:
             conds = room.get("conditions") or []
-            if all(_eval_condition(c, ctx) for c in conds):
+            if shown and all(evaluate(c, ctx) for c in conds):
                 filtered_rooms.append(room)
         config["rooms"] = filtered_rooms
 
@@ -107,43 +199,183 @@ def apply_conditions(config: Dict[str, Any]) -> None:
         filtered_sidebar = []
         for item in config["sidebar"]:
             cond = item.get("condition")
-            if cond is None or _eval_condition(cond, ctx):
+            if shown and (cond is None or evaluate(cond, ctx)):
                 item.pop("condition", None)
                 filtered_sidebar.append(item)
         config["sidebar"] = filtered_sidebar
 
 
-def load_config(path: Path) -> Dict[str, Any]:
-    """Load a YAML configuration file."""
-    with path.open() as f:
-        data = yaml.safe_load(f) or {}
+def condition_dependencies(
+    config: Dict[str, Any], global_conditions: Sequence[str] = ()
+) -> ConditionDependencies:
+    """Return the variables, entity states and time read by the conditions."""
+    return dependencies([*_condition_exprs(config), *global_conditions])
+
+
+def _condition_context(snapshot: Optional[HassSnapshot]) -> ConditionContext:
+    """Return the condition context of a run.
+
+    States come from the snapshot, which inside Home Assistant is captured
+    on the event loop, so conditions never read the state machine from a
+    worker thread.
+    """
+    if snapshot is not None:
+        states = StateValues.from_mapping(snapshot.states)
+    else:
+        states = StateValues.from_mapping({})
+    return ConditionContext(states=states)
+
+
+def _condition_inputs(
+    deps: ConditionDependencies,
+    ctx: ConditionContext,
+    global_conditions: Sequence[str] = (),
+) -> Dict[str, str]:
+    """Return the context values and entity states the conditions read."""
+    extra = {f"ctx:{name}": repr(ctx.get(name)) for name in sorted(deps.names)}
+    states = ctx[STATES]
+    for entity_id in sorted(deps.entities):
+        extra[f"state:{entity_id}"] = repr(states.get(entity_id))
+    if global_conditions:
+        extra["global_conditions"] = "\n".join(global_conditions)
+    return extra
+
+
+class _Rendered:
+    """A dashboard rendered once and written to one or more files."""
+
+    def __init__(
+        self,
+        config: Dict[str, Any],
+        plans: List[RoomPlan],
+        lang: str,
+        template_path: Path | None,
+        paths: List[Path],
+        room_views: Optional[Dict[int, Any]] = None,
+    ) -> None:
+        self.paths = paths
+        if template_path is not None:
+            self._template = load_template(template_path)
+            self.document: Any = [room.to_dict() for room in config["rooms"]]
+        else:
+            self._template = None
+            self.document = build_dashboard(config, lang, plans, room_views)
+            self._backend = resolve_backend(config.get("serializer", "auto"))
+
+    def write(
+        self, paths: List[Path], fragments: Optional[FragmentCache] = None
+    ) -> bool:
+        """Write the dashboard to *paths*; ``True`` if any file changed.
+
+        A single file is streamed into a temporary file next to it and only
+        replaces it when the content changed.  Dashboards written with the
+        same *fragments* encode the views they share once.
+        """
+        template = self._template
+        if len(paths) == 1:
+            if template is not None:
+                return write_stream_if_changed(
+                    paths[0],
+                    lambda f: f.writelines(template.generate(rooms=self.document)),
+                )
+            return write_stream_if_changed(
+                paths[0], lambda f: dump(self.document, f, self._backend, fragments)
+            )
+        # Users with the same visible rooms share the serialised output
+        if template is not None:
+            text = template.render(rooms=self.document)
+        else:
+            text = dumps(self.document, self._backend, fragments)
+        return any([write_if_changed(path, text) for path in paths])
+
+
+def _parse_config(data: bytes) -> Dict[str, Any]:
+    """Parse and validate the contents of a configuration file."""
+    data = load_yaml(data) or {}
     try:
-        return CONFIG_SCHEMA(data)
+        return validate_config(data)
     except vol.Invalid as exc:
         raise ValueError(f"Invalid configuration: {exc}") from exc
 
 
-def build_dashboard(config: Dict[str, Any], lang: str) -> Dict[str, Any]:
-    """Convert the config into a Lovelace dashboard structure."""
+# Validated configs shared by every generation in this process
+CONFIG_CACHE = ConfigCache(_parse_config)
+
+
+def load_config(path: Path) -> Dict[str, Any]:
+    """Load a YAML configuration file.
+
+    Parsing and validation are cached until the file changes; every call
+    returns a copy that may be modified freely.
+    """
+    return CONFIG_CACHE.load(path)
+
+
+def _room_view(plan: RoomPlan, lang: str) -> Dict[str, Any]:
+    """Return the view of the room of *plan*."""
+    room = plan.room
+    cards = plan.tiles
+    if not cards:
+        cards = [
+            {
+                "type": "custom:button-card",
+                "icon": "mdi:help-circle-outline",
+                "name": translate("no_entities", lang, "No entities"),
+            }
+        ]
+    layout = room.get("layout")
+    if layout in ("horizontal", "vertical"):
+        cards = [{"type": f"{layout}-stack", "cards": cards}]
+    else:
+        cards = [
+            {
+                "type": "grid",
+                "columns": int(room.get("columns", DEFAULT_GRID_COLUMNS)),
+                "square": False,
+                "cards": cards,
+            }
+        ]
+
+    name = room.get("name", translate("room", lang, "Room"))
+    return {
+        "title": name,
+        "path": _slugify(name),
+        "cards": cards,
+    }
+
+
+def build_dashboard(
+    config: Dict[str, Any],
+    lang: str,
+    plans: Optional[List[RoomPlan]] = None,
+    room_views: Optional[Dict[int, Tuple[RoomPlan, Dict[str, Any]]]] = None,
+) -> Dict[str, Any]:
+    """Convert the config into a Lovelace dashboard structure.
+
+    *plans* are the results of a :class:`RoomPipeline` run over the rooms;
+    each room's tiles are computed once and shared by the overview, Devices
+    and room views.  Dashboards built with the same *room_views* dict share
+    the view objects of the plans they have in common.
+    """
     views = []
-    rooms = sorted(
-        config.get("rooms", []),
-        key=lambda r: r.get("order", 0)
-    )
+    if plans is None:
+        plans = RoomPipeline().run(config)
+    visible = [
+        plan
+        for plan in sorted(plans, key=lambda p: p.room.get("order", 0))
+        if not plan.room.get("hidden")
+    ]
     global_limit = int(config.get("overview_limit", DEFAULT_OVERVIEW_LIMIT))
 
     overview_cards = []
-    for room in rooms:
-        if room.get("hidden"):
-            continue
-        name = room.get("name", asyncio.run(t("room", lang, "Room")))
+    for plan in visible:
+        room = plan.room
+        name = room.get("name", translate("room", lang, "Room"))
         path = _slugify(name)
         icon = room.get("icon", "mdi:home-outline")
-        active_count = sum(
-            1 for card in room.get("cards", []) if isinstance(card, dict) and card.get("entity")
-        )
+        active_count = plan.active
         room_limit = int(room.get("overview_limit", global_limit))
-        tile_cards = apply_tile_templates(room.get("cards", []))[:room_limit]
+        tile_cards = plan.tiles[:room_limit]
         stack = {
             "type": "vertical-stack",
             "cards": [
@@ -151,9 +383,9 @@ def build_dashboard(config: Dict[str, Any], lang: str) -> Dict[str, Any]:
                     "type": "custom:button-card",
                     "icon": icon,
                     "name": name,
-                    "label": asyncio.run(
-                        t("device_count", lang, "{count} devices")
-                    ).format(count=active_count),
+                    "label": translate(
+                        "device_count", lang, "{count} devices", count=active_count
+                    ),
                     "tap_action": {
                         "action": "navigate",
                         "navigation_path": f"/lovelace/{path}",
@@ -174,7 +406,7 @@ def build_dashboard(config: Dict[str, Any], lang: str) -> Dict[str, Any]:
 
     if overview_cards:
         views.append({
-            "title": asyncio.run(t("overview", lang, "Overview")),
+            "title": translate("overview", lang, "Overview"),
             "path": "overview",
             "cards": [
                 {
@@ -187,15 +419,10 @@ def build_dashboard(config: Dict[str, Any], lang: str) -> Dict[str, Any]:
         })
 
     # Device overview showing all cards grouped by type
-    device_cards: List[Dict[str, Any]] = []
-    for room in rooms:
-        if room.get("hidden"):
-            continue
-        device_cards.extend(room.get("cards", []))
-    grouped_devices = _group_cards_by_type(device_cards)
+    grouped_devices = group_stacks(visible)
     if grouped_devices:
         views.append({
-            "title": asyncio.run(t("devices", lang, "Devices")),
+            "title": translate("devices", lang, "Devices"),
             "path": "devices",
             "cards": [
                 {
@@ -207,45 +434,22 @@ def build_dashboard(config: Dict[str, Any], lang: str) -> Dict[str, Any]:
             ],
         })
 
-    for room in rooms:
-        if room.get("hidden"):
+    for plan in visible:
+        if room_views is None:
+            views.append(_room_view(plan, lang))
             continue
-        cards = apply_tile_templates(room.get("cards", []))
-        if not cards:
-            cards = [
-                {
-                    "type": "custom:button-card",
-                    "icon": "mdi:help-circle-outline",
-                    "name": asyncio.run(t("no_entities", lang, "No entities")),
-                }
-            ]
-        layout = room.get("layout")
-        if layout in ("horizontal", "vertical"):
-            cards = [{"type": f"{layout}-stack", "cards": cards}]
-        else:
-            cards = [
-                {
-                    "type": "grid",
-                    "columns": int(room.get("columns", DEFAULT_GRID_COLUMNS)),
-                    "square": False,
-                    "cards": cards,
-                }
-            ]
-
-        name = room.get("name", asyncio.run(t("room", lang, "Room")))
-        views.append({
-            "title": name,
-            "path": _slugify(name),
-            "cards": cards,
-        })
+        entry = room_views.get(id(plan))
+        if entry is None or entry[0] is not plan:
+            entry = room_views[id(plan)] = (plan, _room_view(plan, lang))
+        views.append(entry[1])
 
     if not views:
         views.append({
-            "title": asyncio.run(t("dashboard_title", lang, "Smart Dashboard")),
+            "title": translate("dashboard_title", lang, "Smart Dashboard"),
             "cards": [
                 {
                     "type": "markdown",
-                    "content": asyncio.run(t("no_devices_found", lang, "No devices found.")),
+                    "content": translate("no_devices_found", lang, "No devices found."),
                 }
             ],
         })
@@ -270,67 +474,513 @@ def build_dashboard(config: Dict[str, Any], lang: str) -> Dict[str, Any]:
     return dashboard
 
 
-def generate_dashboard(
+@dataclass
+class GenerationResult:
+    """Outcome of a :func:`generate_dashboard` run."""
+
+    fingerprint: str
+    skipped: bool = False
+    written: bool = False
+    duration: float = 0.0
+    timings: Dict[str, float] = field(default_factory=dict)
+    counters: Dict[str, int] = field(default_factory=dict)
+    # What the room, sidebar and global conditions read
+    dependencies: ConditionDependencies = field(default_factory=ConditionDependencies)
+    # Wall time of each plugin in this run
+    plugin_timings: Dict[str, float] = field(default_factory=dict)
+    # Wall time of work that overlapped the stages, e.g. plugin fetches
+    # running during discovery
+    background: Dict[str, float] = field(default_factory=dict)
+
+
+class GenerationCancelled(Exception):
+    """Raised at a stage boundary when a generation run was cancelled."""
+
+
+class _Stages:
+    """Record per-stage wall time and honour cancellation between stages."""
+
+    def __init__(self, cancel: Optional[threading.Event] = None) -> None:
+        self.timings: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+        self.plugins: Dict[str, float] = {}
+        self.background: Dict[str, float] = {}
+        self._cancel = cancel
+        self._start = self._last = time.perf_counter()
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._start
+
+    def done(self, name: str, final: bool = False) -> None:
+        """Mark stage *name* as finished and stop if cancellation was requested.
+
+        Cancellation is not checked after the *final* stage.
+        """
+        now = time.perf_counter()
+        self.timings[name] = now - self._last
+        self._last = now
+        if not final and self._cancel is not None and self._cancel.is_set():
+            raise GenerationCancelled(f"cancelled after {name}")
+
+    def result(self, fingerprint: str, **kwargs: Any) -> GenerationResult:
+        return GenerationResult(
+            fingerprint,
+            duration=self.elapsed,
+            timings=self.timings,
+            counters=self.counters,
+            plugin_timings=self.plugins,
+            background=self.background,
+            **kwargs,
+        )
+
+
+def _cli_snapshot(config: Dict[str, Any], session: Any = None) -> Optional[HassSnapshot]:
+    """Fetch a snapshot over the REST API using ``HASS_URL``/``HASS_TOKEN``.
+
+    The WebSocket API is preferred when registries are needed.  The Lovelace
+    config is fetched in the same round trip when ``load_lovelace_cards`` is
+    enabled.
+    """
+    token = os.environ.get("HASS_TOKEN")
+    if not token:
+        logger.warning("HASS_TOKEN not set; cannot fetch entity list")
+        return None
+    hass_url = os.environ.get("HASS_URL", "http://localhost:8123")
+    try:
+        return fetch_snapshot(
+            hass_url,
+            token,
+            registries=bool(config.get("auto_discover")),
+            lovelace=bool(config.get("load_lovelace_cards")),
+            session=session,
+        )
+    except Exception:
+        logger.warning("Failed to fetch entity list", exc_info=True)
+        return None
+
+
+def load_cli_snapshot(
+    snapshot_path: Optional[Path] = None,
+    ttl: Optional[float] = None,
+    record_path: Optional[Path] = None,
+) -> Optional[HassSnapshot]:
+    """Return a recorded snapshot for an offline run, recording it if needed.
+
+    *snapshot_path* is replayed when it exists and, with a *ttl*, is not
+    older than *ttl* seconds.  Otherwise a full snapshot (states, registries
+    and Lovelace config) is fetched live and stored in *snapshot_path* and
+    *record_path*.  Returns ``None`` when neither path is given, in which
+    case the run fetches only what its config needs.
+    """
+    if snapshot_path is None and record_path is None:
+        return None
+    stale = None
+    if snapshot_path is not None and snapshot_path.exists():
+        age = time.time() - snapshot_path.stat().st_mtime
+        if ttl is None or age <= ttl:
+            logger.info("Replaying snapshot %s (%.0f s old)", snapshot_path, age)
+            return load_snapshot(snapshot_path)
+        stale = snapshot_path
+
+    token = os.environ.get("HASS_TOKEN")
+    snapshot = None
+    if token:
+        hass_url = os.environ.get("HASS_URL", "http://localhost:8123")
+        with create_session(token) as session:
+            try:
+                snapshot = fetch_snapshot(
+                    hass_url, token, registries=True, lovelace=True, session=session
+                )
+            except Exception:
+                logger.warning("Failed to fetch snapshot", exc_info=True)
+    if snapshot is None:
+        if stale is not None:
+            logger.warning("Using expired snapshot %s", stale)
+            return load_snapshot(stale)
+        raise ValueError("No snapshot available and Home Assistant unreachable")
+
+    for path in {p for p in (snapshot_path, record_path) if p is not None}:
+        save_snapshot(snapshot, path)
+        logger.info("Recorded snapshot to %s", path)
+    return snapshot
+
+
+def _run_pipeline(
+    config: Dict[str, Any],
     config_path: Path,
     output_path: Path,
-    template_path: Path | None = None,
-    hass: Optional[HomeAssistant] = None,
-) -> None:
-    """Generate a dashboard file from config_path written to output_path."""
+    template_path: Path | None,
+    snapshot: Optional[HassSnapshot],
+    force: bool,
+    stages: _Stages,
+    context: Optional[PluginContext] = None,
+    conditions: Sequence[str] = (),
+    users: Sequence[str] = (),
+    languages: Sequence[str] = (),
+) -> GenerationResult:
+    """Run every generation stage after the config and snapshot are loaded.
 
+    *conditions* are global conditions applied to every room and sidebar
+    item.  For each of *users* a variant with that ``user`` is written next
+    to *output_path* (see :func:`~.variants.variant_path`); everything but
+    the conditions is computed once for all of them.  Every output is also
+    written in each of *languages* (see :func:`~.variants.language_path`)
+    from the same build; only the translated strings differ.
+    """
     lang = os.environ.get("SHI_LANG", "en")
-    config = load_config(config_path)
+    if snapshot is not None:
+        known, registry = snapshot.known, snapshot.digest
+    else:
+        known, registry = set(), registry_digest((), {})
+
+    condition_ctx = _condition_context(snapshot)
+    deps = condition_dependencies(config, conditions)
+    extra = _condition_inputs(deps, condition_ctx, conditions)
+    lovelace = snapshot.lovelace if snapshot is not None else None
+    if lovelace is not None:
+        extra["lovelace"] = hashlib.sha256(
+            json.dumps(lovelace, sort_keys=True).encode()
+        ).hexdigest()
+    outputs = [output_path]
+    if users:
+        extra["users"] = "\n".join(users)
+        slugs = variant_slugs(users)
+        outputs.extend(variant_path(output_path, slugs[user]) for user in users)
+    # The structure is built once with translatable slots for all languages
+    languages = list(dict.fromkeys([lang, *languages]))
+    build_lang = slot_lang(lang) if len(languages) > 1 else lang
+    if len(languages) > 1:
+        extra["languages"] = ",".join(languages)
+    files = [
+        language_path(path, language)
+        for language in languages[1:]
+        for path in outputs
+    ]
+    fingerprint = compute_fingerprint(
+        config_path, template_path, lang, registry, extra
+    )
+    stages.done("fingerprint")
+    # Imported Lovelace views only take part in the fingerprint when they were
+    # prefetched with the snapshot; otherwise that configuration always
+    # regenerates.
+    if (
+        not force
+        and (lovelace is not None or not config.get("load_lovelace_cards"))
+        and all(
+            path.exists() and read_fingerprint(path) == fingerprint
+            for path in outputs + files
+        )
+    ):
+        logger.info("Dashboard inputs unchanged; skipping generation")
+        return stages.result(fingerprint, skipped=True, dependencies=deps)
 
     # Disable auto discovery if we cannot fetch entities from the API
-    if config.get("auto_discover") and not _get_known_entities(hass):
+    if config.get("auto_discover") and not known:
         logger.warning(
             "auto_discover disabled because entity list could not be retrieved"
         )
         config["auto_discover"] = False
 
-    if config.get("auto_discover"):
-        if hass is not None:
-            try:
-                future = asyncio.run_coroutine_threadsafe(
-                    async_discover_devices_internal(hass, lang), hass.loop
-                )
-                rooms = future.result()
-                config.setdefault("rooms", []).extend(rooms)
-                logger.info("Auto discovered %d rooms", len(rooms))
-            except Exception:
-                logger.exception("Device discovery failed")
-        else:
-            hass_url = os.environ.get(
-                "HASS_URL", "http://localhost:8123"
+    # Plugin fetches wait on the network while discovery builds the rooms;
+    # the plugins still run in order afterwards, so the output is unchanged
+    load_plugins()
+    if context is None:
+        context = PluginContext(snapshot=snapshot)
+    prefetch = start_prefetch(config, context)
+    try:
+        if config.get("auto_discover"):
+            rooms = discover_from_snapshot(snapshot, build_lang)
+            config.setdefault("rooms", []).extend(rooms)
+            logger.info("Auto discovered %d rooms", len(rooms))
+        stages.done("discovery")
+
+        # Execute the plugins after building the config
+        runs = run_plugins(config, context, prefetch)
+    finally:
+        prefetch.close()
+    stages.background.update(prefetch.timings)
+    stages.plugins.update((run.name, run.duration) for run in runs)
+    stages.counters["plugin_failures"] = sum(run.failed for run in runs)
+    stages.counters["plugin_timeouts"] = sum(run.timed_out for run in runs)
+    stages.counters["plugin_cache_hits"] = sum(run.cached for run in runs)
+
+    # Variants evaluate the conditions after the shared room processing
+    if not users:
+        apply_conditions(config, condition_ctx, conditions)
+    stages.done("plugins")
+
+    # From here on rooms are compact model objects; the config dicts are
+    # released and cards become dicts again only while being serialised
+    config["rooms"] = rooms_from_config(config.get("rooms", []))
+    stages.done("model")
+
+    # Entity filtering, deduplication, tile conversion and grouping share a
+    # single traversal of each room
+    if not known:
+        logger.warning("Entity list empty; skipping entity filtering")
+    across_rooms = config.get("deduplicate") == "dashboard"
+    pipeline = RoomPipeline(
+        known=known,
+        deduplicate=True,
+        across_rooms=across_rooms and not users,
+    )
+    plans = pipeline.run(config)
+    stages.counters["cards_filtered"] = pipeline.stats["filtered"]
+    stages.counters["duplicates_removed"] = pipeline.stats["duplicates"]
+    stages.done("rooms")
+    logger.info(
+        "Processed %d rooms: removed %d missing and %d duplicate cards in %.1f ms",
+        pipeline.stats["rooms"],
+        pipeline.stats["filtered"],
+        pipeline.stats["duplicates"],
+        stages.timings["rooms"] * 1000,
+    )
+
+    if users:
+        builder = VariantBuilder(config, plans, conditions, across_rooms)
+        builder.add(output_path, condition_ctx)
+        states = condition_ctx[STATES]
+        for user, path in zip(users, outputs[1:]):
+            ctx = ConditionContext({"user": user}, states, condition_ctx.now)
+            builder.add(path, ctx)
+        stages.counters["variants"] = builder.stats["variants"]
+        stages.done("conditions")
+        room_views: Dict[int, Any] = {}
+        rendered = [
+            _Rendered(
+                variant.config,
+                variant.plans,
+                build_lang,
+                template_path,
+                variant.keys,
+                room_views,
             )
-            token = os.environ.get("HASS_TOKEN")
-            if token:
-                try:
-                    rooms = discover_devices(hass_url, token, lang)
-                    config.setdefault("rooms", []).extend(rooms)
-                    logger.info("Auto discovered %d rooms", len(rooms))
-                except Exception:
-                    logger.exception("Device discovery failed")
-            else:
-                logger.error("auto_discover enabled but HASS_TOKEN is not set")
+            for variant in builder.variants
+        ]
+    else:
+        rendered = [_Rendered(config, plans, build_lang, template_path, outputs)]
+    localizer = None
+    if build_lang != lang:
+        localizer = Localizer(*(output.document for output in rendered))
+    stages.done("render")
+    # Views are encoded once for all variants and, unless they contain
+    # translated strings, for all languages
+    fragments = None
+    if len(rendered) > 1 or localizer is not None:
+        fragments = FragmentCache()
+    written = False
+    for language in languages:
+        if localizer is not None:
+            localizer.apply(language)
+            fragments.discard(localizer.localized)
+        for output in rendered:
+            paths = output.paths
+            if language != lang:
+                paths = [language_path(path, language) for path in paths]
+            written = output.write(paths, fragments) or written
+    if not written:
+        logger.info("Rendered dashboard unchanged; not rewriting %s", output_path)
+    for path in outputs + files:
+        write_fingerprint(path, fingerprint)
+    stages.done("write", final=True)
+    return stages.result(fingerprint, written=written, dependencies=deps)
 
-    # Load and execute any available plugins after building the config
-    load_plugins()
-    run_plugins(config)
 
-    apply_conditions(config)
+def _generate_from_snapshot(
+    config_path: Path,
+    output_path: Path,
+    template_path: Path | None,
+    snapshot: HassSnapshot,
+    force: bool,
+    stages: _Stages,
+    hass: Optional[HomeAssistant] = None,
+    conditions: Sequence[str] = (),
+    users: Sequence[str] = (),
+    languages: Sequence[str] = (),
+    default_config: Optional[Path] = None,
+) -> GenerationResult:
+    """Load the config and run the pipeline; executed in a worker thread.
+
+    With *default_config* a missing *config_path* is first created from it
+    and the directory of *output_path* is created if needed.
+    """
+    if default_config is not None:
+        _ensure_files(config_path, output_path, default_config)
+    config = load_config(config_path)
+    stages.done("config")
+    return _run_pipeline(
+        config,
+        config_path,
+        output_path,
+        template_path,
+        snapshot,
+        force,
+        stages,
+        PluginContext(hass=hass, snapshot=snapshot),
+        conditions,
+        users,
+        languages,
+    )
+
+
+def _ensure_files(config_path: Path, output_path: Path, default_config: Path) -> None:
+    """Create a missing config from *default_config* and the output directory."""
+    if not config_path.exists():
+        try:
+            shutil.copy(default_config, config_path)
+            logger.info("Created default configuration at %s", config_path)
+        except OSError as err:
+            logger.error("Failed to copy default config: %s", err)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
 
-    filter_existing_entities(config, hass)
-    deduplicate_cards(config)
+async def _async_capture(hass: HomeAssistant) -> HassSnapshot:
+    return HassSnapshot.async_capture(hass)
 
-    if template_path is not None:
-        template = load_template(template_path)
-        rendered = template.render(rooms=config.get("rooms", []))
+
+async def async_generate_dashboard(
+    hass: HomeAssistant,
+    config_path: Path,
+    output_path: Path,
+    template_path: Path | None = None,
+    force: bool = False,
+    cancel: Optional[threading.Event] = None,
+    snapshot: Optional[HassSnapshot] = None,
+    conditions: Sequence[str] = (),
+    users: Sequence[str] = (),
+    languages: Sequence[str] = (),
+    default_config: Optional[Path] = None,
+) -> GenerationResult:
+    """Generate the dashboard from within the Home Assistant event loop.
+
+    States and registries are captured on the loop in a single snapshot
+    unless one is passed in (e.g. from a :class:`RegistryIndex`); all file
+    access and the CPU-bound stages then run in one executor job.  That job
+    also creates a missing config from *default_config* and the output
+    directory.  *conditions* are the global conditions of the config entry;
+    *users* and *languages* select the extra variants as in
+    :func:`generate_dashboard`.
+    """
+    stages = _Stages(cancel)
+    if snapshot is None:
+        snapshot = HassSnapshot.async_capture(hass)
     else:
-        dashboard = build_dashboard(config, lang)
-        rendered = yaml.safe_dump(dashboard, sort_keys=False)
+        # A given snapshot may be cached across runs; states are always fresh
+        snapshot = snapshot.with_states(
+            {state.entity_id: state.state for state in hass.states.async_all()}
+        )
+    stages.done("snapshot")
+    return await hass.async_add_executor_job(
+        _generate_from_snapshot,
+        config_path,
+        output_path,
+        template_path,
+        snapshot,
+        force,
+        stages,
+        hass,
+        tuple(conditions),
+        tuple(users),
+        tuple(languages),
+        default_config,
+    )
+
+
+def generate_dashboard(
+    config_path: Path,
+    output_path: Path,
+    template_path: Path | None = None,
+    hass: Optional[HomeAssistant] = None,
+    force: bool = False,
+    cancel: Optional[threading.Event] = None,
+    snapshot: Optional[HassSnapshot] = None,
+    users: Sequence[str] = (),
+    languages: Sequence[str] = (),
+) -> GenerationResult:
+    """Generate a dashboard file from config_path written to output_path.
 
-    output_path.write_text(rendered)
+    Generation is skipped when the fingerprint of all inputs matches the one
+    stored next to *output_path*, and the file is only rewritten when the
+    rendered output differs from its current content.  Pass ``force`` to
+    ignore the stored fingerprint.  Setting the *cancel* event stops the run
+    with :class:`GenerationCancelled` at the next stage boundary; the output
+    file is never left half written.
+
+    Without *hass* the data is fetched over the REST API, unless a recorded
+    *snapshot* (see :func:`load_cli_snapshot`) is given, in which case the
+    run does not touch the network.  Inside Home Assistant prefer
+    :func:`async_generate_dashboard`; when *hass* is passed here the
+    function must run in a worker thread and captures its own snapshot, so
+    passing *snapshot* as well raises :class:`TypeError`.
+
+    For each of *users* a variant evaluated with that ``user`` is written
+    as well, e.g. ``smart_dashboard_alice.yaml`` next to
+    ``smart_dashboard.yaml``.  The dashboard in ``SHI_LANG`` is written to
+    *output_path*; each further language in *languages* goes to e.g.
+    ``smart_dashboard.ru.yaml``.
+    """
+    if hass is not None and snapshot is not None:
+        raise TypeError("Pass either hass or snapshot, not both")
+    stages = _Stages(cancel)
+    if hass is not None:
+        snapshot = asyncio.run_coroutine_threadsafe(
+            _async_capture(hass), hass.loop
+        ).result()
+        stages.done("snapshot")
+        return _generate_from_snapshot(
+            config_path,
+            output_path,
+            template_path,
+            snapshot,
+            force,
+            stages,
+            hass,
+            (),
+            tuple(users),
+            tuple(languages),
+        )
+
+    config = load_config(config_path)
+    stages.done("config")
+    if snapshot is not None:
+        stages.done("snapshot")
+        return _run_pipeline(
+            config,
+            config_path,
+            output_path,
+            template_path,
+            snapshot,
+            force,
+            stages,
+            PluginContext(snapshot=snapshot, offline=True),
+            (),
+            tuple(users),
+            tuple(languages),
+        )
+
+    # One keep-alive session serves the snapshot and every plugin request
+    with create_session(os.environ.get("HASS_TOKEN")) as session:
+        snapshot = _cli_snapshot(config, session)
+        stages.done("snapshot")
+        context = PluginContext(
+            snapshot=snapshot,
+            session=session,
+            hass_url=os.environ.get("HASS_URL", "http://localhost:8123"),
+        )
+        return _run_pipeline(
+            config,
+            config_path,
+            output_path,
+            template_path,
+            snapshot,
+            force,
+            stages,
+            context,
+            (),
+            tuple(users),
+            tuple(languages),
+        )
 
 
 def main() -> None:
@@ -357,14 +1007,75 @@ def main() -> None:
         type=Path,
         help="Optional Jinja2 template used to render the dashboard",
     )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Regenerate even if no inputs changed since the last run",
+    )
+    parser.add_argument(
+        "--snapshot",
+        type=Path,
+        help="Replay Home Assistant data from this snapshot file instead of "
+        "the network; it is recorded first if missing or expired",
+    )
+    parser.add_argument(
+        "--snapshot-ttl",
+        type=float,
+        help="Maximum age in seconds of the --snapshot file before it is "
+        "refreshed from Home Assistant (default: never expires)",
+    )
+    parser.add_argument(
+        "--config-cache",
+        type=Path,
+        help="Directory keeping the parsed and validated configuration "
+        "between runs; it is reused until the configuration file changes",
+    )
+    parser.add_argument(
+        "--user",
+        dest="users",
+        action="append",
+        default=[],
+        help="Also write a dashboard variant for this user, e.g. "
+        "generated_dashboard_alice.yaml; may be given several times",
+    )
+    parser.add_argument(
+        "--lang",
+        dest="languages",
+        action="append",
+        default=[],
+        help="Also write the dashboard in this language, e.g. "
+        "generated_dashboard.ru.yaml; may be given several times",
+    )
+    parser.add_argument(
+        "--record-snapshot",
+        type=Path,
+        help="Fetch states, registries and Lovelace config and save them to "
+        "this file for later offline runs",
+    )
 
     args = parser.parse_args()
+    CONFIG_CACHE.cache_dir = args.config_cache
+    preload_translations()
     try:
-        generate_dashboard(args.config, args.output, args.template)
+        snapshot = load_cli_snapshot(
+            args.snapshot, args.snapshot_ttl, args.record_snapshot
+        )
+        result = generate_dashboard(
+            args.config,
+            args.output,
+            args.template,
+            force=args.force,
+            snapshot=snapshot,
+            users=args.users,
+            languages=args.languages,
+        )
     except Exception:
         logger.exception("Dashboard generation failed")
         sys.exit(1)
-    print(f"Dashboard configuration written to {args.output}")
+    if result.skipped or not result.written:
+        print(f"Dashboard configuration {args.output} is up to date")
+    else:
+        print(f"Dashboard configuration written to {args.output}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,204 @@
+"""Compact in-memory representation of rooms and cards.
+
+Rooms and cards are converted from the validated config once, after the
+plugins ran, and turned back into plain dicts only while the dashboard is
+serialised.  Both classes use ``__slots__`` and keep frequently repeated
+strings (card types, domains, templates and key names) interned, so a home
+with tens of thousands of cards holds one small object per card instead of a
+dict per card and per derived tile.
+"""
+
+from __future__ import annotations
+
+import sys
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+_KEY_ORDERS: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+
+def _intern(value: Any) -> Any:
+    return sys.intern(value) if type(value) is str else value
+
+
+def _key_order(keys: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Return a shared tuple for the key order *keys*."""
+    return _KEY_ORDERS.setdefault(keys, keys)
+
+
+_CARD_FIELDS = ("type", "entity", "template", "cards")
+_ROOM_FIELDS = ("name", "order", "hidden", "cards")
+
+
+@dataclass(slots=True, eq=False)
+class Card:
+    """A card definition.
+
+    ``keys`` records the original key order and ``extra`` holds every key
+    without a dedicated slot, so :meth:`to_dict` reproduces the source dict
+    exactly.  Nested stack cards are :class:`Card` objects as well.
+    """
+
+    type: Any = None
+    entity: Any = None
+    template: Any = None
+    cards: Optional[List[Any]] = None
+    extra: Optional[Dict[str, Any]] = None
+    keys: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Card":
+        """Return the card for the config dict *data*."""
+        card = cls(keys=_key_order(tuple(data)))
+        extra = None
+        for key, value in data.items():
+            if key == "type":
+                card.type = _intern(value)
+            elif key == "entity":
+                card.entity = value
+            elif key == "template":
+                card.template = _intern(value)
+            elif key == "cards" and type(value) is list:
+                card.cards = [convert(item) for item in value]
+            else:
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+        card.extra = extra
+        return card
+
+    @classmethod
+    def tile(cls, template: str, entity: str) -> "Card":
+        """Return a button-card tile for *entity*."""
+        return cls("custom:button-card", entity, template, keys=_TILE_KEYS)
+
+    @property
+    def domain(self) -> Optional[str]:
+        entity = self.entity
+        return sys.intern(entity.split(".")[0]) if type(entity) is str else None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the value of *key* like ``dict.get``."""
+        if key not in self.keys:
+            return default
+        if key in _CARD_FIELDS and (key != "cards" or self.cards is not None):
+            return getattr(self, key)
+        if self.extra is None:
+            return default
+        return self.extra.get(key, default)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.keys
+
+    def to_dict(self, deep: bool = True) -> Dict[str, Any]:
+        """Return the card as a dict; nested cards stay objects unless *deep*."""
+        result: Dict[str, Any] = {}
+        extra = self.extra
+        for key in self.keys:
+            if key == "cards":
+                if self.cards is None:
+                    result[key] = extra[key]
+                else:
+                    result[key] = [to_plain(c) for c in self.cards] if deep else self.cards
+            elif key in _CARD_FIELDS:
+                result[key] = getattr(self, key)
+            else:
+                result[key] = extra[key]
+        return result
+
+
+# Tiles list the template before the entity, as apply_tile_templates does
+_TILE_KEYS = _key_order(("type", "template", "entity"))
+
+
+@dataclass(slots=True, eq=False)
+class Room:
+    """A room with its cards; the remaining options live in ``extra``."""
+
+    name: Any = None
+    order: Any = None
+    hidden: Any = None
+    cards: List[Any] = None
+    extra: Optional[Dict[str, Any]] = None
+    keys: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Room":
+        """Return the room for the config dict *data*."""
+        room = cls(keys=_key_order(tuple(data)), cards=[])
+        extra = None
+        for key, value in data.items():
+            if key == "name":
+                room.name = value
+            elif key == "order":
+                room.order = value
+            elif key == "hidden":
+                room.hidden = value
+            elif key == "cards" and type(value) is list:
+                room.cards = [convert(item) for item in value]
+            else:
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+        room.extra = extra
+        return room
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the value of *key* like ``dict.get``."""
+        if key not in self.keys:
+            return default
+        extra = self.extra
+        if extra is not None and key in extra:
+            return extra[key]
+        return getattr(self, key) if key in _ROOM_FIELDS else default
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.keys
+
+    def to_dict(self, deep: bool = True) -> Dict[str, Any]:
+        """Return the room as a dict; cards stay objects unless *deep*."""
+        result: Dict[str, Any] = {}
+        extra = self.extra
+        for key in self.keys:
+            if extra is not None and key in extra:
+                result[key] = extra[key]
+            elif key == "cards":
+                result[key] = [to_plain(c) for c in self.cards] if deep else self.cards
+            else:
+                result[key] = getattr(self, key)
+        return result
+
+
+def convert(item: Any) -> Any:
+    """Return *item* as a :class:`Card` when it is a card dict."""
+    return Card.from_dict(item) if type(item) is dict else item
+
+
+def to_plain(value: Any) -> Any:
+    """Return *value* with every model object replaced by plain dicts."""
+    if isinstance(value, (Card, Room)):
+        return value.to_dict()
+    if type(value) is dict:
+        return {k: to_plain(v) for k, v in value.items()}
+    if type(value) is list:
+        return [to_plain(v) for v in value]
+    return value
+
+
+def rooms_from_config(rooms: List[Dict[str, Any]]) -> List[Room]:
+    """Convert the validated ``rooms`` list of the config."""
+    return [Room.from_dict(room) for room in rooms]
+
+
+def add_representers(dumper: Any) -> None:
+    """Teach the YAML *dumper* class to write model objects as mappings.
+
+    Objects are converted one level at a time while the document is
+    emitted, so the full dict tree never exists at once.
+    """
+
+    def _represent(dumper_self: Any, obj: Any) -> Any:
+        return dumper_self.represent_dict(obj.to_dict(deep=False))
+
+    dumper.add_representer(Card, _represent)
+    dumper.add_representer(Room, _represent)
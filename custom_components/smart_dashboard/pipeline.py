@@ -0,0 +1,227 @@
+"""Single-traversal processing of room card lists."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .card_hash import card_key
+from .model import Card
+from .templates import DEVICE_TEMPLATE_MAP
+
+# Devices view stacks in display order; other cards follow ungrouped
+GROUP_ORDER = ("light", "climate", "multimedia", "sensor")
+_DOMAIN_GROUPS = {
+    "light": "light",
+    "climate": "climate",
+    "media_player": "multimedia",
+    "sensor": "sensor",
+    "binary_sensor": "sensor",
+}
+
+
+# Card representations handled by the pipeline: config dicts and model cards
+_CARDS = (dict, Card)
+
+
+def _domain(card: Any) -> Optional[str]:
+    entity = card.get("entity") if isinstance(card, _CARDS) else None
+    return entity.split(".")[0] if isinstance(entity, str) else None
+
+
+def tile_for(card: Any) -> Any:
+    """Return the button-card tile of *card*, or *card* itself.
+
+    Model cards get model tiles, config dicts get dict tiles.
+    """
+    template = DEVICE_TEMPLATE_MAP.get(_domain(card))
+    if template is None:
+        return card
+    if type(card) is Card:
+        return Card.tile(template, card.entity)
+    return {"type": "custom:button-card", "template": template, "entity": card["entity"]}
+
+
+def _set_cards(room: Any, cards: List[Any]) -> None:
+    if isinstance(room, dict):
+        room["cards"] = cards
+    else:
+        room.cards = cards
+
+
+@dataclass
+class RoomPlan:
+    """Result of processing one room.
+
+    ``cards`` are the kept card definitions, ``tiles`` their tile versions
+    in the same order (shared by the overview and the room view) and
+    ``groups`` the tiles bucketed for the Devices view.
+    """
+
+    room: Any
+    cards: List[Any] = field(default_factory=list)
+    tiles: List[Any] = field(default_factory=list)
+    groups: Dict[str, List[Any]] = field(default_factory=dict)
+    active: int = 0
+
+
+class RoomPipeline:
+    """Filter, deduplicate, tile-convert and group cards in one traversal.
+
+    Each stage decides on a card before the next card is looked at, which
+    gives the same result as running :func:`filter_existing_entities`,
+    :func:`deduplicate_cards`, :func:`deduplicate_across_rooms`,
+    ``apply_tile_templates`` and ``_group_cards_by_type`` one after another,
+    while every card list is walked once.  Stages are enabled by the
+    constructor arguments: *known* filters missing entities (an empty set
+    disables filtering, as in :func:`filter_existing_entities`), *deduplicate*
+    removes structural duplicates within a room and *across_rooms* removes
+    entity cards already shown in an earlier visible room.
+
+    Rooms may be config dicts or :class:`~.model.Room` objects; tiles use
+    the same representation as the cards they are made from.
+    """
+
+    def __init__(
+        self,
+        known: Optional[Set[str]] = None,
+        deduplicate: bool = False,
+        across_rooms: bool = False,
+    ) -> None:
+        self.known = known or None
+        self.deduplicate = deduplicate
+        self.across_rooms = across_rooms
+        self.stats = {"rooms": 0, "cards": 0, "traversals": 0, "filtered": 0, "duplicates": 0}
+
+    @property
+    def mutates(self) -> bool:
+        return bool(self.known or self.deduplicate or self.across_rooms)
+
+    def run(self, config: Dict[str, Any]) -> List[RoomPlan]:
+        """Process every room of *config*; returns plans in room order.
+
+        When a removing stage is enabled the rooms' ``cards`` are replaced
+        by the kept cards so templates and plugins see the same result.
+        """
+        seen: Set[str] = set()
+        plans = []
+        for room in config.get("rooms", []):
+            plan = self.process(room, seen)
+            if self.mutates:
+                _set_cards(room, plan.cards)
+            plans.append(plan)
+        return plans
+
+    def process(self, room: Any, seen: Optional[Set[str]] = None) -> RoomPlan:
+        """Process one room; *seen* holds entities shown in earlier rooms."""
+        plan = RoomPlan(room)
+        known = self.known
+        deduplicate = self.deduplicate
+        across = self.across_rooms and seen is not None and not room.get("hidden")
+        shown: Set[str] = set()
+        keys: Set[str] = set()
+        cards, tiles, groups = plan.cards, plan.tiles, plan.groups
+        templates = DEVICE_TEMPLATE_MAP
+        count = filtered = duplicates = 0
+
+        # Each card's type and domain are looked up once and serve every
+        # stage; counters are kept in locals and added to the stats at the end
+        for card in room.get("cards", []):
+            count += 1
+            cls = type(card)
+            if cls is not dict and cls is not Card and not isinstance(card, _CARDS):
+                cards.append(card)
+                tiles.append(card)
+                groups.setdefault("other", []).append(card)
+                continue
+            entity = card.get("entity")
+            if known is not None and entity and entity not in known:
+                filtered += 1
+                continue
+            if deduplicate:
+                key = card_key(card)
+                if key in keys:
+                    duplicates += 1
+                    continue
+                keys.add(key)
+            if across:
+                card, removed = self._drop_seen(card, seen, shown)
+                duplicates += removed
+                if card is None:
+                    continue
+            if entity:
+                plan.active += 1
+            cards.append(card)
+            tile = card
+            group = "other"
+            if isinstance(entity, str):
+                domain = entity.split(".")[0]
+                template = templates.get(domain)
+                if template is not None:
+                    if type(card) is Card:
+                        tile = Card.tile(template, entity)
+                    else:
+                        tile = {
+                            "type": "custom:button-card",
+                            "template": template,
+                            "entity": entity,
+                        }
+                group = _DOMAIN_GROUPS.get(domain, "other")
+            tiles.append(tile)
+            bucket = groups.get(group)
+            if bucket is None:
+                bucket = groups[group] = []
+            bucket.append(tile)
+
+        stats = self.stats
+        stats["rooms"] += 1
+        stats["traversals"] += 1
+        stats["cards"] += count
+        stats["filtered"] += filtered
+        stats["duplicates"] += duplicates
+        if across:
+            seen |= shown
+        return plan
+
+    def _drop_seen(
+        self, card: Any, seen: Set[str], shown: Set[str]
+    ) -> Tuple[Any, int]:
+        nested = card.get("cards")
+        if isinstance(nested, list) and nested:
+            kept = []
+            removed = 0
+            for child in nested:
+                if isinstance(child, _CARDS):
+                    child, count = self._drop_seen(child, seen, shown)
+                    removed += count
+                    if child is None:
+                        continue
+                kept.append(child)
+            if not kept:
+                return None, removed
+            if not removed:
+                return card, 0
+            if type(card) is Card:
+                return replace(card, cards=kept), removed
+            return {**card, "cards": kept}, removed
+        entity = card.get("entity")
+        if isinstance(entity, str):
+            if entity in seen:
+                return None, 1
+            shown.add(entity)
+        return card, 0
+
+
+def group_stacks(plans: List[RoomPlan]) -> List[Any]:
+    """Return the Devices view cards for the visible rooms of *plans*."""
+    merged: Dict[str, List[Any]] = {}
+    for plan in plans:
+        for group, tiles in plan.groups.items():
+            merged.setdefault(group, []).extend(tiles)
+    result: List[Any] = [
+        {"type": "vertical-stack", "cards": merged[group]}
+        for group in GROUP_ORDER
+        if merged.get(group)
+    ]
+    result.extend(merged.get("other", []))
+    return result
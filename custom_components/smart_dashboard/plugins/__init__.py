@@ -1,39 +1,622 @@
-"""Plugin system for Smart Dashboard."""
+"""Plugin system for Smart Dashboard.
+
+Every module in this directory that defines ``process_config`` is a plugin.
+Modules are imported once by the :data:`REGISTRY` and imported again only
+when their file changes.  Plugins run in the order given by the
+``plugins`` option of the configuration, then by their ``PRIORITY``
+attribute (lower first, default 50) and name:
+
+.. code-block:: yaml
+
+    plugins:
+      order: [lovelace_cards_loader]   # run these first, in this order
+      disabled: [dwains_style]         # never run these
+      # enabled: [...]                 # run only these
+      timeout: 30                      # seconds per plugin
+
+Each plugin runs in a worker thread on its own copy of the configuration.
+``process_config`` either changes that copy in place (it then replaces the
+configuration) or returns a dict of top-level keys to set.  A plugin that
+fails or does not finish within its time budget (the ``timeout`` option, or
+its ``TIMEOUT`` attribute, default 30 seconds) is skipped and its changes
+are dropped.  Python threads cannot be stopped, so a plugin that overruns
+keeps running in the background; plugins and fetches run on daemon threads
+so that such a plugin never keeps the command line tool from exiting.
+Consecutive plugins that set ``INDEPENDENT = True`` read only the
+configuration as it was before any of them ran and run concurrently; their
+changes are merged in run order.
+
+A plugin whose changes depend only on some configuration keys lists them
+in ``INPUTS``, e.g. ``("header", "sidebar", "rooms.name")`` where
+``rooms.name`` stands for the ``name`` of every room.  It must list every
+key it reads or changes.  Its changes are then cached by the values of
+those keys and reused without running the plugin while they are unchanged.
+
+Network access belongs in an optional ``fetch(config, context)`` function.
+The generator starts the fetches of all selected plugins in the background
+before auto discovery (see :func:`start_prefetch`), so waiting for Home
+Assistant overlaps building the rooms; ``fetch`` therefore sees the
+configuration without discovered rooms and should read only the plugin's
+own options.  Its return value reaches ``process_config`` as
+``context.fetched``.  The time budget of a plugin includes waiting for its
+fetch.  Plugins with a ``fetch`` function are never cached.
+
+Callables appended to :data:`PLUGINS` run inline after the registered
+plugins and change the configuration directly.
+"""
 
 from __future__ import annotations
 
+import hashlib
+import inspect
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from dataclasses import dataclass, replace
 from importlib import util
 from pathlib import Path
-from typing import Callable, Dict, Any, List
+from typing import Callable, Dict, Any, List, Mapping, Optional, Tuple
 
-PLUGINS: List[Callable[[Dict[str, Any]], None]] = []
+_LOGGER = logging.getLogger(__name__)
 
+PLUGINS_DIR = Path(__file__).parent
+DEFAULT_PRIORITY = 50
+DEFAULT_TIMEOUT = 30.0
+OUTPUT_CACHE_SIZE = 32
 
-def load_plugins() -> None:
-    """Load all plugins from the plugins directory."""
-    plugins_dir = Path(__file__).parent
-    for file in plugins_dir.glob("*.py"):
-        if file.stem == "__init__":
+# Callables registered in code rather than as modules in PLUGINS_DIR
+PLUGINS: List[Callable[..., None]] = []
+
+
+@dataclass
+class PluginContext:
+    """Shared resources of the current generation run.
+
+    Plugins opt in by accepting a second ``context`` argument in
+    ``process_config``.  ``snapshot`` is the run's ``HassSnapshot``,
+    ``session`` a keep-alive ``requests.Session`` in command line mode and
+    ``hass`` the Home Assistant instance when running inside it.  When
+    ``offline`` is set the run replays a recorded snapshot and plugins must
+    not contact Home Assistant.  ``fetched`` is the result of the plugin's
+    own ``fetch`` function.
+    """
+
+    hass: Any = None
+    snapshot: Any = None
+    session: Any = None
+    hass_url: Optional[str] = None
+    offline: bool = False
+    fetched: Any = None
+
+
+def _accepts_context(plugin: Callable[..., None]) -> bool:
+    """Return ``True`` if *plugin* takes a context argument."""
+    try:
+        params = inspect.signature(plugin).parameters.values()
+    except (TypeError, ValueError):
+        return False
+    positional = [
+        p for p in params
+        if p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD, p.VAR_POSITIONAL)
+    ]
+    return len(positional) >= 2 or any(p.kind == p.VAR_POSITIONAL for p in positional)
+
+
+@dataclass
+class Plugin:
+    """A plugin module, the file version it was imported from and its totals."""
+
+    name: str
+    path: Path
+    mtime: int
+    func: Optional[Callable[..., None]] = None
+    fetch: Optional[Callable[[Dict[str, Any], Any], Any]] = None
+    priority: int = DEFAULT_PRIORITY
+    timeout: float = DEFAULT_TIMEOUT
+    independent: bool = False
+    inputs: Optional[Tuple[str, ...]] = None
+    accepts_context: bool = False
+    runs: int = 0
+    failures: int = 0
+    timeouts: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    total_time: float = 0.0
+    last_time: float = 0.0
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "runs": self.runs,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "total_time": round(self.total_time, 4),
+            "last_time": round(self.last_time, 4),
+        }
+
+
+@dataclass
+class PluginRun:
+    """Wall time and outcome of one plugin in one generation run."""
+
+    name: str
+    duration: float
+    failed: bool = False
+    timed_out: bool = False
+    cached: bool = False
+
+
+def _copy(value: Any) -> Any:
+    """Copy the dicts and lists of a configuration; other values are shared."""
+    if type(value) is dict:
+        return {key: _copy(item) for key, item in value.items()}
+    if type(value) is list:
+        return [_copy(item) for item in value]
+    return value
+
+
+_REMOVED = object()
+
+
+def _diff(before: Mapping[str, Any], after: Mapping[str, Any]) -> Dict[str, Any]:
+    """Return the top-level keys that differ in *after*; removed keys map to
+    ``_REMOVED``."""
+    patch = {
+        key: value
+        for key, value in after.items()
+        if key not in before or before[key] != value
+    }
+    patch.update((key, _REMOVED) for key in before if key not in after)
+    return patch
+
+
+def _merge(
+    config: Dict[str, Any], before: Mapping[str, Any], patch: Mapping[str, Any]
+) -> None:
+    """Apply *patch*, computed against *before*, to *config*.
+
+    A list that only grew is merged by appending its new items, so
+    concurrent plugins adding rooms or resources all keep their additions.
+    Any other change replaces the key.  Values shared with *before* are
+    never modified.
+    """
+    for key, value in patch.items():
+        if value is _REMOVED:
+            config.pop(key, None)
             continue
-        module_name = f"smart_dashboard_plugin_{file.stem}"
-        spec = util.spec_from_file_location(module_name, file)
-        if spec and spec.loader:
-            module = util.module_from_spec(spec)
-            spec.loader.exec_module(module)
+        old = before.get(key)
+        current = config.get(key)
+        if (
+            type(value) is list
+            and type(old) is list
+            and type(current) is list
+            and len(value) >= len(old)
+            and value[: len(old)] == old
+        ):
+            config[key] = current + value[len(old):]
         else:
-            continue
-        if hasattr(module, "process_config"):
-            PLUGINS.append(module.process_config)
+            config[key] = value
 
 
-def run_plugins(config: Dict[str, Any]) -> None:
-    """Run all loaded plugins on the config."""
-    for plugin in PLUGINS:
+def _project(config: Mapping[str, Any], path: str) -> Any:
+    """Return the value at the dotted *path*; lists map over their items."""
+    key, *rest = path.split(".")
+    value = config.get(key)
+    for part in rest:
+        if type(value) is list:
+            value = [item.get(part) if type(item) is dict else None for item in value]
+        elif type(value) is dict:
+            value = value.get(part)
+        else:
+            return None
+    return value
+
+
+class OutputCache:
+    """Plugin changes keyed on the plugin version and its declared inputs.
+
+    Holds at most *max_entries* results and evicts the least recently used.
+    Results are stored and returned as private copies.
+    """
+
+    def __init__(self, max_entries: int = OUTPUT_CACHE_SIZE) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[Any, ...], Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(plugin: Plugin, config: Mapping[str, Any]) -> Tuple[Any, ...]:
+        values = [_project(config, path) for path in plugin.inputs or ()]
+        digest = hashlib.sha256(repr(values).encode()).hexdigest()
+        return (plugin.path, plugin.mtime, digest)
+
+    def get(self, key: Tuple[Any, ...]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            patch = self._entries.get(key)
+            if patch is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return _copy(patch)
+
+    def put(self, key: Tuple[Any, ...], patch: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = _copy(patch)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _call(
+    name: str,
+    func: Callable[..., None],
+    accepts_context: bool,
+    config: Dict[str, Any],
+    context: Optional[PluginContext],
+) -> PluginRun:
+    start = time.perf_counter()
+    failed = False
+    try:
+        if accepts_context:
+            func(config, context)
+        else:
+            func(config)
+    except Exception as err:
+        # Plugin errors must not fail the generation
+        failed = True
+        _LOGGER.error("Plugin %s failed: %s", name, err)
+    return PluginRun(name, time.perf_counter() - start, failed)
+
+
+def _start_daemon(name: str, func: Callable[..., Any], *args: Any) -> Future:
+    """Run ``func(*args)`` on a new daemon thread and return its future.
+
+    Unlike executor threads, daemon threads are not joined at interpreter
+    exit, so an abandoned plugin cannot block shutdown.
+    """
+    future: Future = Future()
+
+    def _target() -> None:
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(func(*args))
+        except BaseException as err:
+            future.set_exception(err)
+
+    threading.Thread(target=_target, name=name, daemon=True).start()
+    return future
+
+
+class PluginRegistry:
+    """The plugin modules of a directory, each imported once per file version."""
+
+    def __init__(self, directory: Path = PLUGINS_DIR) -> None:
+        self.directory = directory
+        self._plugins: Dict[Path, Plugin] = {}
+        self._lock = threading.Lock()
+        self.imports = 0
+        self.cache = OutputCache()
+
+    def load(self) -> List[Plugin]:
+        """Import new and modified plugin modules and forget removed ones."""
+        with self._lock:
+            found = set()
+            for path in sorted(self.directory.glob("*.py")):
+                if path.stem == "__init__":
+                    continue
+                found.add(path)
+                try:
+                    mtime = path.stat().st_mtime_ns
+                except OSError:
+                    continue
+                current = self._plugins.get(path)
+                if current is None or current.mtime != mtime:
+                    self._plugins[path] = self._import(path, mtime, current)
+            for path in set(self._plugins) - found:
+                del self._plugins[path]
+            return list(self._plugins.values())
+
+    def _import(self, path: Path, mtime: int, previous: Optional[Plugin]) -> Plugin:
+        plugin = Plugin(path.stem, path, mtime)
+        if previous is not None:
+            # Totals survive a reload of the same plugin
+            plugin.runs, plugin.failures = previous.runs, previous.failures
+            plugin.timeouts = previous.timeouts
+            plugin.cache_hits = previous.cache_hits
+            plugin.cache_misses = previous.cache_misses
+            plugin.total_time = previous.total_time
+            plugin.last_time = previous.last_time
+        self.imports += 1
+        module_name = f"smart_dashboard_plugin_{path.stem}"
+        spec = util.spec_from_file_location(module_name, path)
+        if spec is None or spec.loader is None:
+            return plugin
+        module = util.module_from_spec(spec)
         try:
-            plugin(config)
+            spec.loader.exec_module(module)
         except Exception as err:
-            # pragma: no cover - plugin errors shouldn't crash
-            import logging
-            logging.getLogger(__name__).error(
-                "Plugin %s failed: %s", plugin.__name__, err
+            # Retried once the file changes
+            plugin.failures += 1
+            _LOGGER.error("Failed to import plugin %s: %s", path.stem, err)
+            return plugin
+        func = getattr(module, "process_config", None)
+        if callable(func):
+            plugin.func = func
+            plugin.accepts_context = _accepts_context(func)
+            plugin.priority = int(getattr(module, "PRIORITY", DEFAULT_PRIORITY))
+            plugin.timeout = float(getattr(module, "TIMEOUT", DEFAULT_TIMEOUT))
+            plugin.independent = bool(getattr(module, "INDEPENDENT", False))
+            fetch = getattr(module, "fetch", None)
+            plugin.fetch = fetch if callable(fetch) else None
+            inputs = getattr(module, "INPUTS", None)
+            if inputs is not None:
+                plugin.inputs = tuple(inputs)
+        return plugin
+
+    def plugins(self, options: Optional[Dict[str, Any]] = None) -> List[Plugin]:
+        """Return the runnable plugins in run order for the ``plugins`` *options*."""
+        options = options or {}
+        available = {p.name: p for p in self._plugins.values() if p.func is not None}
+        for key in ("order", "enabled", "disabled"):
+            unknown = [n for n in options.get(key) or [] if n not in available]
+            if unknown:
+                _LOGGER.warning(
+                    "Unknown plugins in plugins.%s: %s", key, ", ".join(unknown)
+                )
+        rank = {name: index for index, name in enumerate(options.get("order") or [])}
+        enabled = options.get("enabled")
+        disabled = set(options.get("disabled") or ())
+        selected = [
+            plugin
+            for name, plugin in available.items()
+            if name not in disabled and (enabled is None or name in enabled)
+        ]
+        return sorted(
+            selected,
+            key=lambda p: (rank.get(p.name, len(rank)), p.priority, p.name),
+        )
+
+    def prefetch(
+        self, config: Dict[str, Any], context: Optional[PluginContext] = None
+    ) -> "Prefetch":
+        """Start the ``fetch`` functions of the plugins selected by *config*."""
+        selected = self.plugins(config.get("plugins"))
+        return Prefetch([p for p in selected if p.fetch is not None], config, context)
+
+    def run(
+        self,
+        config: Dict[str, Any],
+        context: Optional[PluginContext] = None,
+        prefetch: Optional["Prefetch"] = None,
+    ) -> List[PluginRun]:
+        """Run the plugins selected by ``config["plugins"]`` on *config*.
+
+        *config* is updated in place with the merged plugin changes.  Fetches
+        already started by *prefetch* are used instead of fetching again.
+        """
+        options = config.get("plugins") or {}
+        runs: List[PluginRun] = []
+        batch: List[Plugin] = []
+        for plugin in self.plugins(options):
+            if plugin.independent:
+                batch.append(plugin)
+                continue
+            if batch:
+                runs.extend(self._run_batch(batch, config, context, options, prefetch))
+                batch = []
+            runs.extend(self._run_batch([plugin], config, context, options, prefetch))
+        if batch:
+            runs.extend(self._run_batch(batch, config, context, options, prefetch))
+        return runs
+
+    def _run_batch(
+        self,
+        batch: List[Plugin],
+        config: Dict[str, Any],
+        context: Optional[PluginContext],
+        options: Mapping[str, Any],
+        prefetch: Optional["Prefetch"] = None,
+    ) -> List[PluginRun]:
+        """Run *batch* concurrently on copies of *config* and merge the results.
+
+        Plugins with declared inputs reuse their cached changes when possible.
+        """
+        before = dict(config)
+        keys: Dict[int, Tuple[Any, ...]] = {}
+        cached: Dict[int, PluginRun] = {}
+        patches: Dict[int, Optional[Dict[str, Any]]] = {}
+        for index, plugin in enumerate(batch):
+            if plugin.inputs is None or plugin.fetch is not None:
+                continue
+            lookup = time.perf_counter()
+            keys[index] = self.cache.key(plugin, before)
+            patch = self.cache.get(keys[index])
+            if patch is not None:
+                patches[index] = patch
+                duration = time.perf_counter() - lookup
+                cached[index] = PluginRun(plugin.name, duration, cached=True)
+        pending = [index for index in range(len(batch)) if index not in cached]
+        start = time.perf_counter()
+        futures = {
+            index: _start_daemon(
+                f"smart_dashboard_plugin_{batch[index].name}",
+                self._execute,
+                batch[index],
+                before,
+                context,
+                prefetch,
             )
+            for index in pending
+        }
+        runs = []
+        for index, plugin in enumerate(batch):
+            if index in cached:
+                result = cached[index]
+                plugin.cache_hits += 1
+            else:
+                timeout = float(options.get("timeout", plugin.timeout))
+                remaining = max(0.0, start + timeout - time.perf_counter())
+                try:
+                    result, patches[index] = futures[index].result(
+                        timeout=remaining
+                    )
+                except FutureTimeout:
+                    # The thread cannot be stopped; its result is ignored
+                    _LOGGER.warning(
+                        "Plugin %s did not finish within %.1f s; skipped",
+                        plugin.name,
+                        timeout,
+                    )
+                    result = PluginRun(plugin.name, timeout, timed_out=True)
+                    patches[index] = None
+                if index in keys:
+                    plugin.cache_misses += 1
+                    if patches[index] is not None:
+                        self.cache.put(keys[index], patches[index])
+            patch = patches[index]
+            if patch:
+                _merge(config, before, patch)
+            plugin.runs += 1
+            plugin.failures += result.failed
+            plugin.timeouts += result.timed_out
+            plugin.total_time += result.duration
+            plugin.last_time = result.duration
+            runs.append(result)
+        return runs
+
+    @staticmethod
+    def _execute(
+        plugin: Plugin,
+        before: Mapping[str, Any],
+        context: Optional[PluginContext],
+        prefetch: Optional["Prefetch"] = None,
+    ) -> Tuple[PluginRun, Optional[Dict[str, Any]]]:
+        """Run *plugin* on a copy of *before* and return its changes."""
+        config = _copy(dict(before))
+        returned: List[Any] = []
+
+        def func(config: Dict[str, Any], context: Optional[PluginContext]) -> None:
+            if plugin.fetch is not None:
+                if prefetch is not None and plugin.name in prefetch:
+                    fetched = prefetch.result(plugin.name)
+                else:
+                    fetched = plugin.fetch(_copy(config), context)
+                context = replace(context or PluginContext(), fetched=fetched)
+            args = (config, context) if plugin.accepts_context else (config,)
+            returned.append(plugin.func(*args))
+
+        result = _call(plugin.name, func, True, config, context)
+        if result.failed:
+            return result, None
+        value = returned[0]
+        if isinstance(value, Mapping):
+            return result, dict(value)
+        if value is not None:
+            _LOGGER.warning(
+                "Plugin %s returned %s instead of a dict; ignored",
+                plugin.name,
+                type(value).__name__,
+            )
+        return result, _diff(before, config)
+
+    @property
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Run and failure counts and wall time totals by plugin name."""
+        return {p.name: p.stats for p in self._plugins.values()}
+
+
+class Prefetch:
+    """The ``fetch`` functions of *plugins*, running in background threads.
+
+    Each receives a copy of *config*.  :attr:`timings` holds the wall time
+    of every finished fetch by plugin name.
+    """
+
+    def __init__(
+        self,
+        plugins: List[Plugin],
+        config: Dict[str, Any],
+        context: Optional[PluginContext] = None,
+    ) -> None:
+        self.timings: Dict[str, float] = {}
+        self._futures: Dict[str, Future] = {
+            plugin.name: _start_daemon(
+                f"smart_dashboard_fetch_{plugin.name}",
+                self._fetch,
+                plugin,
+                _copy(config),
+                context,
+            )
+            for plugin in plugins
+        }
+
+    def _fetch(
+        self, plugin: Plugin, config: Dict[str, Any], context: Optional[PluginContext]
+    ) -> Any:
+        start = time.perf_counter()
+        try:
+            return plugin.fetch(config, context)
+        finally:
+            self.timings[plugin.name] = time.perf_counter() - start
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._futures
+
+    def result(self, name: str) -> Any:
+        """Wait for the fetch of plugin *name*; re-raises its exception."""
+        return self._futures[name].result()
+
+    def close(self) -> None:
+        """Abandon unfinished fetches; their daemon threads end on their own."""
+        for future in self._futures.values():
+            future.cancel()
+
+
+REGISTRY = PluginRegistry()
+
+
+def load_plugins() -> None:
+    """Load new or modified plugins from the plugins directory.
+
+    Unchanged plugin modules are not imported again.
+    """
+    REGISTRY.load()
+
+
+def start_prefetch(
+    config: Dict[str, Any], context: Optional[PluginContext] = None
+) -> Prefetch:
+    """Start the ``fetch`` functions of the loaded plugins in the background.
+
+    Pass the result to :func:`run_plugins` and :meth:`Prefetch.close` it
+    afterwards.
+    """
+    return REGISTRY.prefetch(config, context)
+
+
+def run_plugins(
+    config: Dict[str, Any],
+    context: Optional[PluginContext] = None,
+    prefetch: Optional[Prefetch] = None,
+) -> List[PluginRun]:
+    """Run all loaded plugins on the config; returns one entry per plugin."""
+    runs = REGISTRY.run(config, context, prefetch)
+    for plugin in PLUGINS:
+        name = getattr(plugin, "__name__", repr(plugin))
+        runs.append(_call(name, plugin, _accepts_context(plugin), config, context))
+    return runs
@@ -4,6 +4,10 @@ from __future__ import annotations
 
 from typing import Any, Dict
 
+# The keys process_config reads or changes; its changes are reused while
+# they are unchanged
+INPUTS = ("header", "theme", "sidebar", "resources", "rooms.name")
+
 
 def _slugify(text: str) -> str:
     slug = "".join(c.lower() if c.isalnum() else "-" for c in text)
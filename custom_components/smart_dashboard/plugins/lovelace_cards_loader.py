@@ -1,37 +1,222 @@
-"""Load Lovelace cards from Home Assistant via its API."""
+"""Load Lovelace cards from Home Assistant.
+
+Inside Home Assistant the dashboards listed in ``lovelace_dashboards``
+(default: the ``lovelace`` dashboard) are read from Home Assistant's own
+Lovelace storage rather than over HTTP, all at once.  Storage files are
+parsed again only when they change.  Outside Home Assistant the default
+dashboard is requested over the API.
+"""
 
 from __future__ import annotations
 
+import asyncio
+import json
 import logging
 import os
-from typing import Any, Dict
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Tuple
 
 import requests
 
 _LOGGER = logging.getLogger(__name__)
 
+# Adds rooms, so it runs before plugins that style the existing rooms
+PRIORITY = 10
+# Reads only its own option, so it can run alongside other independent plugins
+INDEPENDENT = True
 
-def process_config(config: Dict[str, Any]) -> None:
-    """Append rooms generated from the current Lovelace config."""
-    if not config.get("load_lovelace_cards"):
-        return
+DEFAULT_DASHBOARD = "lovelace"
+LOAD_TIMEOUT = 10
+
+# Parsed storage files by path, with the (mtime, size) they were read at
+_STORAGE_CACHE: Dict[Path, Tuple[Tuple[int, int], Optional[Dict[str, Any]]]] = {}
+# A file read this soon after its mtime may be rewritten within the same
+# timestamp tick, so it is not cached (as in config_cache)
+_RACY_WINDOW_NS = 2_000_000_000
+_CACHE_LOCK = threading.Lock()
+STATS = {"hits": 0, "misses": 0}
+
+
+def _dashboards(hass: Any) -> Mapping[Optional[str], Any]:
+    """Return Home Assistant's Lovelace dashboards by URL path."""
+    data = getattr(hass, "data", {}).get("lovelace")
+    dashboards = getattr(data, "dashboards", None)
+    if dashboards is None and isinstance(data, Mapping):
+        dashboards = data.get("dashboards")
+    return dashboards or {}
+
+
+def _storage_path(hass: Any, dashboard: Any) -> Optional[Path]:
+    """Return the storage file of *dashboard* (``None`` for the default one).
+
+    Returns ``None`` for dashboards that are not in storage mode.
+    """
+    if dashboard is not None and getattr(dashboard, "mode", "storage") != "storage":
+        return None
+    info = getattr(dashboard, "config", None)
+    key = f"lovelace.{info['id']}" if info else "lovelace"
+    return Path(hass.config.path(".storage", key))
+
+
+def _read_storage(path: Path) -> Optional[Dict[str, Any]]:
+    """Return the Lovelace config stored in *path*, parsed once per version.
+
+    Raises :class:`OSError` when the file cannot be read.
+    """
+    st = path.stat()
+    version = (st.st_mtime_ns, st.st_size)
+    with _CACHE_LOCK:
+        cached = _STORAGE_CACHE.get(path)
+        if cached is not None and cached[0] == version:
+            STATS["hits"] += 1
+            return cached[1]
+    stored = json.loads(path.read_bytes())
+    config = (stored.get("data") or {}).get("config")
+    with _CACHE_LOCK:
+        STATS["misses"] += 1
+        if time.time_ns() - st.st_mtime_ns >= _RACY_WINDOW_NS:
+            _STORAGE_CACHE[path] = (version, config)
+        else:
+            _STORAGE_CACHE.pop(path, None)
+    return config
+
+
+async def _async_load_all(dashboards: List[Any]) -> List[Any]:
+    return await asyncio.gather(
+        *(dashboard.async_load(False) for dashboard in dashboards),
+        return_exceptions=True,
+    )
+
+
+def _load_from_hass(hass: Any, url_paths: List[str]) -> List[Optional[Dict[str, Any]]]:
+    """Return the config of each dashboard in *url_paths*, read concurrently.
+
+    Storage files are read in worker threads; dashboards without one, such
+    as YAML mode dashboards, are loaded together on the event loop.
+    """
+    dashboards = _dashboards(hass)
+    paths: Dict[int, Path] = {}
+    on_loop: Dict[int, Any] = {}
+    for index, url_path in enumerate(url_paths):
+        key = None if url_path == DEFAULT_DASHBOARD else url_path
+        dashboard = dashboards.get(key)
+        path = None
+        if dashboard is not None or key is None:
+            path = _storage_path(hass, dashboard)
+        if path is not None and path.exists():
+            paths[index] = path
+        elif dashboard is not None:
+            on_loop[index] = dashboard
+        else:
+            _LOGGER.error("Lovelace dashboard %s not found", url_path)
 
+    results: List[Optional[Dict[str, Any]]] = [None] * len(url_paths)
+    loop_future = None
+    if on_loop:
+        loop_future = asyncio.run_coroutine_threadsafe(
+            _async_load_all(list(on_loop.values())), hass.loop
+        )
+    if paths:
+        with ThreadPoolExecutor(max_workers=len(paths)) as executor:
+            futures = {i: executor.submit(_read_storage, p) for i, p in paths.items()}
+            for index, future in futures.items():
+                try:
+                    results[index] = future.result()
+                except (OSError, ValueError) as err:
+                    _LOGGER.error(
+                        "Failed to read Lovelace dashboard %s: %s",
+                        url_paths[index],
+                        err,
+                    )
+    if loop_future is not None:
+        try:
+            loaded = loop_future.result(timeout=LOAD_TIMEOUT)
+        except Exception as err:  # pragma: no cover - runtime environment
+            loop_future.cancel()
+            _LOGGER.error("Failed to load Lovelace dashboards: %s", err)
+            loaded = [None] * len(on_loop)
+        for index, config in zip(on_loop, loaded):
+            if isinstance(config, BaseException):
+                _LOGGER.error(
+                    "Failed to load Lovelace dashboard %s: %s",
+                    url_paths[index],
+                    config,
+                )
+            elif isinstance(config, dict):
+                results[index] = config
+    return results
+
+
+def _fetch_lovelace(context: Any) -> Optional[Dict[str, Any]]:
+    """Return the Lovelace config fetched over the REST API."""
     token = os.environ.get("HASS_TOKEN")
     if not token:
         _LOGGER.error("load_lovelace_cards enabled but HASS_TOKEN is not set")
-        return
+        return None
 
-    hass_url = os.environ.get("HASS_URL", "http://localhost:8123").rstrip("/")
+    hass_url = getattr(context, "hass_url", None) or os.environ.get(
+        "HASS_URL", "http://localhost:8123"
+    )
     headers = {"Authorization": f"Bearer {token}"}
+    http = getattr(context, "session", None) or requests
 
     try:
-        resp = requests.get(f"{hass_url}/api/lovelace", headers=headers, timeout=10)
+        resp = http.get(f"{hass_url.rstrip('/')}/api/lovelace", headers=headers, timeout=10)
         resp.raise_for_status()
-        data = resp.json()
+        return resp.json()
     except Exception as err:  # pragma: no cover - runtime environment
         _LOGGER.error("Failed to load Lovelace config: %s", err)
+        return None
+
+
+def fetch(config: Dict[str, Any], context: Any = None) -> Dict[str, Any]:
+    """Return the Lovelace config to import; empty when there is none.
+
+    Inside Home Assistant the views of every dashboard in
+    ``lovelace_dashboards`` are returned, in that order.  Otherwise the
+    config prefetched into the run's snapshot is used when available, or
+    requested through the run's HTTP session.
+    """
+    if not config.get("load_lovelace_cards"):
+        return {}
+
+    url_paths = config.get("lovelace_dashboards") or [DEFAULT_DASHBOARD]
+    hass = getattr(context, "hass", None)
+    if hass is not None:
+        views: List[Any] = []
+        for data in _load_from_hass(hass, list(dict.fromkeys(url_paths))):
+            views.extend((data or {}).get("views", []))
+        return {"views": views}
+
+    if url_paths != [DEFAULT_DASHBOARD]:
+        _LOGGER.warning(
+            "Only the default Lovelace dashboard can be imported outside Home Assistant"
+        )
+    snapshot = getattr(context, "snapshot", None)
+    data = getattr(snapshot, "lovelace", None)
+    if data is None:
+        if getattr(context, "offline", False):
+            _LOGGER.warning("Snapshot contains no Lovelace config; skipping import")
+            return {}
+        data = _fetch_lovelace(context)
+    return data or {}
+
+
+def process_config(config: Dict[str, Any], context: Any = None) -> None:
+    """Append rooms generated from the current Lovelace config.
+
+    Uses ``context.fetched`` when the generator already ran :func:`fetch`.
+    """
+    if not config.get("load_lovelace_cards"):
         return
 
+    data = getattr(context, "fetched", None)
+    if data is None:
+        data = fetch(config, context)
+
     views = data.get("views", data.get("data", {}).get("views", []))
     rooms = config.setdefault("rooms", [])
     for idx, view in enumerate(views, 1):
@@ -39,7 +224,7 @@ def process_config(config: Dict[str, Any]) -> None:
             {
                 "name": view.get("title", f"View {idx}"),
                 "order": idx,
-                "cards": view.get("cards", []),
+                "cards": list(view.get("cards", [])),
             }
         )
 
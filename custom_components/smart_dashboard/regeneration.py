@@ -0,0 +1,258 @@
+"""Debounced, event-driven dashboard regeneration."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import Counter
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, Optional
+
+from homeassistant.core import HomeAssistant
+
+try:
+    from homeassistant.core import callback
+except ImportError:  # pragma: no cover - environment without Home Assistant
+    def callback(func):
+        # Mark the function like Home Assistant does so it runs on the loop
+        func._hass_callback = True
+        return func
+
+try:
+    from homeassistant.helpers.event import async_track_state_change_event
+except ImportError:  # pragma: no cover - environment without Home Assistant
+    async_track_state_change_event = None
+
+from .conditions import ConditionDependencies, current_time
+from .const import (
+    CONFIG_POLL_INTERVAL,
+    DEFAULT_DEBOUNCE,
+    DEFAULT_MAX_WAIT,
+    EVENT_STATE_CHANGED,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class DebouncedRegenerator:
+    """Coalesce bursts of change notifications into a single regeneration.
+
+    Every call to :meth:`async_schedule` restarts a *debounce* timer; the
+    action runs once the triggers stop for that long, but never later than
+    *max_wait* seconds after the first trigger of a burst.
+    """
+
+    def __init__(
+        self,
+        action: Callable[[], Awaitable[Any]],
+        debounce: float = DEFAULT_DEBOUNCE,
+        max_wait: float = DEFAULT_MAX_WAIT,
+    ) -> None:
+        self._action = action
+        self.debounce = debounce
+        self.max_wait = max_wait
+        self.triggers = 0
+        self.coalesced = 0
+        self.runs = 0
+        self._reasons: Counter[str] = Counter()
+        self._first: Optional[float] = None
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def pending(self) -> bool:
+        """Return ``True`` while a regeneration is scheduled."""
+        return self._handle is not None
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Return trigger counters for tuning the debounce windows."""
+        return {
+            "triggers": self.triggers,
+            "coalesced": self.coalesced,
+            "runs": self.runs,
+        }
+
+    def async_schedule(self, reason: str) -> None:
+        """Request a regeneration caused by *reason*."""
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        self.triggers += 1
+        self._reasons[reason] += 1
+        if self._first is None:
+            self._first = now
+        else:
+            self.coalesced += 1
+        if self._handle is not None:
+            self._handle.cancel()
+        delay = min(self.debounce, self._first + self.max_wait - now)
+        self._handle = loop.call_later(max(0.0, delay), self._fire)
+
+    async def async_flush(self) -> None:
+        """Run a scheduled regeneration immediately and wait for it."""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._fire()
+        if self._task is not None:
+            await asyncio.shield(self._task)
+
+    def async_cancel(self) -> None:
+        """Drop any scheduled regeneration."""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        self._first = None
+        self._reasons.clear()
+
+    def _fire(self) -> None:
+        self._handle = None
+        self._first = None
+        reasons = dict(self._reasons)
+        self._reasons.clear()
+        self.runs += 1
+        _LOGGER.debug(
+            "Regenerating dashboard after %s (%d triggers, %d coalesced so far)",
+            reasons,
+            self.triggers,
+            self.coalesced,
+        )
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        try:
+            await self._action()
+        except Exception:  # pragma: no cover - action logs its own errors
+            _LOGGER.exception("Dashboard regeneration failed")
+
+
+class ConfigFileWatcher:
+    """Poll a file's modification time and report changes."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        path: Path,
+        on_change: Callable[[], None],
+        interval: float = CONFIG_POLL_INTERVAL,
+    ) -> None:
+        self._hass = hass
+        self._path = path
+        self._on_change = on_change
+        self._interval = interval
+        self._signature: Optional[tuple] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _stat(self) -> Optional[tuple]:
+        try:
+            st = self._path.stat()
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    async def async_start(self) -> None:
+        """Record the current file state and begin polling."""
+        self._signature = await self._hass.async_add_executor_job(self._stat)
+        self._task = asyncio.get_running_loop().create_task(self._poll())
+
+    def async_stop(self) -> None:
+        """Stop polling."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _poll(self) -> None:
+        while True:
+            await asyncio.sleep(self._interval)
+            signature = await self._hass.async_add_executor_job(self._stat)
+            if signature != self._signature:
+                self._signature = signature
+                self._on_change()
+
+
+def _state_value(state: Any) -> Optional[str]:
+    return getattr(state, "state", None)
+
+
+class ConditionWatcher:
+    """Report changes to the entity states and time that conditions read.
+
+    Only the entities named in the current :class:`ConditionDependencies`
+    are watched, and only changes of their state value (not attribute
+    updates) are reported; time-dependent conditions are re-checked at the
+    next minute, hour or day boundary.  Call :meth:`async_update` with the
+    dependencies of every generation run.
+    """
+
+    def __init__(self, hass: HomeAssistant, on_change: Callable[[str], None]) -> None:
+        self._hass = hass
+        self._on_change = on_change
+        self._deps = ConditionDependencies()
+        self._entities: FrozenSet[str] = frozenset()
+        self._unsub: Optional[Callable[[], None]] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.triggers = 0
+
+    @property
+    def dependencies(self) -> ConditionDependencies:
+        return self._deps
+
+    def async_update(self, deps: ConditionDependencies) -> None:
+        """Watch the dependencies *deps* from now on."""
+        entities = frozenset(deps.entities)
+        if entities != self._entities:
+            self._unsubscribe()
+            self._entities = entities
+            if entities:
+                self._subscribe(entities)
+        if deps.period != self._deps.period and self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._deps = deps
+        if self._timer is None:
+            self._schedule_time()
+
+    def async_stop(self) -> None:
+        """Stop watching."""
+        self._unsubscribe()
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _subscribe(self, entities: FrozenSet[str]) -> None:
+        if async_track_state_change_event is not None:
+            self._unsub = async_track_state_change_event(
+                self._hass, list(entities), self._state_event
+            )
+        else:
+            self._unsub = self._hass.bus.async_listen(
+                EVENT_STATE_CHANGED, self._state_event
+            )
+
+    def _unsubscribe(self) -> None:
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+
+    @callback
+    def _state_event(self, event: Any) -> None:
+        data = event.data
+        if data.get("entity_id") not in self._entities:
+            return
+        if _state_value(data.get("old_state")) == _state_value(data.get("new_state")):
+            return
+        self.triggers += 1
+        self._on_change("condition_state")
+
+    def _schedule_time(self) -> None:
+        now = current_time()
+        boundary = self._deps.next_change(now)
+        if boundary is None:
+            return
+        delay = max(0.0, (boundary - now).total_seconds())
+        self._timer = asyncio.get_running_loop().call_later(delay, self._time_event)
+
+    def _time_event(self) -> None:
+        self._timer = None
+        self.triggers += 1
+        self._on_change("condition_time")
+        self._schedule_time()
@@ -0,0 +1,288 @@
+"""Live index of entities, devices and areas maintained from HA events."""
+
+from __future__ import annotations
+
+from typing import Callable, Dict, List, Optional, Set
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import (
+    area_registry as ar,
+    device_registry as dr,
+    entity_registry as er,
+)
+
+try:
+    from homeassistant.core import callback
+except ImportError:  # pragma: no cover - environment without Home Assistant
+    def callback(func):
+        # Mark the function like Home Assistant does so it runs on the loop
+        func._hass_callback = True
+        return func
+
+from .const import (
+    EVENT_AREA_REGISTRY_UPDATED,
+    EVENT_DEVICE_REGISTRY_UPDATED,
+    EVENT_ENTITY_REGISTRY_UPDATED,
+    EVENT_STATE_CHANGED,
+)
+from .snapshot import HassSnapshot, resolve_area_id
+
+_EMPTY: Set[str] = frozenset()
+
+
+class RegistryIndex:
+    """Entity to device to area index updated incrementally.
+
+    The index is built once from a :class:`HassSnapshot` and afterwards kept
+    current from registry update and ``state_changed`` events, so entity to
+    area, area to entities and "is this entity known" are O(1) lookups on
+    the event loop.  All methods must be called from the event loop; worker
+    threads use the immutable :meth:`snapshot` instead.
+
+    Generations run in a worker thread and therefore only see that
+    snapshot.  After any change it is copied again and its registry digest
+    recomputed, which costs about as much as capturing the registries
+    afresh; only runs without a registry change in between (manual, config
+    file, condition and time triggered ones) reuse the cached copy.
+    """
+
+    def __init__(self) -> None:
+        self._areas: Dict[Optional[str], str] = {}
+        self._device_areas: Dict[str, Optional[str]] = {}
+        self._entity_devices: Dict[str, Optional[str]] = {}
+        self._device_entities: Dict[str, Set[str]] = {}
+        # Areas set on entity registry entries; they override the device area
+        self._entity_own_areas: Dict[str, Optional[str]] = {}
+        self._entity_area: Dict[str, Optional[str]] = {}
+        self._area_entities: Dict[Optional[str], Set[str]] = {}
+        # Known entities in state machine order; a dict acts as ordered set
+        self._known: Dict[str, None] = {}
+        self._snapshot: Optional[HassSnapshot] = None
+        self.version = 0
+
+    @classmethod
+    def from_snapshot(cls, snapshot: HassSnapshot) -> "RegistryIndex":
+        """Return an index populated from *snapshot*."""
+        index = cls()
+        index._areas = dict(snapshot.areas)
+        index._device_areas = dict(snapshot.device_areas)
+        index._entity_own_areas = dict(snapshot.entity_own_areas)
+        for entity_id, device_id in snapshot.entity_devices.items():
+            index._link(entity_id, device_id)
+        index._known = dict.fromkeys(snapshot.entities)
+        return index
+
+    @classmethod
+    def async_build(cls, hass: HomeAssistant) -> "RegistryIndex":
+        """Return an index built from the current registries and states."""
+        return cls.from_snapshot(HassSnapshot.async_capture(hass))
+
+    def __len__(self) -> int:
+        return len(self._known)
+
+    def is_known(self, entity_id: str) -> bool:
+        """Return ``True`` if *entity_id* currently has a state."""
+        return entity_id in self._known
+
+    def area_id(self, entity_id: str) -> Optional[str]:
+        """Return the area ID of *entity_id* or ``None``."""
+        return self._entity_area.get(entity_id)
+
+    def area_name(self, entity_id: str) -> Optional[str]:
+        """Return the area name of *entity_id* or ``None``."""
+        return self._areas.get(self._entity_area.get(entity_id))
+
+    def entities_in_area(self, area_id: Optional[str]) -> Set[str]:
+        """Return the registry entities assigned to *area_id* (read-only)."""
+        return self._area_entities.get(area_id, _EMPTY)
+
+    def snapshot(self) -> HassSnapshot:
+        """Return an immutable copy for use outside the event loop.
+
+        The copy is cached until the index changes, so repeated generations
+        without registry changes share one snapshot and its digest.
+        """
+        if self._snapshot is None:
+            self._snapshot = HassSnapshot(
+                entities=list(self._known),
+                areas=dict(self._areas),
+                device_areas=dict(self._device_areas),
+                entity_devices=dict(self._entity_devices),
+                entity_own_areas=dict(self._entity_own_areas),
+                entity_area_ids=dict(self._entity_area),
+            )
+        return self._snapshot
+
+    def set_area(self, area_id: str, name: str) -> None:
+        """Record the name of *area_id*."""
+        if self._areas.get(area_id) != name:
+            self._areas[area_id] = name
+            self._changed()
+
+    def remove_area(self, area_id: str) -> None:
+        """Forget *area_id*."""
+        if self._areas.pop(area_id, None) is not None:
+            self._changed()
+
+    def set_device(self, device_id: str, area_id: Optional[str]) -> None:
+        """Record the area of *device_id* and move its entities."""
+        if device_id in self._device_areas and self._device_areas[device_id] == area_id:
+            return
+        self._device_areas[device_id] = area_id
+        for entity_id in self._device_entities.get(device_id, _EMPTY):
+            self._move(entity_id, self._resolve(entity_id, device_id))
+        self._changed()
+
+    def remove_device(self, device_id: str) -> None:
+        """Forget *device_id*; its entities lose their area."""
+        if device_id not in self._device_areas:
+            return
+        del self._device_areas[device_id]
+        for entity_id in self._device_entities.get(device_id, _EMPTY):
+            self._move(entity_id, self._resolve(entity_id, device_id))
+        self._changed()
+
+    def set_entity(
+        self,
+        entity_id: str,
+        device_id: Optional[str],
+        area_id: Optional[str] = None,
+    ) -> None:
+        """Record the device of *entity_id* and the area set on the entity."""
+        if entity_id in self._entity_devices:
+            if (
+                self._entity_devices[entity_id] == device_id
+                and self._entity_own_areas.get(entity_id) == area_id
+            ):
+                return
+            self._unlink(entity_id)
+        if area_id is not None:
+            self._entity_own_areas[entity_id] = area_id
+        self._link(entity_id, device_id)
+        self._changed()
+
+    def remove_entity(self, entity_id: str) -> None:
+        """Forget the registry entry of *entity_id*."""
+        if entity_id in self._entity_devices:
+            self._unlink(entity_id)
+            self._changed()
+
+    def add_state(self, entity_id: str) -> None:
+        """Mark *entity_id* as having a state."""
+        if entity_id not in self._known:
+            self._known[entity_id] = None
+            self._changed()
+
+    def remove_state(self, entity_id: str) -> None:
+        """Mark *entity_id* as no longer having a state."""
+        if entity_id in self._known:
+            del self._known[entity_id]
+            self._changed()
+
+    def _link(self, entity_id: str, device_id: Optional[str]) -> None:
+        self._entity_devices[entity_id] = device_id
+        if device_id is not None:
+            self._device_entities.setdefault(device_id, set()).add(entity_id)
+        area_id = self._resolve(entity_id, device_id)
+        self._entity_area[entity_id] = area_id
+        self._area_entities.setdefault(area_id, set()).add(entity_id)
+
+    def _unlink(self, entity_id: str) -> None:
+        device_id = self._entity_devices.pop(entity_id)
+        self._entity_own_areas.pop(entity_id, None)
+        if device_id is not None:
+            siblings = self._device_entities.get(device_id)
+            if siblings is not None:
+                siblings.discard(entity_id)
+                if not siblings:
+                    del self._device_entities[device_id]
+        area_id = self._entity_area.pop(entity_id)
+        self._discard_from_area(entity_id, area_id)
+
+    def _resolve(self, entity_id: str, device_id: Optional[str]) -> Optional[str]:
+        return resolve_area_id(
+            self._entity_own_areas.get(entity_id), device_id, self._device_areas
+        )
+
+    def _move(self, entity_id: str, area_id: Optional[str]) -> None:
+        old = self._entity_area.get(entity_id)
+        if old == area_id:
+            return
+        self._discard_from_area(entity_id, old)
+        self._entity_area[entity_id] = area_id
+        self._area_entities.setdefault(area_id, set()).add(entity_id)
+
+    def _discard_from_area(self, entity_id: str, area_id: Optional[str]) -> None:
+        members = self._area_entities.get(area_id)
+        if members is not None:
+            members.discard(entity_id)
+            if not members:
+                del self._area_entities[area_id]
+
+    def _changed(self) -> None:
+        self.version += 1
+        self._snapshot = None
+
+    def async_track(self, hass: HomeAssistant) -> Callable[[], None]:
+        """Keep the index current from HA events; returns an unsubscribe."""
+
+        @callback
+        def _area_event(event) -> None:
+            area_id = event.data.get("area_id")
+            if event.data.get("action") == "remove":
+                self.remove_area(area_id)
+            else:
+                area = ar.async_get(hass).async_get_area(area_id)
+                if area is not None:
+                    self.set_area(area.id, area.name)
+
+        @callback
+        def _device_event(event) -> None:
+            device_id = event.data.get("device_id")
+            if event.data.get("action") == "remove":
+                self.remove_device(device_id)
+            else:
+                device = dr.async_get(hass).async_get(device_id)
+                if device is not None:
+                    self.set_device(device.id, device.area_id)
+
+        @callback
+        def _entity_event(event) -> None:
+            data = event.data
+            entity_id = data.get("entity_id")
+            if data.get("old_entity_id"):
+                self.remove_entity(data["old_entity_id"])
+            if data.get("action") == "remove":
+                self.remove_entity(entity_id)
+            else:
+                entry = er.async_get(hass).async_get(entity_id)
+                if entry is not None:
+                    self.set_entity(
+                        entry.entity_id,
+                        entry.device_id,
+                        getattr(entry, "area_id", None),
+                    )
+
+        @callback
+        def _state_event(event) -> None:
+            data = event.data
+            # Fast path: ordinary state updates do not change the index
+            if data.get("old_state") is not None and data.get("new_state") is not None:
+                return
+            if data.get("new_state") is None:
+                self.remove_state(data.get("entity_id"))
+            else:
+                self.add_state(data.get("entity_id"))
+
+        unsubs: List[Callable[[], None]] = [
+            hass.bus.async_listen(EVENT_AREA_REGISTRY_UPDATED, _area_event),
+            hass.bus.async_listen(EVENT_DEVICE_REGISTRY_UPDATED, _device_event),
+            hass.bus.async_listen(EVENT_ENTITY_REGISTRY_UPDATED, _entity_event),
+            hass.bus.async_listen(EVENT_STATE_CHANGED, _state_event),
+        ]
+
+        def _unsubscribe() -> None:
+            while unsubs:
+                unsubs.pop()()
+
+        return _unsubscribe
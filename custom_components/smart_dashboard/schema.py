@@ -1,5 +1,16 @@
 import voluptuous as vol
 from .const import DEFAULT_OVERVIEW_LIMIT, DEFAULT_GRID_COLUMNS
+from .conditions import ConditionError, check_condition
+from .serializers import BACKENDS
+
+
+def valid_condition(value):
+    """Reject conditions that do not compile, with the reason."""
+    try:
+        return check_condition(value)
+    except ConditionError as err:
+        raise vol.Invalid(str(err)) from None
+
 
 # Card schema allows arbitrary keys so users can pass any card options
 CARD_SCHEMA = vol.Schema(
@@ -17,7 +28,7 @@ ROOM_SCHEMA = vol.Schema(
         ),
         vol.Optional("overview_limit"): vol.All(vol.Coerce(int), vol.Range(min=0)),
         vol.Optional("cards", default=[]): [CARD_SCHEMA],
-        vol.Optional("conditions"): [str],
+        vol.Optional("conditions"): [vol.All(str, valid_condition)],
         vol.Optional("hidden", default=False): bool,
     },
     extra=vol.ALLOW_EXTRA,
@@ -36,7 +47,7 @@ CONFIG_SCHEMA = vol.Schema(
                 vol.Required("name"): str,
                 vol.Optional("icon"): str,
                 vol.Optional("view"): str,
-                vol.Optional("condition"): str,
+                vol.Optional("condition"): vol.All(str, valid_condition),
             }
         ],
         vol.Optional("layout"): {
@@ -45,12 +56,213 @@ CONFIG_SCHEMA = vol.Schema(
         vol.Optional("theme", default="auto"): vol.In(["light", "dark", "auto"]),
         vol.Optional("overview_limit", default=DEFAULT_OVERVIEW_LIMIT): vol.All(vol.Coerce(int), vol.Range(min=0)),
         vol.Optional("load_lovelace_cards", default=False): bool,
+        vol.Optional("lovelace_dashboards"): [str],
+        vol.Optional("deduplicate", default="room"): vol.In(["room", "dashboard"]),
+        vol.Optional("serializer", default="auto"): vol.In(list(BACKENDS)),
         vol.Optional("resources", default=[]): [
             {
                 vol.Required("url"): str,
                 vol.Required("type"): str,
             }
         ],
+        vol.Optional("plugins"): {
+            vol.Optional("order"): [str],
+            vol.Optional("enabled"): [str],
+            vol.Optional("disabled"): [str],
+            vol.Optional("timeout"): vol.All(
+                vol.Coerce(float), vol.Range(min=0, min_included=False)
+            ),
+        },
         vol.Optional("rooms", default=[]): [ROOM_SCHEMA],
     }
 )
+
+
+class _Reject(Exception):
+    """Raised by the fast validators for input they do not handle."""
+
+
+def _str(value):
+    if not isinstance(value, str):
+        raise _Reject
+    return value
+
+
+def _bool(value):
+    if not isinstance(value, bool):
+        raise _Reject
+    return value
+
+
+def _coerce_int(value):
+    try:
+        return int(value)
+    except Exception:
+        raise _Reject from None
+
+
+def _int_min(minimum):
+    def validate(value):
+        value = _coerce_int(value)
+        if value < minimum:
+            raise _Reject
+        return value
+
+    return validate
+
+
+def _positive_float(value):
+    if type(value) not in (int, float) or not value > 0:
+        raise _Reject
+    return float(value)
+
+
+def _one_of(*options):
+    def validate(value):
+        if value not in options:
+            raise _Reject
+        return value
+
+    return validate
+
+
+def _condition(value):
+    try:
+        return check_condition(_str(value))
+    except ConditionError:
+        raise _Reject from None
+
+
+def _list_of(item):
+    def validate(value):
+        if type(value) is not list:
+            raise _Reject
+        return [item(v) for v in value]
+
+    return validate
+
+
+def _defaults(schema, data, path=()):
+    """Return the defaults *schema* adds to the minimal *data*, in order.
+
+    Voluptuous appends missing defaults in the iteration order of an
+    internal set, so the order is taken from the schema instead of assumed.
+    """
+    result = schema(data)
+    for key in path:
+        result = result[key]
+        data = data[key]
+    return tuple((k, v) for k, v in result.items() if k not in data)
+
+
+def _mapping(fields, defaults, required=(), extra=False):
+    """Compile a validator for a dict schema.
+
+    *fields* maps keys to value validators; unknown keys are kept as they
+    are when *extra* is true.  Like voluptuous, the result lists the input
+    keys first and the missing defaults after them.
+    """
+    required = tuple(required)
+
+    def validate(data):
+        if type(data) is not dict:
+            raise _Reject
+        for key in required:
+            if key not in data:
+                raise _Reject
+        out = {}
+        for key, value in data.items():
+            validator = fields.get(key) if type(key) is str else None
+            if validator is not None:
+                out[key] = validator(value)
+            elif extra:
+                out[key] = value
+            else:
+                raise _Reject
+        for key, value in defaults:
+            if key not in data:
+                out[key] = list(value) if type(value) is list else value
+        return out
+
+    return validate
+
+
+def _fast_card(card):
+    if type(card) is not dict or not isinstance(card.get("type"), str):
+        raise _Reject
+    return dict(card)
+
+
+_fast_room = _mapping(
+    {
+        "name": _str,
+        "icon": _str,
+        "order": _coerce_int,
+        "layout": _one_of("horizontal", "vertical"),
+        "columns": _int_min(1),
+        "overview_limit": _int_min(0),
+        "cards": _list_of(_fast_card),
+        "conditions": _list_of(_condition),
+        "hidden": _bool,
+    },
+    _defaults(ROOM_SCHEMA, {"name": ""}),
+    required=("name",),
+    extra=True,
+)
+
+_probe = {"header": {"title": ""}, "layout": {}}
+
+_fast_config = _mapping(
+    {
+        "auto_discover": _bool,
+        "header": _mapping(
+            {"title": _str, "logo": _str, "show_time": _bool},
+            _defaults(CONFIG_SCHEMA, _probe, ("header",)),
+            required=("title",),
+        ),
+        "sidebar": _list_of(
+            _mapping(
+                {"name": _str, "icon": _str, "view": _str, "condition": _condition},
+                (),
+                required=("name",),
+            )
+        ),
+        "layout": _mapping(
+            {"strategy": _str}, _defaults(CONFIG_SCHEMA, _probe, ("layout",))
+        ),
+        "theme": _one_of("light", "dark", "auto"),
+        "overview_limit": _int_min(0),
+        "load_lovelace_cards": _bool,
+        "lovelace_dashboards": _list_of(_str),
+        "deduplicate": _one_of("room", "dashboard"),
+        "serializer": _one_of(*BACKENDS),
+        "resources": _list_of(
+            _mapping({"url": _str, "type": _str}, (), required=("url", "type"))
+        ),
+        "plugins": _mapping(
+            {
+                "order": _list_of(_str),
+                "enabled": _list_of(_str),
+                "disabled": _list_of(_str),
+                "timeout": _positive_float,
+            },
+            (),
+        ),
+        "rooms": _list_of(_fast_room),
+    },
+    _defaults(CONFIG_SCHEMA, {}),
+)
+
+
+def validate_config(data):
+    """Validate *data* against :data:`CONFIG_SCHEMA`.
+
+    Configurations built from the documented options take a hand-compiled
+    path that gives the same result as the schema several times faster;
+    anything it does not handle, including every invalid configuration, is
+    passed to the schema itself so errors read exactly as before.
+    """
+    try:
+        return _fast_config(data)
+    except _Reject:
+        return CONFIG_SCHEMA(data)
@@ -0,0 +1,220 @@
+"""YAML loading and dashboard serialisation backends.
+
+The ``serializer`` option selects how the generated dashboard is written:
+
+``libyaml``
+    PyYAML with the libyaml C emitter (``CSafeDumper``).
+``python``
+    PyYAML's pure-Python emitter, the historical behaviour.
+``json``
+    JSON, which YAML parsers read as a flow-style document.  It is written
+    by the C JSON encoder and is by far the fastest backend, at the cost of
+    a less readable file.
+``auto``
+    ``libyaml`` when PyYAML was built with it, otherwise ``python``.
+
+Every backend writes to a text stream while the document is encoded, so the
+full output never has to exist as one string.  Dashboards that share views,
+such as per-user variants, can pass a :class:`FragmentCache` to encode each
+shared view once.
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import logging
+import re
+from typing import Any, Callable, Dict, Optional, TextIO, Tuple
+
+import yaml
+
+from .model import add_representers
+from .translation import Text
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("auto", "libyaml", "python", "json")
+
+HAS_LIBYAML = bool(getattr(yaml, "__with_libyaml__", False))
+
+SafeLoader = yaml.CSafeLoader if HAS_LIBYAML else yaml.SafeLoader
+
+
+def load_yaml(stream: Any) -> Any:
+    """Parse one YAML document from *stream* with the fastest safe loader."""
+    return yaml.load(stream, Loader=SafeLoader)
+
+
+class NoAliasDumper(yaml.SafeDumper):
+    """Safe dumper writing shared cards in full instead of as YAML aliases."""
+
+    def ignore_aliases(self, data: Any) -> bool:
+        return True
+
+
+add_representers(NoAliasDumper)
+# Unfilled translation slots read as their default text
+NoAliasDumper.add_representer(Text, yaml.SafeDumper.represent_str)
+
+if HAS_LIBYAML:
+
+    class CNoAliasDumper(yaml.CSafeDumper):
+        """:class:`NoAliasDumper` with the libyaml emitter."""
+
+        def ignore_aliases(self, data: Any) -> bool:
+            return True
+
+    add_representers(CNoAliasDumper)
+    CNoAliasDumper.add_representer(Text, yaml.SafeDumper.represent_str)
+else:  # pragma: no cover - PyYAML built without libyaml
+    CNoAliasDumper = None
+
+
+def _plain(obj: Any) -> Any:
+    # Model objects are expanded one level at a time, as for YAML
+    to_dict = getattr(obj, "to_dict", None)
+    if to_dict is None:
+        raise TypeError(f"Object of type {type(obj).__name__} is not serializable")
+    return to_dict(deep=False)
+
+
+# ensure_ascii would escape emoji as surrogate pairs, which YAML 1.1 parsers
+# such as PyYAML do not combine
+_json_encode = json.JSONEncoder(ensure_ascii=False, default=_plain).encode
+
+
+class FragmentCache:
+    """Encoded top-level list items (views) reused between dashboards.
+
+    Items are matched by identity, so only objects that are actually shared
+    between the dashboards are reused; they are kept alive by the cache.
+    """
+
+    def __init__(self) -> None:
+        self._texts: Dict[Tuple[str, int], Tuple[Any, str]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, backend: str, item: Any, encode: Callable[[Any], str]) -> str:
+        """Return *item* encoded by *encode*, reusing an earlier result."""
+        key = (backend, id(item))
+        entry = self._texts.get(key)
+        if entry is not None and entry[0] is item:
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        text = encode(item)
+        self._texts[key] = (item, text)
+        return text
+
+    def discard(self, items: Any) -> None:
+        """Forget the encodings of *items*, e.g. after they were changed."""
+        ids = {id(item) for item in items}
+        self._texts = {k: v for k, v in self._texts.items() if k[1] not in ids}
+
+
+# Keys written verbatim when a mapping is emitted piecewise
+_PLAIN_KEY = re.compile(r"[A-Za-z_][A-Za-z0-9_]*\Z")
+
+
+def _dump_yaml(dumper: type) -> Callable[..., None]:
+    def encode(data: Any) -> str:
+        return yaml.dump(data, Dumper=dumper, sort_keys=False)
+
+    def dump(data: Any, stream: TextIO, fragments: Optional[FragmentCache] = None) -> None:
+        if fragments is None or type(data) is not dict:
+            yaml.dump(data, stream, Dumper=dumper, sort_keys=False)
+            return
+        # Block sequences of a top-level mapping are not indented, so every
+        # item encodes exactly as the one-item sequence [item] does
+        name = dumper.__name__
+        for key, value in data.items():
+            plain = type(key) is str and _PLAIN_KEY.match(key)
+            if type(value) is list and value and plain:
+                stream.write(f"{key}:\n")
+                for item in value:
+                    stream.write(fragments.get(name, item, lambda i: encode([i])))
+            else:
+                stream.write(encode({key: value}))
+
+    return dump
+
+
+def _dump_json(
+    data: Any, stream: TextIO, fragments: Optional[FragmentCache] = None
+) -> None:
+    """Write *data* as JSON, one top-level list item per line.
+
+    Each item is encoded in one call of the C encoder and written right
+    away; ``json.dump`` would fall back to the much slower pure-Python
+    encoder to produce its chunks.
+    """
+    write = stream.write
+    if type(data) is not dict:
+        write(_json_encode(data))
+        write("\n")
+        return
+    write("{")
+    for index, (key, value) in enumerate(data.items()):
+        if index:
+            write(",\n")
+        write(_json_encode(str(key)))
+        write(": ")
+        if type(value) is list and value:
+            write("[\n")
+            for pos, item in enumerate(value):
+                if pos:
+                    write(",\n")
+                if fragments is not None:
+                    write(fragments.get("json", item, _json_encode))
+                else:
+                    write(_json_encode(item))
+            write("\n]")
+        else:
+            write(_json_encode(value))
+    write("}\n")
+
+
+_DUMPERS: Dict[str, Callable[..., None]] = {
+    "python": _dump_yaml(NoAliasDumper),
+    "json": _dump_json,
+}
+if CNoAliasDumper is not None:
+    _DUMPERS["libyaml"] = _dump_yaml(CNoAliasDumper)
+
+
+def resolve_backend(name: str = "auto") -> str:
+    """Return the backend used for the ``serializer`` option *name*."""
+    if name == "auto":
+        return "libyaml" if "libyaml" in _DUMPERS else "python"
+    if name not in _DUMPERS:
+        if name not in BACKENDS:
+            raise ValueError(f"Unknown serializer: {name}")
+        logger.warning("Serializer %s is not available; using the Python emitter", name)
+        return "python"
+    return name
+
+
+def dump(
+    data: Any,
+    stream: TextIO,
+    backend: str = "auto",
+    fragments: Optional[FragmentCache] = None,
+) -> None:
+    """Write the dashboard *data* to the text *stream*.
+
+    With *fragments* the items of top-level lists are encoded one by one
+    and reused when the same object was encoded before; the output is the
+    same as without it.
+    """
+    _DUMPERS[resolve_backend(backend)](data, stream, fragments)
+
+
+def dumps(
+    data: Any, backend: str = "auto", fragments: Optional[FragmentCache] = None
+) -> str:
+    """Return the dashboard *data* serialised by *backend*."""
+    buf = io.StringIO()
+    dump(data, buf, backend, fragments)
+    return buf.getvalue()
@@ -0,0 +1,285 @@
+"""Point-in-time view of the Home Assistant data used for generation."""
+
+from __future__ import annotations
+
+import copy
+import gzip
+import json
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import cached_property
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+import requests
+from requests.adapters import HTTPAdapter
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import (
+    area_registry as ar,
+    device_registry as dr,
+    entity_registry as er,
+)
+
+from .fingerprint import atomic_write_bytes, registry_digest
+from .streaming import stream_states
+
+logger = logging.getLogger(__name__)
+
+STATES_PATH = "/api/states"
+REGISTRY_PATHS = ("/api/areas", "/api/devices", "/api/entities")
+LOVELACE_PATH = "/api/lovelace"
+# Version of the recorded snapshot file format
+SNAPSHOT_FORMAT = 1
+
+
+def resolve_area_id(
+    entity_area_id: Optional[str],
+    device_id: Optional[str],
+    device_areas: Dict[str, Optional[str]],
+) -> Optional[str]:
+    """Return the effective area of an entity.
+
+    As in Home Assistant, an area set on the entity registry entry overrides
+    the area of the entity's device.
+    """
+    if entity_area_id is not None:
+        return entity_area_id
+    return device_areas.get(device_id)
+
+
+@dataclass
+class HassSnapshot:
+    """Home Assistant data captured once per generation.
+
+    ``entities`` keeps the order of the state machine so discovery output is
+    stable.  The registry dictionaries mirror the area, device and entity
+    registries: area names by area ID, the area of each device and the device
+    of each entity.  ``entity_own_areas`` holds the areas set on entity
+    registry entries themselves, which override the area of their device.
+    ``lovelace`` holds the Lovelace config when it was
+    fetched along with the rest.  ``states`` holds the state of each entity
+    for conditions, so worker threads never read the state machine.
+    """
+
+    entities: List[str] = field(default_factory=list)
+    areas: Dict[Optional[str], str] = field(default_factory=dict)
+    device_areas: Dict[str, Optional[str]] = field(default_factory=dict)
+    entity_devices: Dict[str, Optional[str]] = field(default_factory=dict)
+    entity_own_areas: Dict[str, Optional[str]] = field(default_factory=dict)
+    # Entity to area ID mapping; derived from the registries when not given
+    entity_area_ids: Optional[Dict[str, Optional[str]]] = None
+    # Raw Lovelace config, when it was fetched together with the snapshot
+    lovelace: Optional[Dict[str, Any]] = None
+    states: Dict[str, Optional[str]] = field(default_factory=dict)
+
+    @cached_property
+    def known(self) -> Set[str]:
+        """Return the set of known entity IDs."""
+        return set(self.entities)
+
+    @cached_property
+    def digest(self) -> str:
+        """Return a digest of the entities and their area assignment."""
+        return registry_digest(self.entities, self.entity_areas())
+
+    def area_id(self, entity_id: str) -> Optional[str]:
+        """Return the area ID of *entity_id* or ``None``."""
+        if self.entity_area_ids is None:
+            self.entity_area_ids = {
+                entity: resolve_area_id(
+                    self.entity_own_areas.get(entity), device_id, self.device_areas
+                )
+                for entity, device_id in self.entity_devices.items()
+            }
+        return self.entity_area_ids.get(entity_id)
+
+    def entity_areas(self) -> Dict[str, Optional[str]]:
+        """Return a mapping of entity IDs to the name of their area."""
+        return {
+            entity_id: self.areas.get(self.area_id(entity_id))
+            for entity_id in self.entity_devices
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the snapshot as JSON-serialisable data."""
+        data: Dict[str, Any] = {
+            "format": SNAPSHOT_FORMAT,
+            "entities": self.entities,
+            "areas": self.areas,
+            "device_areas": self.device_areas,
+            "entity_devices": self.entity_devices,
+        }
+        if self.entity_own_areas:
+            data["entity_own_areas"] = self.entity_own_areas
+        if self.entity_area_ids is not None:
+            data["entity_area_ids"] = self.entity_area_ids
+        if self.lovelace is not None:
+            data["lovelace"] = self.lovelace
+        if self.states:
+            data["states"] = self.states
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "HassSnapshot":
+        """Return a snapshot from data produced by :meth:`to_dict`."""
+        if data.get("format", SNAPSHOT_FORMAT) > SNAPSHOT_FORMAT:
+            raise ValueError(f"Unsupported snapshot format {data['format']}")
+        return cls(
+            entities=list(data.get("entities", [])),
+            areas=dict(data.get("areas", {})),
+            device_areas=dict(data.get("device_areas", {})),
+            entity_devices=dict(data.get("entity_devices", {})),
+            entity_own_areas=dict(data.get("entity_own_areas", {})),
+            entity_area_ids=data.get("entity_area_ids"),
+            lovelace=data.get("lovelace"),
+            states=dict(data.get("states", {})),
+        )
+
+    @classmethod
+    def async_capture(cls, hass: HomeAssistant) -> "HassSnapshot":
+        """Capture states and registries; must run in the event loop."""
+        area_reg = ar.async_get(hass)
+        device_reg = dr.async_get(hass)
+        entity_reg = er.async_get(hass)
+        entries = entity_reg.entities.values()
+        states = {state.entity_id: state.state for state in hass.states.async_all()}
+        return cls(
+            entities=list(states),
+            areas={area.id: area.name for area in area_reg.async_list_areas()},
+            device_areas={
+                device.id: device.area_id for device in device_reg.devices.values()
+            },
+            entity_devices={ent.entity_id: ent.device_id for ent in entries},
+            entity_own_areas={
+                ent.entity_id: ent.area_id
+                for ent in entries
+                if getattr(ent, "area_id", None) is not None
+            },
+            states=states,
+        )
+
+    def with_states(self, states: Dict[str, Optional[str]]) -> "HassSnapshot":
+        """Return a copy holding *states*; everything else is shared.
+
+        Cached values such as :attr:`digest` carry over, so refreshing the
+        states of a cached snapshot does not recompute them.
+        """
+        snapshot = copy.copy(self)
+        snapshot.states = states
+        return snapshot
+
+    @classmethod
+    def fetch(
+        cls,
+        hass_url: str,
+        token: str,
+        registries: bool = True,
+        lovelace: bool = False,
+        session: Optional[requests.Session] = None,
+    ) -> "HassSnapshot":
+        """Fetch a snapshot over the REST API.
+
+        The states, the registries and optionally the Lovelace config are
+        requested concurrently, through *session* when given.  ``/api/states``
+        errors propagate; registry lookups that fail leave the corresponding
+        mapping empty so discovery falls back to a single room.
+        """
+        base = hass_url.rstrip("/")
+        http = session or requests
+        headers = {"Authorization": f"Bearer {token}"}
+
+        def _get(path: str) -> Any:
+            if path == STATES_PATH:
+                return _get_entities(http, f"{base}{path}", headers)
+            resp = http.get(f"{base}{path}", headers=headers, timeout=10)
+            resp.raise_for_status()
+            return resp.json()
+
+        paths = [STATES_PATH]
+        if registries:
+            paths.extend(REGISTRY_PATHS)
+        if lovelace:
+            paths.append(LOVELACE_PATH)
+        with ThreadPoolExecutor(max_workers=len(paths)) as pool:
+            results = {path: pool.submit(_get, path) for path in paths}
+
+        states = results[STATES_PATH].result()
+        snapshot = cls(entities=list(states), states=states)
+        if registries:
+            snapshot._apply_registries(results)
+        if lovelace:
+            try:
+                snapshot.lovelace = results[LOVELACE_PATH].result()
+            except Exception as err:
+                logger.error("Failed to load Lovelace config: %s", err)
+        return snapshot
+
+    def _apply_registries(self, results: Dict[str, "Future[Any]"]) -> None:
+        try:
+            for area in results["/api/areas"].result():
+                area_id = area.get("area_id") or area.get("id")
+                self.areas[area_id] = area.get("name") or "Area"
+        except Exception:
+            logger.info("Area lookup failed, falling back to single room")
+
+        try:
+            for dev in results["/api/devices"].result():
+                dev_id = dev.get("id") or dev.get("device_id")
+                self.device_areas[dev_id] = dev.get("area_id")
+        except Exception:
+            pass
+
+        try:
+            for ent in results["/api/entities"].result():
+                entity_id = ent.get("entity_id")
+                self.entity_devices[entity_id] = ent.get("device_id")
+                if ent.get("area_id") is not None:
+                    self.entity_own_areas[entity_id] = ent["area_id"]
+        except Exception:
+            pass
+
+
+def _get_entities(
+    http: Any, url: str, headers: Dict[str, str]
+) -> Dict[str, Optional[str]]:
+    """Return the state of each entity of ``/api/states``, in order.
+
+    The response is parsed while it streams in, so only one state object is
+    decoded at a time however large the attributes are.
+    """
+    with http.get(url, headers=headers, timeout=10, stream=True) as resp:
+        resp.raise_for_status()
+        return {record.entity_id: record.state for record in stream_states(resp)}
+
+
+def save_snapshot(snapshot: HassSnapshot, path: Path) -> None:
+    """Write *snapshot* to *path* as gzip-compressed compact JSON."""
+    raw = json.dumps(snapshot.to_dict(), separators=(",", ":")).encode()
+    atomic_write_bytes(path, gzip.compress(raw, mtime=0))
+
+
+def load_snapshot(path: Path) -> HassSnapshot:
+    """Read a snapshot written by :func:`save_snapshot`.
+
+    Plain, uncompressed JSON in the same layout is accepted as well so
+    snapshots can be assembled by hand from an export.
+    """
+    raw = path.read_bytes()
+    if raw[:2] == b"\x1f\x8b":
+        raw = gzip.decompress(raw)
+    return HassSnapshot.from_dict(json.loads(raw))
+
+
+def create_session(token: Optional[str], pool_size: int = 8) -> requests.Session:
+    """Return a keep-alive HTTP session for talking to Home Assistant."""
+    session = requests.Session()
+    session.headers.update(
+        {"Accept": "application/json", "Accept-Encoding": "gzip, deflate"}
+    )
+    if token:
+        session.headers["Authorization"] = f"Bearer {token}"
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
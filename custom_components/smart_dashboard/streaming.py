@@ -0,0 +1,129 @@
+"""Incremental parsing of large JSON arrays such as ``/api/states``."""
+
+from __future__ import annotations
+
+import codecs
+import json
+from typing import Any, Iterable, Iterator, NamedTuple, Optional, Tuple
+
+# Attributes kept on compact state records; everything else is dropped as
+# soon as an entity has been decoded.
+STATE_ATTRIBUTES = ("friendly_name", "device_class", "unit_of_measurement", "icon")
+
+_WHITESPACE = " \t\n\r"
+_DELIMITERS = _WHITESPACE + ",]"
+_DECODER = json.JSONDecoder()
+
+
+class StateRecord(NamedTuple):
+    """The parts of a Home Assistant state object used by the generator."""
+
+    entity_id: str
+    state: Optional[str]
+    attributes: dict
+
+
+def iter_json_array(chunks: Iterable[bytes]) -> Iterator[Any]:
+    """Yield the elements of a JSON array read from byte *chunks*.
+
+    Only the element being decoded and the unread remainder of the current
+    chunk are held in memory, never the whole document.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    buf = ""
+    pos = 0
+    started = False
+    chunks = iter(chunks)
+    exhausted = False
+
+    def _more(want: int = 1) -> bool:
+        """Read at least *want* more characters; ``False`` at end of input."""
+        nonlocal buf, pos, exhausted
+        if exhausted:
+            return False
+        parts = [buf[pos:]]
+        got = 0
+        for chunk in chunks:
+            text = decoder.decode(chunk)
+            parts.append(text)
+            got += len(text)
+            if got >= want:
+                break
+        else:
+            parts.append(decoder.decode(b"", final=True))
+            exhausted = True
+        buf = "".join(parts)
+        pos = 0
+        return got > 0 or not exhausted
+
+    while True:
+        while pos < len(buf) and buf[pos] in _WHITESPACE:
+            pos += 1
+        if pos >= len(buf):
+            if not _more():
+                raise ValueError("unexpected end of JSON array")
+            continue
+        char = buf[pos]
+        if not started:
+            if char != "[":
+                raise ValueError("expected a JSON array")
+            started = True
+            pos += 1
+            continue
+        if char == "]":
+            return
+        if char == ",":
+            pos += 1
+            continue
+        try:
+            item, end = _DECODER.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            # The element continues in a later chunk; grow the pending text
+            # geometrically so large elements are not re-parsed per chunk
+            if not _more(len(buf) - pos):
+                raise
+            continue
+        if (
+            isinstance(item, (int, float))
+            and not exhausted
+            and (end == len(buf) or buf[end] not in _DELIMITERS)
+        ):
+            # A number cut by a chunk boundary (e.g. "2." of "2.5") decodes
+            # as a shorter number; retry once the following text is read
+            if _more():
+                continue
+        pos = end
+        yield item
+
+
+def compact_state(
+    item: dict, attributes: Tuple[str, ...] = STATE_ATTRIBUTES
+) -> Optional[StateRecord]:
+    """Return a :class:`StateRecord` for the state object *item*."""
+    entity_id = item.get("entity_id")
+    if not entity_id:
+        return None
+    attrs = item.get("attributes") or {}
+    return StateRecord(
+        entity_id,
+        item.get("state"),
+        {key: attrs[key] for key in attributes if key in attrs},
+    )
+
+
+def iter_states(
+    chunks: Iterable[bytes], attributes: Tuple[str, ...] = STATE_ATTRIBUTES
+) -> Iterator[StateRecord]:
+    """Yield compact records from a streamed ``/api/states`` body."""
+    for item in iter_json_array(chunks):
+        if isinstance(item, dict):
+            record = compact_state(item, attributes)
+            if record is not None:
+                yield record
+
+
+def stream_states(resp: Any, chunk_size: int = 65536) -> Iterator[StateRecord]:
+    """Yield compact records from a ``requests`` response opened with
+    ``stream=True``; content encodings such as gzip are decoded on the fly.
+    """
+    return iter_states(resp.iter_content(chunk_size))
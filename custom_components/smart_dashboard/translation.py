@@ -1,34 +1,209 @@
 from __future__ import annotations
 
-import asyncio
 import json
 import logging
+import threading
 from pathlib import Path
-from typing import Dict
+from typing import Any, Callable, Dict, Iterator, List, Tuple
 
 logger = logging.getLogger(__name__)
 
+TRANSLATIONS_DIR = Path(__file__).parent / "translations"
+
+# Flat ``key -> string`` catalog per language.  Nested sections such as the
+# config flow strings are not used by the generator and are skipped.
 _TRANSLATIONS: Dict[str, Dict[str, str]] = {}
+# Pre-bound ``str.format`` callables for strings containing placeholders
+# (e.g. ``device_count``) so formatting does not re-resolve the template.
+_FORMATTERS: Dict[str, Dict[str, Callable[..., str]]] = {}
+_LOCK = threading.Lock()
+_PRELOADED = False
 
+# Prefix of the pseudo language for a build shared by several languages:
+# translate() returns Text slots that a Localizer later fills in per language
+SLOT_LANG = "*"
 
-async def load_translations(lang: str) -> Dict[str, str]:
-    """Return translation dictionary for *lang* using a background thread."""
-    if lang not in _TRANSLATIONS:
-        trans_path = Path(__file__).parent / "translations" / f"{lang}.json"
-        if not trans_path.exists():
-            _TRANSLATIONS[lang] = {}
+
+def slot_lang(lang: str) -> str:
+    """Return the pseudo language of a shared build whose primary is *lang*."""
+    return SLOT_LANG + lang
+
+
+def _read_catalog(path: Path) -> Dict[str, str]:
+    """Return the flat string entries of the translation file at *path*."""
+    try:
+        with path.open(encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception:
+        logger.warning("Failed to load translations from %s", path)
+        return {}
+    return {k: v for k, v in data.items() if isinstance(v, str)}
+
+
+def _store(lang: str, catalog: Dict[str, str]) -> None:
+    """Publish *catalog* for *lang*; callers must hold ``_LOCK``."""
+    _FORMATTERS[lang] = {k: v.format for k, v in catalog.items() if "{" in v}
+    _TRANSLATIONS[lang] = catalog
+
+
+def preload_translations(directory: Path | None = None) -> None:
+    """Load every ``translations/*.json`` file into the catalog.
+
+    Meant to be called once at integration or CLI startup so that lookups
+    during generation never touch the filesystem.
+    """
+    global _PRELOADED
+    directory = directory or TRANSLATIONS_DIR
+    catalogs = {
+        path.stem: _read_catalog(path) for path in sorted(directory.glob("*.json"))
+    }
+    with _LOCK:
+        for lang, catalog in catalogs.items():
+            _store(lang, catalog)
+        _PRELOADED = True
+
+
+def translations_preloaded() -> bool:
+    """Return ``True`` once :func:`preload_translations` has run."""
+    return _PRELOADED
+
+
+def get_translations(lang: str) -> Dict[str, str]:
+    """Return the translation catalog for *lang*, loading it if needed."""
+    catalog = _TRANSLATIONS.get(lang)
+    if catalog is not None:
+        return catalog
+    with _LOCK:
+        catalog = _TRANSLATIONS.get(lang)
+        if catalog is None:
+            path = TRANSLATIONS_DIR / f"{lang}.json"
+            catalog = _read_catalog(path) if path.exists() else {}
+            _store(lang, catalog)
+    return catalog
+
+
+class Text(str):
+    """Translatable string slot that :func:`translate` returns for slots.
+
+    Until it is localised it reads as its string in the primary language of
+    the build, so values derived from it, such as view paths, are the same
+    in every language and match a build of the primary language alone.
+    """
+
+    key: str
+    default: str
+    kwargs: Dict[str, Any]
+
+    def __new__(
+        cls, key: str, default: str, kwargs: Dict[str, Any], lang: str
+    ) -> "Text":
+        text = super().__new__(cls, translate(key, lang, default, **kwargs))
+        text.key = key
+        text.default = default
+        text.kwargs = kwargs
+        return text
+
+    def __repr__(self) -> str:
+        # Keeps slots apart from plain strings in repr-based cache keys
+        return f"Text({self.key!r}, {str(self)!r})"
+
+    def localize(self, lang: str) -> str:
+        return translate(self.key, lang, self.default, **self.kwargs)
+
+
+def _slots(value: Any) -> Iterator[Tuple[Any, Any, Text]]:
+    """Yield ``(container, key, text)`` for every :class:`Text` in *value*."""
+    stack = [value]
+    seen = set()
+    while stack:
+        node = stack.pop()
+        if id(node) in seen:
+            continue
+        seen.add(id(node))
+        if type(node) is dict:
+            items = node.items()
+        elif type(node) is list:
+            items = enumerate(node)
         else:
-            def _read() -> Dict[str, str]:
-                with trans_path.open() as f:
-                    return json.load(f)
-            try:
-                _TRANSLATIONS[lang] = await asyncio.to_thread(_read)
-            except Exception:
-                _TRANSLATIONS[lang] = {}
-    return _TRANSLATIONS.get(lang, {})
+            continue
+        for key, item in items:
+            if isinstance(item, Text):
+                yield node, key, item
+            elif type(item) in (dict, list):
+                stack.append(item)
+
+
+class Localizer:
+    """Fill in the :class:`Text` slots of structures built for :func:`slot_lang`.
+
+    The slots are located once; :meth:`apply` then only replaces those
+    values, in place, so one structure can be serialised in every language
+    without being rebuilt or walked again.  ``localized`` lists the items of
+    top-level lists (the views of a dashboard) that contain slots; all
+    other items read the same in every language.
+    """
+
+    def __init__(self, *roots: Any) -> None:
+        self._slots: List[Tuple[Any, Any, Text]] = []
+        self.localized: List[Any] = []
+        for root in roots:
+            if type(root) is not dict:
+                self._slots.extend(_slots(root))
+                continue
+            for key, value in root.items():
+                if isinstance(value, Text):
+                    self._slots.append((root, key, value))
+                    continue
+                if type(value) is not list:
+                    self._slots.extend(_slots(value))
+                    continue
+                for index, item in enumerate(value):
+                    if isinstance(item, Text):
+                        self._slots.append((value, index, item))
+                        continue
+                    found = list(_slots(item))
+                    if found:
+                        self.localized.append(item)
+                        self._slots.extend(found)
+        # Views shared between dashboards are found once per dashboard
+        unique = {(id(slot[0]), slot[1]): slot for slot in self._slots}
+        self._slots = list(unique.values())
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def apply(self, lang: str) -> None:
+        """Set every slot to its string in *lang*."""
+        for container, key, text in self._slots:
+            container[key] = text.localize(lang)
+
+
+def translate(key: str, lang: str, default: str, **kwargs: Any) -> str:
+    """Return translated string for ``key`` or ``default`` if missing.
+
+    When keyword arguments are given the string is formatted with them using
+    the pre-bound formatter of the catalog entry.  For a :func:`slot_lang`
+    pseudo language a :class:`Text` slot is returned instead.
+    """
+    if lang[:1] == SLOT_LANG:
+        return Text(key, default, kwargs, lang[1:])
+    catalog = get_translations(lang)
+    if not kwargs:
+        return catalog.get(key, default)
+    formatter = _FORMATTERS[lang].get(key) if key in catalog else None
+    if formatter is None:
+        return catalog.get(key, default).format(**kwargs)
+    return formatter(**kwargs)
+
+
+async def load_translations(lang: str) -> Dict[str, str]:
+    """Return translation dictionary for *lang*."""
+    return get_translations(lang)
 
 
 async def t(key: str, lang: str, default: str) -> str:
-    """Return translated string for ``key`` or ``default`` if missing."""
-    translations = await load_translations(lang)
-    return translations.get(key, default)
+    """Return translated string for ``key`` or ``default`` if missing.
+
+    Kept for backwards compatibility; new code should call :func:`translate`.
+    """
+    return translate(key, lang, default)
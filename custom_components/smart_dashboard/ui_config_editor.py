@@ -8,13 +8,14 @@ from pathlib import Path
 from typing import Any, Dict
 import yaml
 
-from .schema import CONFIG_SCHEMA
+from .schema import validate_config
+from .serializers import load_yaml
 
 
 def load_config(path: Path) -> Dict[str, Any]:
     with path.open() as f:
-        data = yaml.safe_load(f) or {}
-    return CONFIG_SCHEMA(data)
+        data = load_yaml(f) or {}
+    return validate_config(data)
 
 
 def save_config(path: Path, data: Dict[str, Any]) -> None:
@@ -0,0 +1,160 @@
+"""Per-user dashboard variants built from one shared pass.
+
+Discovery, plugins, entity filtering, deduplication and tile building do
+not depend on who looks at the dashboard, so they run once for all users.
+Only the room, sidebar and global conditions are evaluated per user; users
+for whom every condition has the same result share one variant, which is
+rendered once.  Language variants of an output are named by
+:func:`language_path`.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Sequence, Set, Tuple
+
+from .conditions import evaluate
+from .pipeline import RoomPipeline, RoomPlan
+
+
+def _with_cards(room: Any, cards: List[Any]) -> Any:
+    if isinstance(room, dict):
+        return {**room, "cards": cards}
+    return replace(room, cards=cards)
+
+
+def variant_slug(user: str) -> str:
+    """Return *user* as a file name component."""
+    slug = "".join(c.lower() if c.isalnum() else "_" for c in user)
+    return "_".join(part for part in slug.split("_") if part)
+
+
+def variant_slugs(users: Sequence[str]) -> Dict[str, str]:
+    """Return a distinct :func:`variant_slug` for each of *users*.
+
+    Names that slugify alike, such as "Bob" and "bob", get a numeric suffix
+    in the order given (``bob``, ``bob_2``), and names without letters or
+    digits become ``user``, so no variant overwrites another.
+    """
+    slugs: Dict[str, str] = {}
+    taken: Set[str] = set()
+    for user in users:
+        if user in slugs:
+            continue
+        base = variant_slug(user) or "user"
+        slug = base
+        suffix = 2
+        while slug in taken:
+            slug = f"{base}_{suffix}"
+            suffix += 1
+        taken.add(slug)
+        slugs[user] = slug
+    return slugs
+
+
+def variant_path(output_path: Path, user: str) -> Path:
+    """Return the output path of *user*, e.g. ``smart_dashboard_alice.yaml``.
+
+    Pass the slug from :func:`variant_slugs` when several users are written.
+    """
+    return output_path.with_name(
+        f"{output_path.stem}_{variant_slug(user)}{output_path.suffix}"
+    )
+
+
+def language_path(output_path: Path, lang: str) -> Path:
+    """Return the output path in *lang*, e.g. ``smart_dashboard.ru.yaml``."""
+    return output_path.with_name(f"{output_path.stem}.{lang}{output_path.suffix}")
+
+
+@dataclass
+class Variant:
+    """The rooms and sidebar shown to a group of users."""
+
+    config: Dict[str, Any]
+    plans: List[RoomPlan]
+    keys: List[Any] = field(default_factory=list)
+
+
+class VariantBuilder:
+    """Select the visible rooms and sidebar items of each user.
+
+    *config* and *plans* are the result of the shared pass; with
+    *across_rooms* the plans must not be deduplicated across rooms yet,
+    since which card is shown first depends on the rooms a user sees.
+    Neither is modified.
+    """
+
+    def __init__(
+        self,
+        config: Dict[str, Any],
+        plans: List[RoomPlan],
+        global_conditions: Sequence[str] = (),
+        across_rooms: bool = False,
+    ) -> None:
+        self._config = config
+        self._plans = plans
+        self._global = list(global_conditions)
+        self._across = across_rooms
+        exprs = list(self._global)
+        for plan in plans:
+            exprs.extend(plan.room.get("conditions") or [])
+        for item in config.get("sidebar", []):
+            if item.get("condition") is not None:
+                exprs.append(item["condition"])
+        # Each distinct expression is evaluated once per user
+        self._exprs = list(dict.fromkeys(exprs))
+        self._variants: Dict[Tuple[bool, ...], Variant] = {}
+        self.stats = {"users": 0, "variants": 0, "evaluations": 0}
+
+    @property
+    def variants(self) -> List[Variant]:
+        return list(self._variants.values())
+
+    def add(self, key: Any, ctx: Mapping[str, Any]) -> Variant:
+        """Return the variant seen with the condition context *ctx*.
+
+        *key* (e.g. an output path) is recorded on the variant.
+        """
+        results = tuple(evaluate(expr, ctx) for expr in self._exprs)
+        self.stats["users"] += 1
+        self.stats["evaluations"] += len(results)
+        variant = self._variants.get(results)
+        if variant is None:
+            variant = self._build(dict(zip(self._exprs, results)))
+            self._variants[results] = variant
+            self.stats["variants"] += 1
+        variant.keys.append(key)
+        return variant
+
+    def _build(self, passed: Dict[str, bool]) -> Variant:
+        config = dict(self._config)
+        if not all(passed[expr] for expr in self._global):
+            plans: List[RoomPlan] = []
+            sidebar: List[Dict[str, Any]] = []
+        else:
+            plans = [
+                plan
+                for plan in self._plans
+                if all(passed[expr] for expr in plan.room.get("conditions") or [])
+            ]
+            sidebar = [
+                {k: v for k, v in item.items() if k != "condition"}
+                for item in self._config.get("sidebar", [])
+                if item.get("condition") is None or passed[item["condition"]]
+            ]
+        if self._across:
+            dedup = RoomPipeline(across_rooms=True)
+            seen: set = set()
+            deduplicated = []
+            for plan in plans:
+                new = dedup.process(plan.room, seen)
+                # The shared room keeps the cards other variants still show
+                new.room = _with_cards(plan.room, new.cards)
+                deduplicated.append(new)
+            plans = deduplicated
+        config["rooms"] = [plan.room for plan in plans]
+        if "sidebar" in self._config:
+            config["sidebar"] = sidebar
+        return Variant(config, plans)
@@ -0,0 +1,232 @@
+"""Minimal Home Assistant WebSocket API client used outside Home Assistant."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+try:  # pragma: no cover - aiohttp ships with Home Assistant
+    import aiohttp
+except ImportError:  # pragma: no cover - environment without aiohttp
+    aiohttp = None
+
+from .snapshot import HassSnapshot
+
+logger = logging.getLogger(__name__)
+
+REGISTRY_COMMANDS = (
+    "config/area_registry/list",
+    "config/device_registry/list",
+    "config/entity_registry/list",
+)
+STATES_COMMAND = "get_states"
+LOVELACE_COMMAND = "lovelace/config"
+
+
+class WebSocketError(Exception):
+    """Raised when the WebSocket API rejects authentication or a command."""
+
+
+def websocket_url(hass_url: str) -> str:
+    """Return the WebSocket API URL for the HTTP base URL *hass_url*."""
+    base = hass_url.rstrip("/")
+    if base.startswith("https://"):
+        base = "wss://" + base[len("https://"):]
+    elif base.startswith("http://"):
+        base = "ws://" + base[len("http://"):]
+    return f"{base}/api/websocket"
+
+
+class HassWebSocketClient:
+    """Authenticated WebSocket connection with id-multiplexed commands.
+
+    Commands are written without waiting for earlier replies; a single
+    reader task resolves the future of each command by its message id, so
+    any number of requests share one round-trip window.  Use as an async
+    context manager.
+    """
+
+    def __init__(self, hass_url: str, token: str, timeout: float = 10) -> None:
+        if aiohttp is None:
+            raise WebSocketError("aiohttp is not installed")
+        self._url = websocket_url(hass_url)
+        self._token = token
+        self._timeout = timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._ws: Optional[aiohttp.ClientWebSocketResponse] = None
+        self._reader: Optional[asyncio.Task] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._next_id = 1
+
+    async def __aenter__(self) -> "HassWebSocketClient":
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.close()
+
+    async def connect(self) -> None:
+        """Open the connection and authenticate."""
+        self._session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=self._timeout)
+        )
+        try:
+            self._ws = await self._session.ws_connect(self._url, max_msg_size=0)
+            msg = await self._ws.receive_json()
+            if msg.get("type") != "auth_required":
+                raise WebSocketError(f"unexpected handshake message: {msg}")
+            await self._ws.send_json({"type": "auth", "access_token": self._token})
+            msg = await self._ws.receive_json()
+            if msg.get("type") != "auth_ok":
+                raise WebSocketError(msg.get("message") or "authentication failed")
+        except BaseException:
+            await self.close()
+            raise
+        self._reader = asyncio.create_task(self._read())
+
+    async def close(self) -> None:
+        """Close the connection and fail outstanding commands."""
+        if self._reader is not None:
+            self._reader.cancel()
+            try:
+                await self._reader
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._reader = None
+        if self._ws is not None:
+            await self._ws.close()
+            self._ws = None
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        self._fail_pending(WebSocketError("connection closed"))
+
+    async def _read(self) -> None:
+        try:
+            async for msg in self._ws:
+                if msg.type != aiohttp.WSMsgType.TEXT:
+                    break
+                data = msg.json()
+                # Home Assistant may coalesce several messages into a list
+                for item in data if isinstance(data, list) else (data,):
+                    future = self._pending.pop(item.get("id"), None)
+                    if future is None or future.done():
+                        continue
+                    if item.get("success", True):
+                        future.set_result(item.get("result"))
+                    else:
+                        error = item.get("error") or {}
+                        future.set_exception(
+                            WebSocketError(error.get("message") or error.get("code"))
+                        )
+        finally:
+            self._fail_pending(WebSocketError("connection closed"))
+
+    def _fail_pending(self, err: Exception) -> None:
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(err)
+        self._pending.clear()
+
+    async def send_command(self, command: str, **kwargs: Any) -> "asyncio.Future":
+        """Send *command* and return a future resolving to its result."""
+        if self._ws is None:
+            raise WebSocketError("not connected")
+        msg_id = self._next_id
+        self._next_id += 1
+        future = asyncio.get_running_loop().create_future()
+        self._pending[msg_id] = future
+        await self._ws.send_json({"id": msg_id, "type": command, **kwargs})
+        return future
+
+    async def command(self, command: str, **kwargs: Any) -> Any:
+        """Send *command* and wait for its result."""
+        return await (await self.send_command(command, **kwargs))
+
+
+def _snapshot_from_results(
+    states: List[Dict[str, Any]], registries: List[Any]
+) -> HassSnapshot:
+    """Build a snapshot from ``get_states`` and registry list results."""
+    values = {s["entity_id"]: s.get("state") for s in states if s.get("entity_id")}
+    snapshot = HassSnapshot(entities=list(values), states=values)
+    areas, devices, entities = registries
+    if isinstance(areas, Exception):
+        logger.info("Area lookup failed, falling back to single room")
+    else:
+        for area in areas:
+            snapshot.areas[area.get("area_id")] = area.get("name") or "Area"
+    if not isinstance(devices, Exception):
+        for dev in devices:
+            snapshot.device_areas[dev.get("id")] = dev.get("area_id")
+    if not isinstance(entities, Exception):
+        for ent in entities:
+            entity_id = ent.get("entity_id")
+            snapshot.entity_devices[entity_id] = ent.get("device_id")
+            if ent.get("area_id") is not None:
+                snapshot.entity_own_areas[entity_id] = ent["area_id"]
+    return snapshot
+
+
+async def async_fetch_snapshot(
+    hass_url: str,
+    token: str,
+    registries: bool = True,
+    lovelace: bool = False,
+    timeout: float = 10,
+) -> HassSnapshot:
+    """Fetch states, registries and optionally Lovelace over one connection.
+
+    All commands are pipelined after a single authentication.  Failing
+    registry or Lovelace commands are logged and leave that part empty, as
+    with the REST fallback; a failing ``get_states`` propagates.
+    """
+    commands = [STATES_COMMAND]
+    if registries:
+        commands.extend(REGISTRY_COMMANDS)
+    if lovelace:
+        commands.append(LOVELACE_COMMAND)
+    async with HassWebSocketClient(hass_url, token, timeout) as client:
+        futures = [await client.send_command(cmd) for cmd in commands]
+        results = dict(
+            zip(commands, await asyncio.gather(*futures, return_exceptions=True))
+        )
+    states = results[STATES_COMMAND]
+    if isinstance(states, Exception):
+        raise states
+    snapshot = _snapshot_from_results(
+        states, [results.get(cmd, []) for cmd in REGISTRY_COMMANDS]
+    )
+    if lovelace:
+        data = results[LOVELACE_COMMAND]
+        if isinstance(data, Exception):
+            logger.error("Failed to load Lovelace config: %s", data)
+        else:
+            snapshot.lovelace = data
+    return snapshot
+
+
+def fetch_snapshot(
+    hass_url: str,
+    token: str,
+    registries: bool = True,
+    lovelace: bool = False,
+    session: Any = None,
+) -> HassSnapshot:
+    """Fetch a snapshot, preferring the WebSocket API over REST.
+
+    The WebSocket API is used when registries are requested and ``aiohttp``
+    is available; any failure there falls back to
+    :meth:`HassSnapshot.fetch` with the given requests *session*.
+    """
+    if registries and aiohttp is not None:
+        try:
+            return asyncio.run(
+                async_fetch_snapshot(hass_url, token, registries, lovelace)
+            )
+        except Exception as err:
+            logger.info("WebSocket API unavailable (%s); using REST", err)
+    return HassSnapshot.fetch(
+        hass_url, token, registries=registries, lovelace=lovelace, session=session
+    )
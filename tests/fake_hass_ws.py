@@ -0,0 +1,147 @@
+"""Stand-in for the Home Assistant WebSocket API used by tests and benchmarks.
+
+The server runs its own event loop in a background thread so it can be used
+from synchronous code that calls ``asyncio.run`` itself.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+from aiohttp import WSMsgType, web
+
+
+class FakeHassWebSocket:
+    """Answer ``/api/websocket`` commands from a canned ``responses`` dict.
+
+    Every reply is delayed by *latency* seconds without blocking the
+    connection, like a real server handling commands concurrently.
+    ``commands`` records the received commands and ``max_in_flight`` the
+    largest number of commands awaiting a reply at the same time.
+    """
+
+    def __init__(
+        self,
+        responses: Dict[str, Any],
+        token: str = "abc",
+        latency: float = 0.0,
+        fail: Iterable[str] = (),
+    ) -> None:
+        self.responses = responses
+        self.token = token
+        self.latency = latency
+        self.fail = set(fail)
+        self.commands: List[str] = []
+        self.connections = 0
+        self.max_in_flight = 0
+        self._in_flight = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._runner: Optional[web.AppRunner] = None
+        self._thread: Optional[threading.Thread] = None
+        self.url = ""
+
+    def __enter__(self) -> "FakeHassWebSocket":
+        self.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def _run() -> None:
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(self._start())
+            ready.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=_run, daemon=True)
+        self._thread.start()
+        ready.wait()
+
+    def stop(self) -> None:
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    async def _start(self) -> None:
+        app = web.Application()
+        app.router.add_get("/api/websocket", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}"
+
+    async def _handle(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.connections += 1
+        await ws.send_json({"type": "auth_required"})
+        auth = await ws.receive_json()
+        if auth.get("access_token") != self.token:
+            await ws.send_json({"type": "auth_invalid", "message": "Invalid access token"})
+            await ws.close()
+            return ws
+        await ws.send_json({"type": "auth_ok"})
+
+        tasks = set()
+        async for msg in ws:
+            if msg.type != WSMsgType.TEXT:
+                break
+            data = msg.json()
+            self.commands.append(data["type"])
+            self._in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self._in_flight)
+            task = asyncio.ensure_future(self._reply(ws, data))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        return ws
+
+    async def _reply(self, ws: web.WebSocketResponse, data: Dict[str, Any]) -> None:
+        await asyncio.sleep(self.latency)
+        self._in_flight -= 1
+        command = data["type"]
+        if command in self.fail or command not in self.responses:
+            reply = {
+                "id": data["id"],
+                "type": "result",
+                "success": False,
+                "error": {"code": "unknown_command", "message": command},
+            }
+        else:
+            reply = {
+                "id": data["id"],
+                "type": "result",
+                "success": True,
+                "result": self.responses[command],
+            }
+        if not ws.closed:
+            await ws.send_json(reply)
+
+
+def sample_responses() -> Dict[str, Any]:
+    """Return a small home with one entity assigned to an area directly."""
+    return {
+        "get_states": [
+            {"entity_id": "light.a", "state": "on"},
+            {"entity_id": "light.b", "state": "off"},
+            {"entity_id": "sensor.c", "state": "1"},
+        ],
+        "config/area_registry/list": [
+            {"area_id": "kitchen", "name": "Kitchen"},
+            {"area_id": "hall", "name": "Hall"},
+        ],
+        "config/device_registry/list": [{"id": "dev1", "area_id": "kitchen"}],
+        "config/entity_registry/list": [
+            {"entity_id": "light.a", "device_id": "dev1", "area_id": None},
+            {"entity_id": "light.b", "device_id": "dev1", "area_id": "hall"},
+        ],
+        "lovelace/config": {"views": [{"title": "Imported", "cards": []}]},
+    }
@@ -0,0 +1,184 @@
+import asyncio
+import sys
+import threading
+import types
+from pathlib import Path
+
+import pytest
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+dummy = types.ModuleType("dummy")
+sys.modules.setdefault("homeassistant", dummy)
+core_mod = types.ModuleType("core")
+core_mod.HomeAssistant = object
+sys.modules.setdefault("homeassistant.core", core_mod)
+sys.modules.setdefault("homeassistant.helpers", types.ModuleType("helpers"))
+helpers_mod = sys.modules["homeassistant.helpers"]
+helpers_mod.area_registry = types.ModuleType("area_registry")
+helpers_mod.device_registry = types.ModuleType("device_registry")
+helpers_mod.entity_registry = types.ModuleType("entity_registry")
+sys.modules.setdefault("homeassistant.helpers.area_registry", helpers_mod.area_registry)
+sys.modules.setdefault("homeassistant.helpers.device_registry", helpers_mod.device_registry)
+sys.modules.setdefault("homeassistant.helpers.entity_registry", helpers_mod.entity_registry)
+sys.modules.setdefault("homeassistant.config_entries", types.ModuleType("config_entries"))
+sys.modules["homeassistant.config_entries"].ConfigEntry = object
+
+from custom_components.smart_dashboard import snapshot as snapshot_mod
+from custom_components.smart_dashboard.generator import (
+    async_generate_dashboard,
+    generate_dashboard,
+)
+from custom_components.smart_dashboard.snapshot import HassSnapshot
+from custom_components.smart_dashboard.variants import language_path
+
+
+class FakeHass:
+    def __init__(self, entities, values=None):
+        self.threads = []
+        self.values = values or {}
+        self.hops = 0
+        self.states = types.SimpleNamespace(async_all=self._all_states)
+        self._entities = entities
+
+    def _all_states(self):
+        self.threads.append(threading.current_thread())
+        return [
+            types.SimpleNamespace(entity_id=e, state=self.values.get(e, "on"))
+            for e in self._entities
+        ]
+
+    async def async_add_executor_job(self, func, *args):
+        self.hops += 1
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+
+def _registries(monkeypatch, hass):
+    def getter(value):
+        def async_get(h):
+            hass.threads.append(threading.current_thread())
+            return value
+        return async_get
+
+    area = types.SimpleNamespace(id="living", name="Living Room")
+    monkeypatch.setattr(
+        snapshot_mod.ar,
+        "async_get",
+        getter(types.SimpleNamespace(async_list_areas=lambda: [area])),
+        raising=False,
+    )
+    monkeypatch.setattr(
+        snapshot_mod.dr,
+        "async_get",
+        getter(types.SimpleNamespace(
+            devices={"d1": types.SimpleNamespace(id="d1", area_id="living")}
+        )),
+        raising=False,
+    )
+    monkeypatch.setattr(
+        snapshot_mod.er,
+        "async_get",
+        getter(types.SimpleNamespace(
+            entities={"light.a": types.SimpleNamespace(entity_id="light.a", device_id="d1")}
+        )),
+        raising=False,
+    )
+
+
+def test_async_generate_dashboard(monkeypatch, tmp_path):
+    config_path = tmp_path / "cfg.yaml"
+    config_path.write_text(yaml.safe_dump({"auto_discover": True}))
+    output = tmp_path / "out.yaml"
+    hass = FakeHass(["light.a", "sensor.t"])
+    _registries(monkeypatch, hass)
+
+    async def scenario():
+        loop_thread = threading.current_thread()
+        result = await async_generate_dashboard(hass, config_path, output)
+        return loop_thread, result
+
+    loop_thread, result = asyncio.run(scenario())
+    assert result.written
+    # Registries and states are only touched on the event loop thread
+    assert hass.threads and all(t is loop_thread for t in hass.threads)
+    assert hass.hops == 1
+    dashboard = yaml.safe_load(output.read_text())
+    titles = [view["title"] for view in dashboard["views"]]
+    assert "Living Room" in titles and "Auto Detected" in titles
+
+
+def test_async_generate_dashboard_languages(monkeypatch, tmp_path):
+    config_path = tmp_path / "cfg.yaml"
+    config_path.write_text(yaml.safe_dump({"auto_discover": True}))
+    output = tmp_path / "out.yaml"
+    hass = FakeHass(["light.a"])
+    _registries(monkeypatch, hass)
+
+    result = asyncio.run(
+        async_generate_dashboard(hass, config_path, output, languages=["ru"])
+    )
+    assert result.written
+    assert language_path(output, "ru").exists()
+
+
+def test_generate_dashboard_rejects_hass_and_snapshot(tmp_path):
+    with pytest.raises(TypeError):
+        generate_dashboard(
+            tmp_path / "cfg.yaml",
+            tmp_path / "out.yaml",
+            hass=FakeHass([]),
+            snapshot=HassSnapshot(),
+        )
+
+
+def test_async_generate_creates_files_in_executor(monkeypatch, tmp_path):
+    default = tmp_path / "example.yaml"
+    default.write_text(yaml.safe_dump({"auto_discover": True}))
+    config_path = tmp_path / "cfg.yaml"
+    output = tmp_path / "dashboards" / "out.yaml"
+    hass = FakeHass(["light.a"])
+    _registries(monkeypatch, hass)
+
+    result = asyncio.run(
+        async_generate_dashboard(hass, config_path, output, default_config=default)
+    )
+    assert result.written
+    assert config_path.read_text() == default.read_text()
+    assert hass.hops == 1
+
+
+def test_condition_states_are_captured_on_the_loop(monkeypatch, tmp_path):
+    config_path = tmp_path / "cfg.yaml"
+    config_path.write_text(yaml.safe_dump({
+        "rooms": [{
+            "name": "Guest",
+            "cards": [{"type": "light", "entity": "light.a"}],
+            "conditions": ["states['input_boolean.guest'] == 'on'"],
+        }],
+    }))
+    output = tmp_path / "out.yaml"
+    hass = FakeHass(["light.a", "input_boolean.guest"], {"input_boolean.guest": "off"})
+    _registries(monkeypatch, hass)
+    cached = HassSnapshot.async_capture(hass)
+
+    async def generate():
+        return await async_generate_dashboard(
+            hass, config_path, output, snapshot=cached
+        )
+
+    async def scenario():
+        loop_thread = threading.current_thread()
+        first = await generate()
+        hidden = yaml.safe_load(output.read_text())
+        hass.values["input_boolean.guest"] = "on"
+        return loop_thread, first, hidden, await generate()
+
+    loop_thread, first, hidden, second = asyncio.run(scenario())
+    # The cached snapshot gets fresh states and is itself left untouched
+    assert cached.states["input_boolean.guest"] == "off"
+    assert second.fingerprint != first.fingerprint
+    titles = [view.get("title") for view in yaml.safe_load(output.read_text())["views"]]
+    assert "Guest" in titles
+    assert "Guest" not in [view.get("title") for view in hidden["views"]]
+    assert all(t is loop_thread for t in hass.threads)
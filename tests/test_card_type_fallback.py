@@ -1,3 +1,4 @@
+import json
 import sys
 import types
 from pathlib import Path
@@ -30,6 +31,12 @@ class FakeResp:
         pass
     def json(self):
         return self._data
+    def iter_content(self, chunk_size=1):
+        return [json.dumps(self.json()).encode()]
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc):
+        pass
 
 
 def test_unknown_types_use_entity(monkeypatch):
@@ -38,7 +45,7 @@ def test_unknown_types_use_entity(monkeypatch):
         {"entity_id": "device_tracker.b"},
     ]
 
-    def fake_get(url, headers=None, timeout=10):
+    def fake_get(url, headers=None, timeout=10, stream=False):
         if url.endswith('/api/states'):
             return FakeResp(states)
         elif url.endswith('/api/areas'):
@@ -0,0 +1,138 @@
+import gzip
+import json
+import sys
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import types
+
+dummy = types.ModuleType("dummy")
+sys.modules.setdefault("homeassistant", dummy)
+core_mod = types.ModuleType("core")
+core_mod.HomeAssistant = object
+sys.modules.setdefault("homeassistant.core", core_mod)
+sys.modules.setdefault("homeassistant.helpers", types.ModuleType("helpers"))
+helpers_mod = sys.modules["homeassistant.helpers"]
+helpers_mod.area_registry = types.ModuleType("area_registry")
+helpers_mod.device_registry = types.ModuleType("device_registry")
+helpers_mod.entity_registry = types.ModuleType("entity_registry")
+sys.modules.setdefault("homeassistant.helpers.area_registry", helpers_mod.area_registry)
+sys.modules.setdefault("homeassistant.helpers.device_registry", helpers_mod.device_registry)
+sys.modules.setdefault("homeassistant.helpers.entity_registry", helpers_mod.entity_registry)
+sys.modules.setdefault("homeassistant.config_entries", types.ModuleType("config_entries"))
+sys.modules["homeassistant.config_entries"].ConfigEntry = object
+
+from custom_components.smart_dashboard import generator
+from custom_components.smart_dashboard.plugins import PluginContext, run_plugins
+from custom_components.smart_dashboard.plugins import lovelace_cards_loader
+from custom_components.smart_dashboard.snapshot import HassSnapshot, create_session
+
+RESPONSES = {
+    "/api/states": [{"entity_id": "light.a"}, {"entity_id": "light.b"}],
+    "/api/areas": [{"area_id": "kitchen", "name": "Kitchen"}],
+    "/api/devices": [{"id": "dev1", "area_id": "kitchen"}],
+    "/api/entities": [{"entity_id": "light.a", "device_id": "dev1"}],
+    "/api/lovelace": {"views": [{"title": "Imported", "cards": [{"type": "light"}]}]},
+}
+
+
+@pytest.fixture
+def fake_hass():
+    """Serve canned REST responses and count requests per path."""
+    hits = Counter()
+    gzipped = Counter()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            hits[self.path] += 1
+            body = json.dumps(RESPONSES[self.path]).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            if "gzip" in self.headers.get("Accept-Encoding", ""):
+                gzipped[self.path] += 1
+                body = gzip.compress(body)
+                self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield url, hits, gzipped
+    server.shutdown()
+    server.server_close()
+
+
+def test_fetch_uses_session_once_per_endpoint(fake_hass):
+    url, hits, gzipped = fake_hass
+    with create_session("abc") as session:
+        snap = HassSnapshot.fetch(url, "abc", lovelace=True, session=session)
+    assert snap.entities == ["light.a", "light.b"]
+    assert snap.entity_areas() == {"light.a": "Kitchen"}
+    assert snap.lovelace["views"][0]["title"] == "Imported"
+    assert set(hits.values()) == {1}
+    assert set(gzipped) == set(RESPONSES)
+
+
+def test_loader_prefers_snapshot(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("unexpected request")
+
+    monkeypatch.setattr(lovelace_cards_loader.requests, "get", fail)
+    snap = HassSnapshot(lovelace=RESPONSES["/api/lovelace"])
+    cfg = {"load_lovelace_cards": True}
+    lovelace_cards_loader.process_config(cfg, PluginContext(snapshot=snap))
+    assert cfg["rooms"][0]["name"] == "Imported"
+
+
+def test_run_plugins_passes_context_when_accepted(monkeypatch):
+    from custom_components.smart_dashboard import plugins
+
+    seen = []
+    monkeypatch.setattr(
+        plugins,
+        "PLUGINS",
+        [lambda cfg: seen.append("legacy"), lambda cfg, ctx: seen.append(ctx)],
+    )
+    ctx = PluginContext(hass_url="http://x")
+    run_plugins({}, ctx)
+    assert seen == ["legacy", ctx]
+
+
+def test_cli_generation_fetches_each_endpoint_once(fake_hass, monkeypatch, tmp_path):
+    from custom_components.smart_dashboard import websocket_client
+
+    url, hits, _ = fake_hass
+    # Exercise the REST path; the WebSocket path has its own tests
+    monkeypatch.setattr(websocket_client, "aiohttp", None)
+    monkeypatch.setenv("HASS_URL", url)
+    monkeypatch.setenv("HASS_TOKEN", "abc")
+    config_path = tmp_path / "smart_dashboard.yaml"
+    config_path.write_text(
+        yaml.safe_dump({"auto_discover": True, "load_lovelace_cards": True})
+    )
+    output = tmp_path / "out.yaml"
+
+    first = generator.generate_dashboard(config_path, output)
+    assert first.written
+    titles = [v["title"] for v in yaml.safe_load(output.read_text())["views"]]
+    assert "Imported" in titles and "Kitchen" in titles
+    assert set(hits.values()) == {1}
+
+    # The prefetched Lovelace config is part of the fingerprint
+    second = generator.generate_dashboard(config_path, output)
+    assert second.skipped
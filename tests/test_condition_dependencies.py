@@ -0,0 +1,181 @@
+import asyncio
+import sys
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import types
+
+dummy = types.ModuleType("dummy")
+sys.modules.setdefault("homeassistant", dummy)
+core_mod = types.ModuleType("core")
+core_mod.HomeAssistant = object
+sys.modules.setdefault("homeassistant.core", core_mod)
+sys.modules.setdefault("homeassistant.helpers", types.ModuleType("helpers"))
+helpers_mod = sys.modules["homeassistant.helpers"]
+helpers_mod.area_registry = types.ModuleType("area_registry")
+helpers_mod.device_registry = types.ModuleType("device_registry")
+helpers_mod.entity_registry = types.ModuleType("entity_registry")
+sys.modules.setdefault("homeassistant.helpers.area_registry", helpers_mod.area_registry)
+sys.modules.setdefault("homeassistant.helpers.device_registry", helpers_mod.device_registry)
+sys.modules.setdefault("homeassistant.helpers.entity_registry", helpers_mod.entity_registry)
+sys.modules.setdefault("homeassistant.config_entries", types.ModuleType("config_entries"))
+sys.modules["homeassistant.config_entries"].ConfigEntry = object
+
+from custom_components.smart_dashboard import generator
+from custom_components.smart_dashboard.conditions import (
+    ConditionContext,
+    ConditionError,
+    StateValues,
+    compile_condition,
+    dependencies,
+    evaluate,
+)
+from custom_components.smart_dashboard.regeneration import ConditionWatcher
+from custom_components.smart_dashboard.snapshot import HassSnapshot
+
+NOW = datetime(2024, 3, 6, 21, 15, 30)  # a Wednesday
+
+
+def test_states_are_recorded_as_entities():
+    cond = compile_condition("states['sun.sun'] == 'below_horizon' and MODE == 'x'")
+    assert cond.entities == {"sun.sun"}
+    assert cond.names == {"MODE"}
+    ctx = ConditionContext(
+        {"MODE": "x"}, states=StateValues.from_mapping({"sun.sun": "below_horizon"})
+    )
+    assert cond(ctx)
+    assert not evaluate("states['light.missing'] == 'on'", ctx)
+
+
+@pytest.mark.parametrize("expr", ["states", "states[user]", "states['a'][0]", "env['a']"])
+def test_only_literal_state_lookups_allowed(expr):
+    with pytest.raises(ConditionError):
+        compile_condition(expr)
+
+
+def test_time_names():
+    ctx = ConditionContext(now=NOW)
+    assert evaluate("hour >= 21 and minute == 15", ctx)
+    assert evaluate("weekday == 2 and date == '2024-03-06'", ctx)
+    assert evaluate("'21:00' <= time < '23:00'", ctx)
+
+
+def test_next_change_uses_shortest_period():
+    assert dependencies(["user == 'a'"]).next_change(NOW) is None
+    assert dependencies(["weekday < 5"]).next_change(NOW) == datetime(2024, 3, 7)
+    deps = dependencies(["weekday < 5", "hour > 20"])
+    assert deps.period == "hour"
+    assert deps.next_change(NOW) == datetime(2024, 3, 6, 22)
+    assert dependencies(["time > '21:00'"]).next_change(NOW) == datetime(2024, 3, 6, 21, 16)
+
+
+def test_global_conditions_hide_everything():
+    cfg = {
+        "rooms": [{"name": "A", "cards": []}],
+        "sidebar": [{"name": "Home", "view": "overview"}],
+    }
+    ctx = ConditionContext(states=StateValues.from_mapping({"input_boolean.guest": "on"}))
+    generator.apply_conditions(cfg, ctx, ["states['input_boolean.guest'] == 'off'"])
+    assert cfg["rooms"] == [] and cfg["sidebar"] == []
+
+
+def _setup(monkeypatch, tmp_path, states):
+    cfg = {
+        "auto_discover": False,
+        "rooms": [
+            {"name": "Living", "cards": [{"type": "light", "entity": "light.a"}]},
+            {
+                "name": "Night",
+                "cards": [],
+                "conditions": ["states['sun.sun'] == 'below_horizon'"],
+            },
+        ],
+    }
+    config_path = tmp_path / "smart_dashboard.yaml"
+    config_path.write_text(yaml.safe_dump(cfg))
+    monkeypatch.setattr(
+        generator,
+        "_cli_snapshot",
+        lambda config, session=None: HassSnapshot(["light.a"], states=dict(states)),
+    )
+    return config_path, tmp_path / "out.yaml"
+
+
+def test_referenced_state_change_regenerates(monkeypatch, tmp_path):
+    states = {"light.a": "on", "sun.sun": "above_horizon"}
+    config_path, output = _setup(monkeypatch, tmp_path, states)
+    first = generator.generate_dashboard(config_path, output)
+    assert first.dependencies.entities == {"sun.sun"}
+    assert "path: night" not in output.read_text()
+
+    # Unreferenced states do not invalidate the output
+    states["light.a"] = "off"
+    assert generator.generate_dashboard(config_path, output).skipped
+
+    states["sun.sun"] = "below_horizon"
+    third = generator.generate_dashboard(config_path, output)
+    assert not third.skipped
+    assert "path: night" in output.read_text()
+
+
+class _Bus:
+    def __init__(self):
+        self.listeners = []
+
+    def async_listen(self, event_type, callback):
+        self.listeners.append(callback)
+        return lambda: self.listeners.remove(callback)
+
+    def fire(self, entity_id, old, new):
+        data = {
+            "entity_id": entity_id,
+            "old_state": SimpleNamespace(state=old),
+            "new_state": SimpleNamespace(state=new),
+        }
+        for callback in list(self.listeners):
+            callback(SimpleNamespace(data=data))
+
+
+def test_watcher_reports_referenced_state_changes():
+    async def run():
+        hass = SimpleNamespace(bus=_Bus())
+        reasons = []
+        watcher = ConditionWatcher(hass, reasons.append)
+        watcher.async_update(dependencies(["states['sun.sun'] == 'above_horizon'"]))
+        # Without the marker Home Assistant would run it in a worker thread
+        assert all(getattr(l, "_hass_callback", False) for l in hass.bus.listeners)
+        assert hass.bus.listeners
+        hass.bus.fire("light.a", "off", "on")
+        hass.bus.fire("sun.sun", "above_horizon", "above_horizon")
+        hass.bus.fire("sun.sun", "above_horizon", "below_horizon")
+        assert reasons == ["condition_state"]
+
+        watcher.async_update(dependencies(["user == 'a'"]))
+        assert hass.bus.listeners == []
+        watcher.async_stop()
+        return watcher.triggers
+
+    assert asyncio.run(run()) == 1
+
+
+def test_watcher_schedules_time_boundary(monkeypatch):
+    from custom_components.smart_dashboard import regeneration
+
+    almost_nine = datetime(2024, 1, 1, 8, 59, 59, 950000)
+    monkeypatch.setattr(regeneration, "current_time", lambda: almost_nine)
+
+    async def run():
+        reasons = []
+        watcher = ConditionWatcher(SimpleNamespace(bus=_Bus()), reasons.append)
+        watcher.async_update(dependencies(["hour >= 9"]))
+        await asyncio.sleep(0.2)
+        watcher.async_stop()
+        return reasons
+
+    assert asyncio.run(run())[:1] == ["condition_time"]
@@ -1,9 +1,18 @@
 import sys
 from pathlib import Path
 
+import pytest
+import yaml
+
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
-from custom_components.smart_dashboard.dashboard import apply_conditions
+from custom_components.smart_dashboard.conditions import (
+    ConditionContext,
+    ConditionError,
+    compile_condition,
+    evaluate,
+)
+from custom_components.smart_dashboard.dashboard import apply_conditions, load_config
 
 
 def _base_config():
@@ -33,3 +42,57 @@ def test_conditions_pass(monkeypatch):
     apply_conditions(cfg)
     assert {r["name"] for r in cfg["rooms"]} == {"Visible", "Hidden"}
     assert {s["name"] for s in cfg["sidebar"]} == {"Home", "Admin"}
+
+
+def test_conditions_support_in_and_boolean_ops(monkeypatch):
+    monkeypatch.setenv("DASHBOARD_USER", "bob")
+    monkeypatch.setenv("MODE", "away")
+    cfg = _base_config()
+    cfg["rooms"][1]["conditions"] = [
+        "user in ('alice', 'bob') and not MODE == 'home'",
+        "MODE != 'night' or user is None",
+    ]
+    apply_conditions(cfg)
+    assert [r["name"] for r in cfg["rooms"]] == ["Visible", "Hidden"]
+
+
+def test_undefined_name_is_false(monkeypatch):
+    monkeypatch.delenv("SD_UNDEFINED", raising=False)
+    cfg = _base_config()
+    cfg["rooms"][1]["conditions"] = ["SD_UNDEFINED == '1'"]
+    apply_conditions(cfg)
+    assert [r["name"] for r in cfg["rooms"]] == ["Visible"]
+
+
+@pytest.mark.parametrize(
+    "expr",
+    [
+        "().__class__.__bases__[0].__subclasses__()",
+        "__import__('os').system('true')",
+        "len(user) > 3",
+        "user[0] == 'a'",
+        "[x for x in user]",
+        "lambda: 1",
+        "user ==",
+    ],
+)
+def test_disallowed_expressions_are_rejected(expr):
+    with pytest.raises(ConditionError):
+        compile_condition(expr)
+
+
+def test_compiled_once_and_context_is_lazy(monkeypatch):
+    assert compile_condition("user == 'a'") is compile_condition("user == 'a'")
+    assert compile_condition("A == B and user").names == {"A", "B", "user"}
+    ctx = ConditionContext({"user": "fixed"})
+    monkeypatch.setenv("SD_LATE", "1")
+    assert evaluate("SD_LATE == '1' and user == 'fixed'", ctx)
+
+
+def test_invalid_condition_fails_config_load(tmp_path):
+    path = tmp_path / "cfg.yaml"
+    path.write_text(
+        yaml.safe_dump({"rooms": [{"name": "R", "conditions": ["open('x')"]}]})
+    )
+    with pytest.raises(ValueError, match="Call is not allowed"):
+        load_config(path)
@@ -0,0 +1,135 @@
+import os
+import sys
+import time
+from pathlib import Path
+
+import pytest
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import types
+
+dummy = types.ModuleType("dummy")
+sys.modules.setdefault("homeassistant", dummy)
+core_mod = types.ModuleType("core")
+core_mod.HomeAssistant = object
+sys.modules.setdefault("homeassistant.core", core_mod)
+sys.modules.setdefault("homeassistant.helpers", types.ModuleType("helpers"))
+helpers_mod = sys.modules["homeassistant.helpers"]
+helpers_mod.area_registry = types.ModuleType("area_registry")
+helpers_mod.device_registry = types.ModuleType("device_registry")
+helpers_mod.entity_registry = types.ModuleType("entity_registry")
+sys.modules.setdefault("homeassistant.helpers.area_registry", helpers_mod.area_registry)
+sys.modules.setdefault("homeassistant.helpers.device_registry", helpers_mod.device_registry)
+sys.modules.setdefault("homeassistant.helpers.entity_registry", helpers_mod.entity_registry)
+sys.modules.setdefault("homeassistant.config_entries", types.ModuleType("config_entries"))
+sys.modules["homeassistant.config_entries"].ConfigEntry = object
+
+from custom_components.smart_dashboard import config_cache
+from custom_components.smart_dashboard.config_cache import ConfigCache
+from custom_components.smart_dashboard.generator import _parse_config, load_config
+
+CONFIG = {"rooms": [{"name": "Living", "cards": [{"type": "light", "entity": "light.a"}]}]}
+
+
+def _counting_cache(**kwargs):
+    calls = []
+
+    def parse(data):
+        calls.append(data)
+        return _parse_config(data)
+
+    return ConfigCache(parse, **kwargs), calls
+
+
+def _write(path, data, age=10):
+    """Write *data* with an mtime *age* seconds in the past."""
+    path.write_text(yaml.safe_dump(data))
+    past = time.time() - age
+    os.utime(path, (past, past))
+
+
+def test_unchanged_file_is_parsed_once(tmp_path):
+    path = tmp_path / "cfg.yaml"
+    _write(path, CONFIG)
+    cache, calls = _counting_cache()
+    first = cache.load(path)
+    second = cache.load(path)
+    assert first == second
+    assert first["rooms"][0]["columns"] == 2
+    assert len(calls) == 1 and cache.hits == 1
+
+
+def test_returns_defensive_copies(tmp_path):
+    path = tmp_path / "cfg.yaml"
+    _write(path, CONFIG)
+    cache, _ = _counting_cache()
+    config = cache.load(path)
+    config["rooms"][0]["cards"].append({"type": "plugin"})
+    config["rooms"].clear()
+    assert cache.load(path)["rooms"][0]["cards"] == [
+        {"type": "light", "entity": "light.a"}
+    ]
+
+
+def test_change_is_detected(tmp_path):
+    path = tmp_path / "cfg.yaml"
+    _write(path, CONFIG)
+    cache, calls = _counting_cache()
+    cache.load(path)
+    changed = {"rooms": [{"name": "Office"}]}
+    _write(path, changed, age=5)
+    assert cache.load(path)["rooms"][0]["name"] == "Office"
+    # Touching without changing the content only re-hashes the file
+    os.utime(path)
+    cache.load(path)
+    assert len(calls) == 2
+
+
+def test_recent_writes_are_verified_by_hash(tmp_path):
+    path = tmp_path / "cfg.yaml"
+    path.write_text("rooms: [{name: aaaa}]\n")
+    cache, calls = _counting_cache()
+    cache.load(path)
+    st = os.stat(path)
+    # Same size and mtime, as a second write within one timestamp tick
+    path.write_text("rooms: [{name: bbbb}]\n")
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert cache.load(path)["rooms"][0]["name"] == "bbbb"
+    assert len(calls) == 2
+
+
+def test_invalid_config_is_not_cached(tmp_path):
+    path = tmp_path / "cfg.yaml"
+    _write(path, {"rooms": [{"name": 123}]})
+    cache, calls = _counting_cache()
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            cache.load(path)
+    assert len(calls) == 2
+
+
+def test_disk_cache_is_shared_between_instances(tmp_path, monkeypatch):
+    path = tmp_path / "cfg.yaml"
+    _write(path, CONFIG)
+    first, _ = _counting_cache(cache_dir=tmp_path / "cache")
+    expected = first.load(path)
+
+    second, calls = _counting_cache(cache_dir=tmp_path / "cache")
+    assert second.load(path) == expected
+    assert calls == []
+
+    # A different generator version ignores the stored entry
+    monkeypatch.setattr(config_cache, "code_digest", lambda: "other")
+    third, calls = _counting_cache(cache_dir=tmp_path / "cache")
+    assert third.load(path) == expected
+    assert len(calls) == 1
+
+
+def test_load_config_uses_cache(tmp_path):
+    path = tmp_path / "cfg.yaml"
+    _write(path, CONFIG)
+    config = load_config(path)
+    config["rooms"].clear()
+    assert load_config(path)["rooms"][0]["name"] == "Living"
@@ -0,0 +1,110 @@
+import asyncio
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import types
+
+dummy = types.ModuleType("dummy")
+sys.modules.setdefault("homeassistant", dummy)
+core_mod = types.ModuleType("core")
+core_mod.HomeAssistant = object
+sys.modules.setdefault("homeassistant.core", core_mod)
+sys.modules.setdefault("homeassistant.helpers", types.ModuleType("helpers"))
+helpers_mod = sys.modules["homeassistant.helpers"]
+helpers_mod.area_registry = types.ModuleType("area_registry")
+helpers_mod.device_registry = types.ModuleType("device_registry")
+helpers_mod.entity_registry = types.ModuleType("entity_registry")
+sys.modules.setdefault("homeassistant.helpers.area_registry", helpers_mod.area_registry)
+sys.modules.setdefault("homeassistant.helpers.device_registry", helpers_mod.device_registry)
+sys.modules.setdefault("homeassistant.helpers.entity_registry", helpers_mod.entity_registry)
+sys.modules.setdefault("homeassistant.config_entries", types.ModuleType("config_entries"))
+sys.modules["homeassistant.config_entries"].ConfigEntry = object
+
+from custom_components.smart_dashboard import generator
+from custom_components.smart_dashboard.snapshot import HassSnapshot
+from custom_components.smart_dashboard.coordinator import GenerationCoordinator
+from custom_components.smart_dashboard.generator import GenerationCancelled
+
+
+def _gated_runner():
+    state = {"active": 0, "max_active": 0, "runs": 0, "forced": []}
+    gate = asyncio.Event()
+
+    async def run(cancel, force):
+        state["active"] += 1
+        state["max_active"] = max(state["max_active"], state["active"])
+        state["forced"].append(force)
+        try:
+            await gate.wait()
+            if cancel.is_set():
+                raise GenerationCancelled("stale")
+            state["runs"] += 1
+            return state["runs"]
+        finally:
+            state["active"] -= 1
+
+    return run, gate, state
+
+
+def test_single_flight_and_coalescing():
+    async def scenario():
+        run, gate, state = _gated_runner()
+        coord = GenerationCoordinator(run)
+        first = coord.async_request()
+        await asyncio.sleep(0)
+        queued = [coord.async_request(force=i == 1) for i in range(3)]
+        assert len({id(f) for f in queued}) == 1
+        gate.set()
+        results = await asyncio.gather(first, *queued)
+        return coord, state, results
+
+    coord, state, results = asyncio.run(scenario())
+    assert results == [1, 2, 2, 2]
+    assert state["max_active"] == 1
+    assert state["forced"] == [False, True]
+    assert coord.stats == {"requests": 4, "runs": 2, "coalesced": 2, "cancelled": 0}
+
+
+def test_stale_run_cancelled():
+    async def scenario():
+        run, gate, state = _gated_runner()
+        coord = GenerationCoordinator(run)
+        first = coord.async_request()
+        await asyncio.sleep(0)
+        second = coord.async_request(cancel_running=True)
+        gate.set()
+        return coord, await asyncio.gather(first, second)
+
+    coord, results = asyncio.run(scenario())
+    # The cancelled run's callers receive the fresh run's result
+    assert results == [1, 1]
+    assert coord.stats["cancelled"] == 1
+
+
+def test_generate_dashboard_cancelled_before_write(monkeypatch, tmp_path):
+    config_path = tmp_path / "cfg.yaml"
+    config_path.write_text(yaml.safe_dump({"auto_discover": False, "rooms": []}))
+    output = tmp_path / "out.yaml"
+    monkeypatch.setattr(
+        generator, "_cli_snapshot", lambda config, session=None: HassSnapshot(["light.a"])
+    )
+    cancel = threading.Event()
+    cancel.set()
+    with pytest.raises(GenerationCancelled):
+        generator.generate_dashboard(config_path, output, cancel=cancel)
+    assert not output.exists()
+
+    result = generator.generate_dashboard(config_path, output)
+    assert result.written
+    assert list(result.timings) == [
+        "config", "snapshot", "fingerprint", "discovery", "plugins", "model",
+        "rooms",
+        "render", "write",
+    ]
+    assert result.duration >= sum(result.timings.values()) * 0.99
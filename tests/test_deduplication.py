@@ -16,3 +16,45 @@ def test_remove_duplicate_cards():
     cards = cfg["rooms"][0]["cards"]
     assert len(cards) == 2
     assert {c["entity"] for c in cards} == {"light.l1", "light.l2"}
+
+
+def test_structural_keys_match_json_equality():
+    import json
+
+    from custom_components.smart_dashboard.card_hash import card_key
+
+    cards = [
+        {"type": "grid", "cards": [{"entity": "light.a", "n": 1}]},
+        {"cards": [{"n": 1, "entity": "light.a"}], "type": "grid"},
+        {"type": "grid", "cards": [{"entity": "light.a", "n": 1.0}]},
+        {"type": "grid", "cards": [{"entity": "light.a", "n": True}]},
+        {"type": "grid", "cards": [{"entity": "light.a", "n": "1"}]},
+    ]
+    for a in cards:
+        for b in cards:
+            same = json.dumps(a, sort_keys=True) == json.dumps(b, sort_keys=True)
+            assert (card_key(a) == card_key(b)) == same
+
+
+def test_dashboard_wide_dedup_keeps_first_room():
+    from custom_components.smart_dashboard.dashboard import deduplicate_across_rooms
+
+    cfg = {"rooms": [
+        {"name": "Kitchen", "cards": [{"type": "light", "entity": "light.l1"}]},
+        {"name": "Hidden", "hidden": True, "cards": [{"type": "light", "entity": "light.l2"}]},
+        {"name": "Auto", "cards": [
+            {"type": "vertical-stack", "cards": [
+                {"type": "custom:button-card", "entity": "light.l1"},
+                {"type": "custom:button-card", "entity": "light.l2"},
+            ]},
+            {"type": "vertical-stack", "cards": [
+                {"type": "custom:button-card", "entity": "light.l1"},
+            ]},
+            {"type": "markdown", "content": "kept"},
+        ]},
+    ]}
+    assert deduplicate_across_rooms(cfg) == 2
+    auto = cfg["rooms"][2]["cards"]
+    assert len(auto) == 2
+    assert [c["entity"] for c in auto[0]["cards"]] == ["light.l2"]
+    assert cfg["rooms"][1]["cards"] == [{"type": "light", "entity": "light.l2"}]
@@ -1,3 +1,4 @@
+import json
 import sys
 from pathlib import Path
 
@@ -12,6 +13,12 @@ class FakeResp:
         pass
     def json(self):
         return self._data
+    def iter_content(self, chunk_size=1):
+        return [json.dumps(self.json()).encode()]
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc):
+        pass
 
 
 def test_discover_devices_deduplicates(monkeypatch):
@@ -21,7 +28,7 @@ def test_discover_devices_deduplicates(monkeypatch):
         {"entity_id": "light.b"},
     ]
 
-    def fake_get(url, headers=None, timeout=10):
+    def fake_get(url, headers=None, timeout=10, stream=False):
         if url.endswith('/api/states'):
             return FakeResp(states)
         elif url.endswith('/api/areas'):
@@ -1,3 +1,4 @@
+import json
 import sys
 from pathlib import Path
 
@@ -10,6 +11,12 @@ class FakeResp:
         pass
     def json(self):
         return [{"entity_id": "light.x"}]
+    def iter_content(self, chunk_size=1):
+        return [json.dumps(self.json()).encode()]
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc):
+        pass
 
 def test_filter_entities(monkeypatch):
     cfg = {"rooms": [{"name": "Room", "cards": [
@@ -17,7 +24,7 @@ def test_filter_entities(monkeypatch):
         {"type": "light", "entity": "light.y"}
     ]}]}
 
-    def fake_get(url, headers=None, timeout=10):
+    def fake_get(url, headers=None, timeout=10, stream=False):
         assert url.endswith("/api/states")
         return FakeResp()
 
@@ -0,0 +1,132 @@
+import copy
+import random
+import sys
+from pathlib import Path
+
+import pytest
+import voluptuous as vol
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import types
+
+dummy = types.ModuleType("dummy")
+sys.modules.setdefault("homeassistant", dummy)
+core_mod = types.ModuleType("core")
+core_mod.HomeAssistant = object
+sys.modules.setdefault("homeassistant.core", core_mod)
+sys.modules.setdefault("homeassistant.helpers", types.ModuleType("helpers"))
+helpers_mod = sys.modules["homeassistant.helpers"]
+helpers_mod.area_registry = types.ModuleType("area_registry")
+helpers_mod.device_registry = types.ModuleType("device_registry")
+helpers_mod.entity_registry = types.ModuleType("entity_registry")
+sys.modules.setdefault("homeassistant.helpers.area_registry", helpers_mod.area_registry)
+sys.modules.setdefault("homeassistant.helpers.device_registry", helpers_mod.device_registry)
+sys.modules.setdefault("homeassistant.helpers.entity_registry", helpers_mod.entity_registry)
+sys.modules.setdefault("homeassistant.config_entries", types.ModuleType("config_entries"))
+sys.modules["homeassistant.config_entries"].ConfigEntry = object
+
+from custom_components.smart_dashboard import schema
+from custom_components.smart_dashboard.schema import CONFIG_SCHEMA, validate_config
+
+SCALARS = [None, True, False, 0, 1, -1, 3, 2.7, "", "2", "x", "3.5", "vertical", [], {}, ["a"]]
+
+
+def _value(rng, good):
+    return good() if rng.random() < 0.97 else rng.choice(SCALARS)
+
+
+def _card(rng):
+    if rng.random() < 0.05:
+        return rng.choice(SCALARS)
+    card = {}
+    if rng.random() < 0.95:
+        card["type"] = _value(rng, lambda: rng.choice(["light", "entities", "vertical-stack"]))
+    if rng.random() < 0.7:
+        card["entity"] = f"light.l{rng.randint(0, 9)}"
+    if rng.random() < 0.2:
+        card["cards"] = [_card(rng) for _ in range(rng.randint(0, 2))]
+    if rng.random() < 0.2:
+        card[rng.choice(["name", 7, True])] = {"nested": [1, 2]}
+    return card
+
+
+ROOM_FIELDS = {
+    "icon": lambda rng: "mdi:sofa",
+    "order": lambda rng: rng.choice([1, "4", 2.9, -3]),
+    "layout": lambda rng: rng.choice(["horizontal", "vertical"]),
+    "columns": lambda rng: rng.choice([1, 3, "2"]),
+    "overview_limit": lambda rng: rng.choice([0, 5, "1"]),
+    "cards": lambda rng: [_card(rng) for _ in range(rng.randint(0, 6))],
+    "conditions": lambda rng: rng.choice([["True", "user == 'a'"], ["user.upper()"]]),
+    "hidden": lambda rng: rng.choice([True, False]),
+    "custom": lambda rng: {"kept": True},
+}
+
+CONFIG_FIELDS = {
+    "auto_discover": lambda rng: rng.choice([True, False]),
+    "header": lambda rng: {"title": "Home", "show_time": True, "logo": "/x.png"},
+    "sidebar": lambda rng: [{"name": "Lights", "view": "lights", "condition": "True"}],
+    "layout": lambda rng: rng.choice([{}, {"strategy": "grid"}]),
+    "theme": lambda rng: rng.choice(["light", "dark", "auto"]),
+    "overview_limit": lambda rng: rng.choice([0, 4, "6"]),
+    "load_lovelace_cards": lambda rng: rng.choice([True, False]),
+    "deduplicate": lambda rng: rng.choice(["room", "dashboard"]),
+    "serializer": lambda rng: rng.choice(["auto", "json"]),
+    "resources": lambda rng: [{"url": "/a.js", "type": "module"}],
+}
+
+
+def _room(rng):
+    room = {}
+    if rng.random() < 0.95:
+        room["name"] = _value(rng, lambda: f"Room {rng.randint(0, 9)}")
+    keys = list(ROOM_FIELDS)
+    rng.shuffle(keys)
+    for key in keys[: rng.randint(0, len(keys))]:
+        room[key] = _value(rng, lambda: ROOM_FIELDS[key](rng))
+    return room
+
+
+def _config(rng):
+    config = {}
+    keys = list(CONFIG_FIELDS)
+    rng.shuffle(keys)
+    for key in keys[: rng.randint(0, len(keys))]:
+        config[key] = _value(rng, lambda: CONFIG_FIELDS[key](rng))
+    config["rooms"] = [_room(rng) for _ in range(rng.randint(0, 4))]
+    if rng.random() < 0.05:
+        config["unknown"] = 1
+    return config
+
+
+def _outcome(func, data):
+    try:
+        return "ok", repr(func(copy.deepcopy(data)))
+    except vol.Invalid as err:
+        return "invalid", str(err)
+
+
+@pytest.mark.parametrize("seed", range(300))
+def test_matches_voluptuous(seed):
+    config = _config(random.Random(seed))
+    assert _outcome(validate_config, config) == _outcome(CONFIG_SCHEMA, config)
+
+
+def test_common_configs_take_fast_path():
+    rng = random.Random(1)
+    config = {key: make(rng) for key, make in CONFIG_FIELDS.items()}
+    config["rooms"] = [
+        {"name": "Living", **{key: make(rng) for key, make in ROOM_FIELDS.items()}}
+    ]
+    config["rooms"][0]["cards"] = [{"type": "light", "entity": "light.a"}]
+    config["rooms"][0]["conditions"] = ["user == 'a'"]
+    assert repr(schema._fast_config(copy.deepcopy(config))) == repr(CONFIG_SCHEMA(config))
+
+
+def test_defaults_are_not_shared():
+    first = validate_config({"rooms": [{"name": "a"}, {"name": "b"}]})
+    second = validate_config({})
+    first["rooms"][0]["cards"].append({"type": "x"})
+    assert first["rooms"][1]["cards"] == []
+    assert second["rooms"] == [] and second["resources"] == []
@@ -0,0 +1,110 @@
+import shutil
+import sys
+from pathlib import Path
+
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import types
+
+dummy = types.ModuleType("dummy")
+sys.modules.setdefault("homeassistant", dummy)
+core_mod = types.ModuleType("core")
+core_mod.HomeAssistant = object
+sys.modules.setdefault("homeassistant.core", core_mod)
+sys.modules.setdefault("homeassistant.helpers", types.ModuleType("helpers"))
+helpers_mod = sys.modules["homeassistant.helpers"]
+helpers_mod.area_registry = types.ModuleType("area_registry")
+helpers_mod.device_registry = types.ModuleType("device_registry")
+helpers_mod.entity_registry = types.ModuleType("entity_registry")
+sys.modules.setdefault("homeassistant.helpers.area_registry", helpers_mod.area_registry)
+sys.modules.setdefault("homeassistant.helpers.device_registry", helpers_mod.device_registry)
+sys.modules.setdefault("homeassistant.helpers.entity_registry", helpers_mod.entity_registry)
+sys.modules.setdefault("homeassistant.config_entries", types.ModuleType("config_entries"))
+sys.modules["homeassistant.config_entries"].ConfigEntry = object
+
+from custom_components.smart_dashboard import fingerprint, generator
+from custom_components.smart_dashboard.snapshot import HassSnapshot
+from custom_components.smart_dashboard.fingerprint import (
+    fingerprint_path,
+    write_if_changed,
+)
+
+
+def _setup(monkeypatch, tmp_path):
+    cfg = {
+        "auto_discover": False,
+        "rooms": [{"name": "Living", "cards": [{"type": "light", "entity": "light.a"}]}],
+    }
+    config_path = tmp_path / "smart_dashboard.yaml"
+    config_path.write_text(yaml.safe_dump(cfg))
+    known = {"light.a"}
+    monkeypatch.setattr(
+        generator, "_cli_snapshot", lambda config, session=None: HassSnapshot(sorted(known))
+    )
+    return config_path, tmp_path / "out.yaml", known
+
+
+def test_unchanged_inputs_skip_generation(monkeypatch, tmp_path):
+    config_path, output, _ = _setup(monkeypatch, tmp_path)
+    first = generator.generate_dashboard(config_path, output)
+    assert first.written and not first.skipped
+    assert fingerprint_path(output).read_text() == first.fingerprint
+
+    calls = []
+    monkeypatch.setattr(generator, "build_dashboard", lambda *a: calls.append(a))
+    second = generator.generate_dashboard(config_path, output)
+    assert second.skipped and not second.written
+    assert calls == []
+
+
+def test_registry_change_invalidates(monkeypatch, tmp_path):
+    config_path, output, known = _setup(monkeypatch, tmp_path)
+    first = generator.generate_dashboard(config_path, output)
+    known.add("light.b")
+    second = generator.generate_dashboard(config_path, output)
+    assert not second.skipped
+    assert second.fingerprint != first.fingerprint
+
+
+def test_translation_change_invalidates(monkeypatch, tmp_path):
+    config_path, output, _ = _setup(monkeypatch, tmp_path)
+    package = tmp_path / "package"
+    shutil.copytree(
+        fingerprint.PACKAGE_DIR,
+        package,
+        ignore=shutil.ignore_patterns("__pycache__", "plugins"),
+    )
+    monkeypatch.setattr(fingerprint, "PACKAGE_DIR", package)
+    first = generator.generate_dashboard(config_path, output)
+    assert generator.generate_dashboard(config_path, output).skipped
+
+    en = package / "translations" / "en.json"
+    en.write_text(en.read_text().replace("{", '{"extra": "Extra",', 1))
+    second = generator.generate_dashboard(config_path, output)
+    assert not second.skipped
+    assert second.fingerprint != first.fingerprint
+
+
+def test_identical_render_not_rewritten(monkeypatch, tmp_path):
+    config_path, output, _ = _setup(monkeypatch, tmp_path)
+    generator.generate_dashboard(config_path, output)
+    mtime = output.stat().st_mtime_ns
+    # Comments change the config hash but not the rendered dashboard
+    config_path.write_text(config_path.read_text() + "# comment\n")
+    result = generator.generate_dashboard(config_path, output)
+    assert not result.skipped and not result.written
+    assert output.stat().st_mtime_ns == mtime
+
+    forced = generator.generate_dashboard(config_path, output, force=True)
+    assert not forced.skipped
+
+
+def test_write_if_changed(tmp_path):
+    path = tmp_path / "f.yaml"
+    assert write_if_changed(path, "a: 1\n")
+    assert not write_if_changed(path, "a: 1\n")
+    assert write_if_changed(path, "a: 2\n")
+    assert path.read_text() == "a: 2\n"
+    assert [p.name for p in tmp_path.iterdir()] == ["f.yaml"]
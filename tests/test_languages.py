@@ -0,0 +1,135 @@
+import sys
+from pathlib import Path
+
+import pytest
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import types
+
+dummy = types.ModuleType("dummy")
+sys.modules.setdefault("homeassistant", dummy)
+core_mod = types.ModuleType("core")
+core_mod.HomeAssistant = object
+sys.modules.setdefault("homeassistant.core", core_mod)
+sys.modules.setdefault("homeassistant.helpers", types.ModuleType("helpers"))
+helpers_mod = sys.modules["homeassistant.helpers"]
+helpers_mod.area_registry = types.ModuleType("area_registry")
+helpers_mod.device_registry = types.ModuleType("device_registry")
+helpers_mod.entity_registry = types.ModuleType("entity_registry")
+sys.modules.setdefault("homeassistant.helpers.area_registry", helpers_mod.area_registry)
+sys.modules.setdefault("homeassistant.helpers.device_registry", helpers_mod.device_registry)
+sys.modules.setdefault("homeassistant.helpers.entity_registry", helpers_mod.entity_registry)
+sys.modules.setdefault("homeassistant.config_entries", types.ModuleType("config_entries"))
+sys.modules["homeassistant.config_entries"].ConfigEntry = object
+
+from custom_components.smart_dashboard import generator
+from custom_components.smart_dashboard.snapshot import HassSnapshot
+from custom_components.smart_dashboard.translation import preload_translations
+from custom_components.smart_dashboard.variants import language_path, variant_path
+
+LANGUAGES = ["ru", "fr", "es", "xx"]
+
+
+def _write_config(tmp_path, **options):
+    cfg = {
+        "rooms": [
+            {"name": "Kitchen", "cards": [{"type": "light", "entity": "light.a"}]},
+            {"name": "Bob", "cards": [], "conditions": ["user == 'bob'"]},
+        ],
+        **options,
+    }
+    path = tmp_path / "smart_dashboard.yaml"
+    path.write_text(yaml.safe_dump(cfg))
+    return path
+
+
+def _without_slugs(value):
+    """Return *value* without the view slugs derived from the primary language."""
+    if isinstance(value, dict):
+        return {
+            k: _without_slugs(v)
+            for k, v in value.items()
+            if k not in ("path", "navigation_path", "view")
+        }
+    if isinstance(value, list):
+        return [_without_slugs(v) for v in value]
+    return value
+
+
+@pytest.mark.parametrize("auto_discover", [False, True])
+@pytest.mark.parametrize("users", [[], ["bob", "eve"]])
+def test_languages_match_separate_runs(monkeypatch, tmp_path, users, auto_discover):
+    preload_translations()
+    config_path = _write_config(tmp_path, auto_discover=auto_discover)
+    # light.b is not in any configured room and lands in a discovered one
+    snapshot = HassSnapshot(["light.a", "light.b"])
+    output = tmp_path / "out" / "smart_dashboard.yaml"
+    output.parent.mkdir()
+    monkeypatch.setenv("SHI_LANG", "bg")
+    monkeypatch.setenv("DASHBOARD_USER", "")
+    result = generator.generate_dashboard(
+        config_path, output, snapshot=snapshot, users=users, languages=LANGUAGES
+    )
+    assert result.written
+
+    for lang in ["bg", *LANGUAGES]:
+        monkeypatch.setenv("SHI_LANG", lang)
+        for user in ["", *users]:
+            monkeypatch.setenv("DASHBOARD_USER", user)
+            single = tmp_path / f"single_{lang}_{user}.yaml"
+            generator.generate_dashboard(config_path, single, snapshot=snapshot)
+            path = variant_path(output, user) if user else output
+            if lang == "bg":
+                # The primary output is exactly what a bg-only run writes
+                assert path.read_text() == single.read_text(), (lang, user)
+                continue
+            # Other languages keep the primary language's view slugs
+            path = language_path(path, lang)
+            combined = yaml.safe_load(path.read_text())
+            separate = yaml.safe_load(single.read_text())
+            assert combined["sidebar"]
+            assert _without_slugs(combined) == _without_slugs(separate), (lang, user)
+
+    monkeypatch.setenv("SHI_LANG", "bg")
+    monkeypatch.setenv("DASHBOARD_USER", "")
+    assert generator.generate_dashboard(
+        config_path, output, snapshot=snapshot, users=users, languages=LANGUAGES
+    ).skipped
+
+
+def test_primary_language_keeps_its_slugs(monkeypatch, tmp_path):
+    preload_translations()
+    config_path = _write_config(tmp_path, auto_discover=True)
+    snapshot = HassSnapshot(["light.b"])
+    monkeypatch.setenv("SHI_LANG", "ru")
+    monkeypatch.setenv("DASHBOARD_USER", "")
+    single = tmp_path / "single.yaml"
+    generator.generate_dashboard(config_path, single, snapshot=snapshot)
+    output = tmp_path / "smart_dashboard.yaml"
+    generator.generate_dashboard(
+        config_path, output, snapshot=snapshot, languages=["en"]
+    )
+    assert output.read_text() == single.read_text()
+    dashboard = yaml.safe_load(output.read_text())
+    assert "авто-обнаружение" in [v.get("path") for v in dashboard["views"]]
+    assert "авто-обнаружение" in [i.get("view") for i in dashboard["sidebar"]]
+
+
+def test_discovered_rooms_keep_one_path(monkeypatch, tmp_path):
+    preload_translations()
+    config_path = _write_config(tmp_path, auto_discover=True)
+    output = tmp_path / "smart_dashboard.yaml"
+    monkeypatch.setenv("SHI_LANG", "en")
+    generator.generate_dashboard(
+        config_path, output, snapshot=HassSnapshot(["light.b"]), languages=["ru"]
+    )
+    english = yaml.safe_load(output.read_text())
+    russian = yaml.safe_load(language_path(output, "ru").read_text())
+    assert english["views"][-1]["title"] == "Auto Detected"
+    assert russian["views"][-1]["title"] == "Авто обнаружение"
+    # View paths are structure and stay the same in every language
+    assert [v.get("path") for v in russian["views"]] == [
+        v.get("path") for v in english["views"]
+    ]
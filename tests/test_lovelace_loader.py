@@ -1,8 +1,34 @@
+import asyncio
+import json
+import os
 import sys
+import threading
 from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
+import types
+
+dummy = types.ModuleType("dummy")
+sys.modules.setdefault("homeassistant", dummy)
+core_mod = types.ModuleType("core")
+core_mod.HomeAssistant = object
+sys.modules.setdefault("homeassistant.core", core_mod)
+sys.modules.setdefault("homeassistant.helpers", types.ModuleType("helpers"))
+helpers_mod = sys.modules["homeassistant.helpers"]
+helpers_mod.area_registry = types.ModuleType("area_registry")
+helpers_mod.device_registry = types.ModuleType("device_registry")
+helpers_mod.entity_registry = types.ModuleType("entity_registry")
+sys.modules.setdefault("homeassistant.helpers.area_registry", helpers_mod.area_registry)
+sys.modules.setdefault("homeassistant.helpers.device_registry", helpers_mod.device_registry)
+sys.modules.setdefault("homeassistant.helpers.entity_registry", helpers_mod.entity_registry)
+sys.modules.setdefault("homeassistant.config_entries", types.ModuleType("config_entries"))
+sys.modules["homeassistant.config_entries"].ConfigEntry = object
+
+from custom_components.smart_dashboard.plugins import lovelace_cards_loader
 from custom_components.smart_dashboard.plugins.lovelace_cards_loader import process_config
 
 
@@ -30,3 +56,89 @@ def test_loader(monkeypatch):
     process_config(cfg)
     assert cfg["rooms"][0]["name"] == "API View"
     assert cfg["rooms"][0]["cards"][0]["type"] == "light"
+
+
+def _store(storage, key, title, age=10):
+    path = storage / key
+    config = {"views": [{"title": title, "cards": [{"type": "light"}]}]}
+    path.write_text(json.dumps({"version": 1, "key": key, "data": {"config": config}}))
+    old = path.stat().st_mtime_ns - age * 1_000_000_000
+    os.utime(path, ns=(old, old))
+    return path
+
+
+class _YamlDashboard:
+    mode = "yaml"
+    config = {"id": "yaml"}
+
+    def __init__(self):
+        self.loads = 0
+
+    async def async_load(self, force):
+        self.loads += 1
+        return {"views": [{"title": "From YAML"}]}
+
+
+@pytest.fixture
+def fake_hass(tmp_path):
+    storage = tmp_path / ".storage"
+    storage.mkdir()
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    dashboards = {
+        None: SimpleNamespace(mode="storage", config=None),
+        "dashboard-office": SimpleNamespace(mode="storage", config={"id": "office"}),
+        "dashboard-yaml": _YamlDashboard(),
+    }
+    hass = SimpleNamespace(
+        loop=loop,
+        data={"lovelace": SimpleNamespace(dashboards=dashboards)},
+        config=SimpleNamespace(path=lambda *parts: str(tmp_path.joinpath(*parts))),
+    )
+    yield hass, storage
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+def test_reads_dashboards_from_hass_storage(fake_hass, monkeypatch):
+    hass, storage = fake_hass
+    _store(storage, "lovelace", "Home")
+    _store(storage, "lovelace.office", "Office")
+
+    def fail(*args, **kwargs):
+        raise AssertionError("no HTTP inside Home Assistant")
+
+    monkeypatch.setattr(lovelace_cards_loader.requests, "get", fail)
+    lovelace_cards_loader._STORAGE_CACHE.clear()
+    context = SimpleNamespace(hass=hass, fetched=None)
+    cfg = {
+        "load_lovelace_cards": True,
+        "lovelace_dashboards": ["dashboard-yaml", "lovelace", "dashboard-office"],
+    }
+    process_config(cfg, context)
+    assert [r["name"] for r in cfg["rooms"]] == ["From YAML", "Home", "Office"]
+    assert [r["order"] for r in cfg["rooms"]] == [1, 2, 3]
+
+    # Unchanged storage files are not parsed again; changed ones are
+    hits, misses = lovelace_cards_loader.STATS.values()
+    _store(storage, "lovelace.office", "Office 2", age=5)
+    cfg = {
+        "load_lovelace_cards": True,
+        "lovelace_dashboards": ["lovelace", "dashboard-office"],
+    }
+    process_config(cfg, context)
+    assert [r["name"] for r in cfg["rooms"]] == ["Home", "Office 2"]
+    assert lovelace_cards_loader.STATS["hits"] == hits + 1
+    assert lovelace_cards_loader.STATS["misses"] == misses + 1
+    assert hass.data["lovelace"].dashboards["dashboard-yaml"].loads == 1
+
+
+def test_missing_dashboard_is_skipped(fake_hass, caplog):
+    hass, storage = fake_hass
+    _store(storage, "lovelace", "Home")
+    cfg = {"load_lovelace_cards": True, "lovelace_dashboards": ["nope", "lovelace"]}
+    process_config(cfg, SimpleNamespace(hass=hass, fetched=None))
+    assert [r["name"] for r in cfg["rooms"]] == ["Home"]
+    assert "Lovelace dashboard nope not found" in caplog.text
@@ -0,0 +1,113 @@
+import copy
+import json
+import sys
+from pathlib import Path
+
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import types
+
+dummy = types.ModuleType("dummy")
+sys.modules.setdefault("homeassistant", dummy)
+core_mod = types.ModuleType("core")
+core_mod.HomeAssistant = object
+sys.modules.setdefault("homeassistant.core", core_mod)
+sys.modules.setdefault("homeassistant.helpers", types.ModuleType("helpers"))
+helpers_mod = sys.modules["homeassistant.helpers"]
+helpers_mod.area_registry = types.ModuleType("area_registry")
+helpers_mod.device_registry = types.ModuleType("device_registry")
+helpers_mod.entity_registry = types.ModuleType("entity_registry")
+sys.modules.setdefault("homeassistant.helpers.area_registry", helpers_mod.area_registry)
+sys.modules.setdefault("homeassistant.helpers.device_registry", helpers_mod.device_registry)
+sys.modules.setdefault("homeassistant.helpers.entity_registry", helpers_mod.entity_registry)
+sys.modules.setdefault("homeassistant.config_entries", types.ModuleType("config_entries"))
+sys.modules["homeassistant.config_entries"].ConfigEntry = object
+
+from custom_components.smart_dashboard import generator
+from custom_components.smart_dashboard.card_hash import card_key
+from custom_components.smart_dashboard.dashboard import build_dashboard
+from custom_components.smart_dashboard.model import Card, Room, rooms_from_config, to_plain
+from custom_components.smart_dashboard.pipeline import RoomPipeline
+from custom_components.smart_dashboard.snapshot import HassSnapshot
+
+ROOMS = [
+    {
+        "name": "Living",
+        "icon": "mdi:sofa",
+        "cards": [
+            {"entity": "light.a", "type": "light", "name": "Lamp"},
+            {"type": "vertical-stack", "cards": [{"type": "sensor", "entity": "sensor.t"}, "raw"]},
+            {"type": "conditional", "card": {"type": "light", "entity": "light.b"}},
+            {"type": "markdown", "cards": "not a list"},
+        ],
+        "order": 2,
+        "columns": 3,
+    },
+    {"hidden": True, "name": "Hidden", "cards": [{"type": "light", "entity": "light.a"}]},
+]
+
+
+def _ordered(value):
+    """Return *value* as JSON keeping the key order."""
+    return json.dumps(value)
+
+
+def test_roundtrip_is_lossless():
+    rooms = rooms_from_config(copy.deepcopy(ROOMS))
+    assert _ordered([room.to_dict() for room in rooms]) == _ordered(ROOMS)
+    assert isinstance(rooms[0].cards[1].cards[0], Card)
+    assert rooms[0].get("columns") == 3
+    assert rooms[0].cards[3].get("cards") == "not a list"
+    assert rooms[1].get("icon", "x") == "x"
+
+
+def test_strings_are_interned():
+    a = Card.from_dict({"type": "li" + "ght", "entity": "light.a"})
+    b = Card.from_dict({"type": "".join(["l", "ight"]), "entity": "light.b"})
+    assert a.type is b.type
+    assert a.keys is b.keys
+    assert a.domain is b.domain
+
+
+def test_model_cards_hash_like_dicts():
+    card = ROOMS[0]["cards"][1]
+    assert card_key(Card.from_dict(card)) == card_key(copy.deepcopy(card))
+
+
+def test_model_dashboard_matches_dict_dashboard():
+    config = {"rooms": copy.deepcopy(ROOMS), "deduplicate": "dashboard"}
+    known = {"light.a", "light.b", "sensor.t"}
+
+    legacy = copy.deepcopy(config)
+    plans = RoomPipeline(known, deduplicate=True, across_rooms=True).run(legacy)
+    expected = build_dashboard(legacy, "en", plans)
+
+    model = copy.deepcopy(config)
+    model["rooms"] = rooms_from_config(model["rooms"])
+    plans = RoomPipeline(known, deduplicate=True, across_rooms=True).run(model)
+    assert all(isinstance(plan.room, Room) for plan in plans)
+    assert to_plain(build_dashboard(model, "en", plans)) == expected
+
+
+def test_generated_yaml_has_plain_mappings(monkeypatch, tmp_path):
+    config_path = tmp_path / "cfg.yaml"
+    config_path.write_text(yaml.safe_dump({"auto_discover": False, "rooms": ROOMS}))
+    monkeypatch.setattr(
+        generator,
+        "_cli_snapshot",
+        lambda config, session=None: HassSnapshot(["light.a", "light.b", "sensor.t"]),
+    )
+    output = tmp_path / "out.yaml"
+    generator.generate_dashboard(config_path, output)
+    text = output.read_text()
+    assert "!!python" not in text and "&id" not in text
+    dashboard = yaml.safe_load(text)
+    living = next(v for v in dashboard["views"] if v["title"] == "Living")
+    assert living["cards"][0]["columns"] == 3
+    assert living["cards"][0]["cards"][0] == {
+        "type": "custom:button-card",
+        "template": "light_tile",
+        "entity": "light.a",
+    }
@@ -0,0 +1,94 @@
+import copy
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import types
+
+dummy = types.ModuleType("dummy")
+sys.modules.setdefault("homeassistant", dummy)
+core_mod = types.ModuleType("core")
+core_mod.HomeAssistant = object
+sys.modules.setdefault("homeassistant.core", core_mod)
+sys.modules.setdefault("homeassistant.helpers", types.ModuleType("helpers"))
+helpers_mod = sys.modules["homeassistant.helpers"]
+helpers_mod.area_registry = types.ModuleType("area_registry")
+helpers_mod.device_registry = types.ModuleType("device_registry")
+helpers_mod.entity_registry = types.ModuleType("entity_registry")
+sys.modules.setdefault("homeassistant.helpers.area_registry", helpers_mod.area_registry)
+sys.modules.setdefault("homeassistant.helpers.device_registry", helpers_mod.device_registry)
+sys.modules.setdefault("homeassistant.helpers.entity_registry", helpers_mod.entity_registry)
+sys.modules.setdefault("homeassistant.config_entries", types.ModuleType("config_entries"))
+sys.modules["homeassistant.config_entries"].ConfigEntry = object
+
+from custom_components.smart_dashboard.dashboard import (
+    _group_cards_by_type,
+    apply_tile_templates,
+    build_dashboard,
+    deduplicate_across_rooms,
+    deduplicate_cards,
+    filter_existing_entities,
+)
+from custom_components.smart_dashboard.pipeline import RoomPipeline, group_stacks
+
+DOMAINS = ["light", "switch", "sensor", "binary_sensor", "climate", "media_player", "vacuum"]
+
+
+def _random_config(rng):
+    entities = [f"{rng.choice(DOMAINS)}.e{i}" for i in range(12)]
+
+    def card():
+        roll = rng.random()
+        if roll < 0.2:
+            return {"type": "vertical-stack", "cards": [card() for _ in range(rng.randint(0, 3))]}
+        if roll < 0.3:
+            return {"type": "markdown", "content": "hi"}
+        return {"type": "entity", "entity": rng.choice(entities)}
+
+    rooms = [
+        {
+            "name": f"Room {r}",
+            "order": rng.randint(0, 3),
+            "hidden": rng.random() < 0.2,
+            "cards": [card() for _ in range(rng.randint(0, 8))],
+        }
+        for r in range(rng.randint(1, 5))
+    ]
+    known = set(rng.sample(entities, 9))
+    return {"rooms": rooms, "overview_limit": 3}, known
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_fused_pipeline_matches_separate_passes(seed):
+    rng = random.Random(seed)
+    config, known = _random_config(rng)
+    across = seed % 2 == 0
+
+    legacy = copy.deepcopy(config)
+    filter_existing_entities(legacy, known=known)
+    deduplicate_cards(legacy)
+    if across:
+        deduplicate_across_rooms(legacy)
+
+    fused = copy.deepcopy(config)
+    plans = RoomPipeline(known, deduplicate=True, across_rooms=across).run(fused)
+
+    assert fused["rooms"] == legacy["rooms"]
+    for plan, room in zip(plans, legacy["rooms"]):
+        assert plan.tiles == apply_tile_templates(room["cards"])
+    visible = [p for p in sorted(plans, key=lambda p: p.room.get("order", 0))
+               if not p.room.get("hidden")]
+    devices = [c for p in visible for c in p.cards]
+    assert group_stacks(visible) == _group_cards_by_type(devices)
+    assert build_dashboard(fused, "en", plans) == build_dashboard(legacy, "en")
+
+
+def test_each_room_is_traversed_once():
+    config, known = _random_config(random.Random(1))
+    pipeline = RoomPipeline(known, deduplicate=True, across_rooms=True)
+    pipeline.run(config)
+    assert pipeline.stats["traversals"] == len(config["rooms"])
@@ -0,0 +1,339 @@
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import types
+
+dummy = types.ModuleType("dummy")
+sys.modules.setdefault("homeassistant", dummy)
+core_mod = types.ModuleType("core")
+core_mod.HomeAssistant = object
+sys.modules.setdefault("homeassistant.core", core_mod)
+sys.modules.setdefault("homeassistant.helpers", types.ModuleType("helpers"))
+helpers_mod = sys.modules["homeassistant.helpers"]
+helpers_mod.area_registry = types.ModuleType("area_registry")
+helpers_mod.device_registry = types.ModuleType("device_registry")
+helpers_mod.entity_registry = types.ModuleType("entity_registry")
+sys.modules.setdefault("homeassistant.helpers.area_registry", helpers_mod.area_registry)
+sys.modules.setdefault("homeassistant.helpers.device_registry", helpers_mod.device_registry)
+sys.modules.setdefault("homeassistant.helpers.entity_registry", helpers_mod.entity_registry)
+sys.modules.setdefault("homeassistant.config_entries", types.ModuleType("config_entries"))
+sys.modules["homeassistant.config_entries"].ConfigEntry = object
+
+from custom_components.smart_dashboard import generator, plugins
+from custom_components.smart_dashboard.plugins import PluginContext, PluginRegistry
+from custom_components.smart_dashboard.snapshot import HassSnapshot
+
+
+def _write_plugin(directory, name, body, priority=None):
+    path = directory / f"{name}.py"
+    source = f"def process_config(config):\n    {body}\n"
+    if priority is not None:
+        source = f"PRIORITY = {priority}\n" + source
+    path.write_text(source)
+    return path
+
+
+def _touch(path):
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+def test_plugins_are_imported_once(tmp_path):
+    _write_plugin(tmp_path, "a", "config.setdefault('rooms', []).append('a')")
+    registry = PluginRegistry(tmp_path)
+    registry.load()
+    registry.load()
+    assert registry.imports == 1
+
+    config = {}
+    for _ in range(3):
+        registry.load()
+        config = {}
+        registry.run(config)
+    # Reloading must not register the plugin again
+    assert config == {"rooms": ["a"]}
+    assert registry.stats["a"]["runs"] == 3
+
+
+def test_modified_plugin_is_reimported(tmp_path):
+    path = _write_plugin(tmp_path, "a", "config['v'] = 1")
+    registry = PluginRegistry(tmp_path)
+    registry.load()
+    registry.run({})
+    path.write_text("def process_config(config):\n    config['v'] = 2\n")
+    _touch(path)
+    registry.load()
+    assert registry.imports == 2
+    config = {}
+    registry.run(config)
+    assert config == {"v": 2}
+    assert registry.stats["a"]["runs"] == 2
+
+    path.unlink()
+    registry.load()
+    assert registry.stats == {}
+
+
+def test_order_priority_and_selection(tmp_path):
+    for name, priority in (("a", None), ("b", 10), ("c", 90)):
+        _write_plugin(
+            tmp_path,
+            name,
+            f"config.setdefault('seen', []).append('{name}')",
+            priority,
+        )
+    registry = PluginRegistry(tmp_path)
+    registry.load()
+
+    def seen(options=None):
+        config = {} if options is None else {"plugins": options}
+        registry.run(config)
+        return config.get("seen")
+
+    assert seen() == ["b", "a", "c"]
+    assert seen({"order": ["c"]}) == ["c", "b", "a"]
+    assert seen({"disabled": ["b"]}) == ["a", "c"]
+    assert seen({"enabled": ["a", "c"], "order": ["c", "a"]}) == ["c", "a"]
+    assert seen({"enabled": []}) is None
+
+
+def test_failures_are_counted_and_timed(tmp_path, caplog):
+    _write_plugin(tmp_path, "bad", "raise RuntimeError('boom')")
+    _write_plugin(tmp_path, "good", "config['ok'] = True")
+    (tmp_path / "broken.py").write_text("def process_config(:\n")
+    registry = PluginRegistry(tmp_path)
+    registry.load()
+    config = {}
+    runs = registry.run(config)
+
+    assert config == {"ok": True}
+    assert [(r.name, r.failed) for r in runs] == [("bad", True), ("good", False)]
+    assert all(r.duration >= 0 for r in runs)
+    assert registry.stats["bad"]["failures"] == 1
+    assert registry.stats["broken"]["failures"] == 1
+    assert "Plugin bad failed" in caplog.text
+
+
+def test_builtin_plugins_load_once_across_runs():
+    plugins.load_plugins()
+    imports = plugins.REGISTRY.imports
+    for _ in range(3):
+        plugins.load_plugins()
+    assert plugins.REGISTRY.imports == imports
+    assert plugins.PLUGINS == []
+    order = [p.name for p in plugins.REGISTRY.plugins()]
+    assert order.index("lovelace_cards_loader") < order.index("dwains_style")
+
+
+def test_reimport_keeps_all_stats(tmp_path):
+    path = tmp_path / "a.py"
+    path.write_text(
+        "INPUTS = ('v',)\n"
+        "def process_config(config):\n"
+        "    return {'w': config.get('v')}\n"
+    )
+    registry = PluginRegistry(tmp_path)
+    registry.load()
+    registry.run({"v": 1})
+    registry.run({"v": 1})
+    before = registry.stats["a"]
+    assert before["cache_hits"] == 1 and before["cache_misses"] == 1
+    _touch(path)
+    registry.load()
+    assert registry.imports == 2
+    assert registry.stats["a"] == before
+
+
+def test_slow_plugin_is_skipped_after_timeout(tmp_path):
+    (tmp_path / "slow.py").write_text(
+        "import time\n"
+        "TIMEOUT = 0.05\n"
+        "def process_config(config):\n"
+        "    config['slow'] = True\n"
+        "    time.sleep(0.5)\n"
+    )
+    _write_plugin(tmp_path, "z", "config['after'] = True")
+    registry = PluginRegistry(tmp_path)
+    registry.load()
+    config = {}
+    runs = registry.run(config)
+
+    assert config == {"after": True}
+    assert [(r.name, r.timed_out) for r in runs] == [("slow", True), ("z", False)]
+    assert registry.stats["slow"]["timeouts"] == 1
+    # The abandoned plugin must not keep the interpreter from exiting
+    abandoned = [
+        t for t in threading.enumerate() if t.name == "smart_dashboard_plugin_slow"
+    ]
+    assert abandoned and all(t.daemon for t in abandoned)
+    # The option overrides the plugin's own budget
+    config = {"plugins": {"timeout": 5}}
+    registry.run(config)
+    assert config["slow"] is True
+
+
+def test_plugins_work_on_copies_and_may_return_patches(tmp_path):
+    (tmp_path / "patch.py").write_text(
+        "def process_config(config):\n"
+        "    config['rooms'].clear()\n"
+        "    return {'theme': 'dark'}\n"
+    )
+    _write_plugin(tmp_path, "fails", "config['rooms'].clear(); raise ValueError")
+    rooms = [{"name": "Kitchen"}]
+    config = {"rooms": rooms, "theme": "auto"}
+    registry = PluginRegistry(tmp_path)
+    registry.load()
+    registry.run(config)
+
+    # Only the returned keys are applied; the failed plugin changed nothing
+    assert config == {"rooms": [{"name": "Kitchen"}], "theme": "dark"}
+    assert config["rooms"] is rooms
+
+
+def test_independent_plugins_run_concurrently_and_merge_in_order(tmp_path):
+    for name in ("a", "b"):
+        (tmp_path / f"{name}.py").write_text(
+            "import time\n"
+            "INDEPENDENT = True\n"
+            "def process_config(config):\n"
+            "    time.sleep(0.2)\n"
+            f"    config['rooms'].append('{name}')\n"
+            f"    config['last'] = '{name}'\n"
+        )
+    _write_plugin(tmp_path, "c", "config['seen'] = list(config['rooms'])")
+    registry = PluginRegistry(tmp_path)
+    registry.load()
+    config = {"rooms": ["own"]}
+    start = time.perf_counter()
+    registry.run(config)
+    elapsed = time.perf_counter() - start
+
+    assert config == {
+        "rooms": ["own", "a", "b"],
+        "last": "b",
+        "seen": ["own", "a", "b"],
+    }
+    assert elapsed < 0.35
+
+
+def test_outputs_are_cached_by_declared_inputs(tmp_path):
+    (tmp_path / "count.py").write_text(
+        "INPUTS = ('sidebar', 'rooms.name')\n"
+        "calls = []\n"
+        "def process_config(config):\n"
+        "    calls.append(1)\n"
+        "    config['sidebar'] = [r['name'] for r in config['rooms']] + [len(calls)]\n"
+    )
+    _write_plugin(tmp_path, "legacy", "config['legacy'] = config.get('legacy', 0) + 1")
+    registry = PluginRegistry(tmp_path)
+    registry.load()
+
+    def run(*names, cards=()):
+        config = {"rooms": [{"name": n, "cards": list(cards)} for n in names]}
+        runs = registry.run(config)
+        return config, {r.name: r.cached for r in runs}
+
+    first, cached = run("A", "B")
+    assert first == {
+        "rooms": [{"name": "A", "cards": []}, {"name": "B", "cards": []}],
+        "sidebar": ["A", "B", 1],
+        "legacy": 1,
+    }
+    assert cached == {"count": False, "legacy": False}
+
+    # Undeclared keys do not matter; the cached result is a private copy
+    first["sidebar"].append("mutated")
+    again, cached = run("A", "B", cards=["light.x"])
+    assert again["sidebar"] == ["A", "B", 1]
+    assert cached == {"count": True, "legacy": False}
+
+    changed, cached = run("A", "C")
+    assert changed["sidebar"] == ["A", "C", 2]
+    assert registry.stats["count"]["cache_hits"] == 1
+    assert registry.stats["count"]["cache_misses"] == 2
+    assert "cache_hits" in registry.stats["legacy"]
+    assert registry.stats["legacy"]["cache_misses"] == 0
+
+
+def test_output_cache_evicts_least_recently_used(tmp_path):
+    (tmp_path / "p.py").write_text(
+        "INPUTS = ('v',)\n"
+        "def process_config(config):\n"
+        "    config['out'] = config['v']\n"
+    )
+    registry = PluginRegistry(tmp_path)
+    registry.cache.max_entries = 2
+    registry.load()
+    for value in (1, 2, 1, 3, 1, 2):
+        registry.run({"v": value})
+    assert len(registry.cache) == 2
+    # 1 stayed in use, 2 was evicted by 3 and computed again
+    assert (registry.cache.hits, registry.cache.misses) == (2, 4)
+
+
+FETCH_PLUGIN = """\
+import time
+def fetch(config, context):
+    time.sleep(0.3)
+    if config.get("fail_fetch"):
+        raise OSError("unreachable")
+    return {"views": [config.get("remote", "Garage")]}
+def process_config(config, context):
+    config.setdefault("rooms", []).append({"name": context.fetched["views"][0]})
+"""
+
+
+def test_fetch_runs_in_background_and_reaches_process_config(tmp_path):
+    (tmp_path / "remote.py").write_text(FETCH_PLUGIN)
+    registry = PluginRegistry(tmp_path)
+    registry.load()
+    config = {"remote": "Garage"}
+    start = time.perf_counter()
+    prefetch = registry.prefetch(config, PluginContext())
+    config["rooms"] = [{"name": "Local"}]
+    time.sleep(0.3)
+    runs = registry.run(config, PluginContext(), prefetch)
+    prefetch.close()
+
+    assert time.perf_counter() - start < 0.5
+    assert config["rooms"] == [{"name": "Local"}, {"name": "Garage"}]
+    assert prefetch.timings["remote"] >= 0.3
+    assert not runs[0].failed
+
+    # Without a prefetch the plugin fetches when it runs; failures skip it
+    config = {"remote": "Garage", "fail_fetch": True}
+    (run,) = registry.run(config)
+    assert run.failed and "rooms" not in config
+    assert "remote" not in registry.prefetch({"plugins": {"disabled": ["remote"]}})
+
+
+def test_generation_overlaps_fetch_with_discovery(tmp_path, monkeypatch):
+    directory = tmp_path / "plugins"
+    directory.mkdir()
+    (directory / "remote.py").write_text(FETCH_PLUGIN)
+    monkeypatch.setattr(plugins, "REGISTRY", PluginRegistry(directory))
+    discover = generator.discover_from_snapshot
+
+    def slow_discover(snapshot, lang):
+        time.sleep(0.3)
+        return discover(snapshot, lang)
+
+    monkeypatch.setattr(generator, "discover_from_snapshot", slow_discover)
+    config_path = tmp_path / "cfg.yaml"
+    config_path.write_text(yaml.safe_dump({"auto_discover": True}))
+    output = tmp_path / "out.yaml"
+    result = generator.generate_dashboard(
+        config_path, output, snapshot=HassSnapshot(["light.a"]), force=True
+    )
+
+    assert result.background["remote"] >= 0.3
+    assert result.timings["discovery"] >= 0.3
+    assert result.duration < 0.55
+    assert "Garage" in output.read_text()
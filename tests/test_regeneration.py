@@ -0,0 +1,95 @@
+import asyncio
+import sys
+import types
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+dummy = types.ModuleType("dummy")
+sys.modules.setdefault("homeassistant", dummy)
+core_mod = types.ModuleType("core")
+core_mod.HomeAssistant = object
+sys.modules.setdefault("homeassistant.core", core_mod)
+sys.modules.setdefault("homeassistant.helpers", types.ModuleType("helpers"))
+helpers_mod = sys.modules["homeassistant.helpers"]
+helpers_mod.area_registry = types.ModuleType("area_registry")
+helpers_mod.device_registry = types.ModuleType("device_registry")
+helpers_mod.entity_registry = types.ModuleType("entity_registry")
+sys.modules.setdefault("homeassistant.helpers.area_registry", helpers_mod.area_registry)
+sys.modules.setdefault("homeassistant.helpers.device_registry", helpers_mod.device_registry)
+sys.modules.setdefault("homeassistant.helpers.entity_registry", helpers_mod.entity_registry)
+sys.modules.setdefault("homeassistant.config_entries", types.ModuleType("config_entries"))
+sys.modules["homeassistant.config_entries"].ConfigEntry = object
+
+from custom_components import smart_dashboard as sd
+from custom_components.smart_dashboard.regeneration import DebouncedRegenerator
+
+
+def _regenerator(debounce, max_wait):
+    runs = []
+
+    async def action():
+        runs.append(asyncio.get_running_loop().time())
+
+    return DebouncedRegenerator(action, debounce, max_wait), runs
+
+
+def test_burst_is_coalesced():
+    async def scenario():
+        regen, runs = _regenerator(0.02, 1.0)
+        for _ in range(200):
+            regen.async_schedule("entity_registry_updated")
+        await asyncio.sleep(0.05)
+        await regen.async_flush()
+        return regen, runs
+
+    regen, runs = asyncio.run(scenario())
+    assert len(runs) == 1
+    assert regen.stats == {"triggers": 200, "coalesced": 199, "runs": 1}
+
+
+def test_max_wait_bounds_delay():
+    async def scenario():
+        regen, runs = _regenerator(0.05, 0.1)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        # Keep triggering faster than the debounce window for 0.3 seconds
+        while loop.time() - start < 0.3:
+            regen.async_schedule("config_file")
+            await asyncio.sleep(0.01)
+        regen.async_cancel()
+        return runs, start
+
+    runs, start = asyncio.run(scenario())
+    assert len(runs) >= 2
+    assert runs[0] - start < 0.2
+
+
+def test_flush_runs_pending_immediately():
+    async def scenario():
+        regen, runs = _regenerator(10, 60)
+        regen.async_schedule("options")
+        assert regen.pending
+        await regen.async_flush()
+        return regen, runs
+
+    regen, runs = asyncio.run(scenario())
+    assert len(runs) == 1
+    assert not regen.pending
+
+
+def test_registry_event_filter():
+    def event(event_type, **data):
+        return types.SimpleNamespace(event_type=event_type, data=data)
+
+    assert sd._registry_event_relevant(event("entity_registry_updated", action="create"))
+    assert not sd._registry_event_relevant(
+        event("entity_registry_updated", action="update", changes={"icon": None})
+    )
+    assert sd._registry_event_relevant(
+        event("entity_registry_updated", action="update", changes={"area_id": "a"})
+    )
+    assert not sd._registry_event_relevant(
+        event("device_registry_updated", action="update", changes={"sw_version": "1"})
+    )
+    assert sd._registry_event_relevant(event("area_registry_updated", action="update"))
@@ -0,0 +1,182 @@
+import sys
+import types
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+dummy = types.ModuleType("dummy")
+sys.modules.setdefault("homeassistant", dummy)
+core_mod = types.ModuleType("core")
+core_mod.HomeAssistant = object
+sys.modules.setdefault("homeassistant.core", core_mod)
+sys.modules.setdefault("homeassistant.helpers", types.ModuleType("helpers"))
+helpers_mod = sys.modules["homeassistant.helpers"]
+helpers_mod.area_registry = types.ModuleType("area_registry")
+helpers_mod.device_registry = types.ModuleType("device_registry")
+helpers_mod.entity_registry = types.ModuleType("entity_registry")
+sys.modules.setdefault("homeassistant.helpers.area_registry", helpers_mod.area_registry)
+sys.modules.setdefault("homeassistant.helpers.device_registry", helpers_mod.device_registry)
+sys.modules.setdefault("homeassistant.helpers.entity_registry", helpers_mod.entity_registry)
+sys.modules.setdefault("homeassistant.config_entries", types.ModuleType("config_entries"))
+sys.modules["homeassistant.config_entries"].ConfigEntry = object
+
+from concurrent.futures import Future
+
+from custom_components.smart_dashboard import registry_index as ri
+from custom_components.smart_dashboard import snapshot as snapshot_mod
+from custom_components.smart_dashboard.registry_index import RegistryIndex
+from custom_components.smart_dashboard.snapshot import HassSnapshot
+from custom_components.smart_dashboard.websocket_client import _snapshot_from_results
+
+
+def _snapshot():
+    return HassSnapshot(
+        entities=["light.a", "light.b", "sensor.c"],
+        areas={"living": "Living", "kitchen": "Kitchen"},
+        device_areas={"d1": "living", "d2": "kitchen"},
+        entity_devices={"light.a": "d1", "light.b": "d1", "sensor.c": "d2"},
+    )
+
+
+def _rebuilt(index):
+    """Return the entity areas a full rebuild would compute."""
+    snap = index.snapshot()
+    fresh = HassSnapshot(
+        entities=list(snap.entities),
+        areas=dict(snap.areas),
+        device_areas=dict(snap.device_areas),
+        entity_devices=dict(snap.entity_devices),
+        entity_own_areas=dict(snap.entity_own_areas),
+    )
+    return {e: fresh.area_id(e) for e in fresh.entity_devices}
+
+
+def test_lookups():
+    index = RegistryIndex.from_snapshot(_snapshot())
+    assert index.is_known("light.a") and not index.is_known("light.z")
+    assert index.area_id("light.b") == "living"
+    assert index.area_name("sensor.c") == "Kitchen"
+    assert index.entities_in_area("living") == {"light.a", "light.b"}
+
+
+def test_incremental_updates_match_rebuild():
+    index = RegistryIndex.from_snapshot(_snapshot())
+    index.set_device("d1", "kitchen")
+    assert index.entities_in_area("kitchen") == {"light.a", "light.b", "sensor.c"}
+    assert index.entities_in_area("living") == set()
+    index.set_entity("light.b", "d3")
+    index.set_device("d3", "living")
+    index.remove_device("d2")
+    index.remove_entity("light.a")
+    index.add_state("light.new")
+    index.remove_state("sensor.c")
+    assert {e: index.area_id(e) for e in index.snapshot().entity_devices} == _rebuilt(index)
+    assert index.area_id("light.b") == "living"
+    assert index.area_id("sensor.c") is None
+    assert index.snapshot().entities == ["light.a", "light.b", "light.new"]
+
+
+def test_entity_area_overrides_device_area_in_every_path(monkeypatch):
+    areas = [{"area_id": "living", "name": "Living"}, {"area_id": "hall", "name": "Hall"}]
+    devices = [{"id": "d1", "area_id": "living"}]
+    entities = [
+        {"entity_id": "light.a", "device_id": "d1", "area_id": None},
+        {"entity_id": "light.b", "device_id": "d1", "area_id": "hall"},
+    ]
+    expected = {"light.a": "living", "light.b": "hall"}
+
+    ns = types.SimpleNamespace
+    monkeypatch.setattr(snapshot_mod.ar, "async_get", lambda h: ns(
+        async_list_areas=lambda: [ns(id=a["area_id"], name=a["name"]) for a in areas]
+    ), raising=False)
+    monkeypatch.setattr(snapshot_mod.dr, "async_get", lambda h: ns(
+        devices={d["id"]: ns(**d) for d in devices}
+    ), raising=False)
+    monkeypatch.setattr(snapshot_mod.er, "async_get", lambda h: ns(
+        entities={e["entity_id"]: ns(**e) for e in entities}
+    ), raising=False)
+    states = [ns(entity_id=e["entity_id"], state="on") for e in entities]
+    hass = ns(states=ns(async_all=lambda: states))
+    captured = HassSnapshot.async_capture(hass)
+
+    rest = HassSnapshot(entities=list(expected))
+    results = {}
+    for path, value in zip(snapshot_mod.REGISTRY_PATHS, (areas, devices, entities)):
+        results[path] = Future()
+        results[path].set_result(value)
+    rest._apply_registries(results)
+
+    websocket = _snapshot_from_results(
+        [{"entity_id": e, "state": "on"} for e in expected], [areas, devices, entities]
+    )
+    index = RegistryIndex.from_snapshot(captured)
+
+    for snap in (captured, rest, websocket, index.snapshot()):
+        assert {e: snap.area_id(e) for e in expected} == expected
+    assert {e: index.area_id(e) for e in expected} == expected
+
+    # Moving the device leaves the entity with its own area in place
+    index.set_device("d1", "kitchen")
+    assert index.area_id("light.a") == "kitchen"
+    assert index.area_id("light.b") == "hall"
+    assert {e: index.area_id(e) for e in expected} == _rebuilt(index)
+    index.set_entity("light.b", "d1")
+    assert index.entities_in_area("kitchen") == {"light.a", "light.b"}
+
+
+def test_snapshot_cached_until_change():
+    index = RegistryIndex.from_snapshot(_snapshot())
+    first = index.snapshot()
+    assert index.snapshot() is first
+    index.set_area("living", "Living")  # unchanged name
+    assert index.snapshot() is first
+    index.set_area("living", "Lounge")
+    second = index.snapshot()
+    assert second is not first
+    assert second.digest != first.digest
+    assert first.areas["living"] == "Living"
+
+
+class FakeBus:
+    def __init__(self):
+        self.listeners = {}
+
+    def async_listen(self, event_type, func, **kwargs):
+        self.listeners[event_type] = func
+        return lambda: self.listeners.pop(event_type)
+
+    def fire(self, event_type, **data):
+        self.listeners[event_type](types.SimpleNamespace(event_type=event_type, data=data))
+
+
+def test_tracks_events(monkeypatch):
+    index = RegistryIndex.from_snapshot(_snapshot())
+    hass = types.SimpleNamespace(bus=FakeBus())
+    device = types.SimpleNamespace(id="d9", area_id="kitchen")
+    entry = types.SimpleNamespace(entity_id="switch.s", device_id="d9")
+    monkeypatch.setattr(
+        ri.dr, "async_get", lambda h: types.SimpleNamespace(async_get=lambda i: device),
+        raising=False,
+    )
+    monkeypatch.setattr(
+        ri.er, "async_get", lambda h: types.SimpleNamespace(async_get=lambda i: entry),
+        raising=False,
+    )
+    unsub = index.async_track(hass)
+
+    hass.bus.fire("device_registry_updated", action="create", device_id="d9")
+    hass.bus.fire("entity_registry_updated", action="create", entity_id="switch.s")
+    hass.bus.fire("state_changed", entity_id="switch.s", old_state=None, new_state=object())
+    version = index.version
+    hass.bus.fire("state_changed", entity_id="switch.s", old_state=object(), new_state=object())
+    assert index.version == version
+    assert index.is_known("switch.s")
+    assert index.area_name("switch.s") == "Kitchen"
+
+    hass.bus.fire("entity_registry_updated", action="remove", entity_id="light.a")
+    hass.bus.fire("area_registry_updated", action="remove", area_id="living")
+    assert index.area_id("light.a") is None
+    assert index.area_name("light.b") is None
+
+    unsub()
+    assert hass.bus.listeners == {}
@@ -0,0 +1,116 @@
+import copy
+import io
+import sys
+from pathlib import Path
+
+import pytest
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import types
+
+dummy = types.ModuleType("dummy")
+sys.modules.setdefault("homeassistant", dummy)
+core_mod = types.ModuleType("core")
+core_mod.HomeAssistant = object
+sys.modules.setdefault("homeassistant.core", core_mod)
+sys.modules.setdefault("homeassistant.helpers", types.ModuleType("helpers"))
+helpers_mod = sys.modules["homeassistant.helpers"]
+helpers_mod.area_registry = types.ModuleType("area_registry")
+helpers_mod.device_registry = types.ModuleType("device_registry")
+helpers_mod.entity_registry = types.ModuleType("entity_registry")
+sys.modules.setdefault("homeassistant.helpers.area_registry", helpers_mod.area_registry)
+sys.modules.setdefault("homeassistant.helpers.device_registry", helpers_mod.device_registry)
+sys.modules.setdefault("homeassistant.helpers.entity_registry", helpers_mod.entity_registry)
+sys.modules.setdefault("homeassistant.config_entries", types.ModuleType("config_entries"))
+sys.modules["homeassistant.config_entries"].ConfigEntry = object
+
+from custom_components.smart_dashboard import generator, serializers
+from custom_components.smart_dashboard.dashboard import build_dashboard
+from custom_components.smart_dashboard.fingerprint import write_stream_if_changed
+from custom_components.smart_dashboard.model import rooms_from_config
+from custom_components.smart_dashboard.snapshot import HassSnapshot
+
+BACKENDS = [b for b in ("python", "libyaml", "json") if b in serializers._DUMPERS]
+
+ROOMS = [
+    {
+        "name": "Гостиная 🛋",
+        "icon": "mdi:sofa",
+        "columns": 3,
+        "cards": [
+            {"type": "light", "entity": "light.a", "name": "on"},
+            {"type": "markdown", "content": "yes: no\n# not a comment\n", "entity": None},
+            {"type": "gauge", "entity": "sensor.t", "min": 0, "max": 1.5, "severity": {"green": 0}},
+            {"type": "vertical-stack", "cards": [{"type": "button", "name": "null", "tap": True}]},
+        ],
+    },
+    {"name": "Office", "cards": [{"type": "entities", "entities": ["light.a", "1.0", "~"]}]},
+]
+
+
+def _dashboard():
+    config = {"rooms": rooms_from_config(copy.deepcopy(ROOMS)), "resources": []}
+    return build_dashboard(config, "ru")
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_backends_are_equivalent(backend):
+    expected = yaml.safe_load(serializers.dumps(_dashboard(), "python"))
+    text = serializers.dumps(_dashboard(), backend)
+    assert yaml.safe_load(text) == expected
+    assert serializers.load_yaml(io.StringIO(text)) == expected
+    assert "&id" not in text and "!!python" not in text
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_fragment_cache_output_is_identical(backend):
+    dashboard = _dashboard()
+    fragments = serializers.FragmentCache()
+    expected = serializers.dumps(dashboard, backend)
+    assert serializers.dumps(dashboard, backend, fragments) == expected
+    assert fragments.hits == 0
+    # A dashboard sharing a room view and the resources reuses their encoding
+    other = {**dashboard, "views": dashboard["views"][-1:]}
+    text = serializers.dumps(other, backend, fragments)
+    assert text == serializers.dumps(other, backend)
+    assert fragments.hits == 1 + len(dashboard["resources"])
+
+
+def test_auto_prefers_libyaml():
+    expected = "libyaml" if serializers.HAS_LIBYAML else "python"
+    assert serializers.resolve_backend("auto") == expected
+    with pytest.raises(ValueError):
+        serializers.resolve_backend("xml")
+
+
+def test_write_stream_if_changed(tmp_path):
+    path = tmp_path / "out.yaml"
+    assert write_stream_if_changed(path, lambda f: f.write("a: 1\n"))
+    assert not write_stream_if_changed(path, lambda f: f.writelines(["a: ", "1\n"]))
+    assert write_stream_if_changed(path, lambda f: f.write("a: 2\n"))
+    assert path.read_text() == "a: 2\n"
+    with pytest.raises(RuntimeError):
+        write_stream_if_changed(path, lambda f: (_ for _ in ()).throw(RuntimeError()))
+    assert path.read_text() == "a: 2\n"
+    assert [p.name for p in tmp_path.iterdir()] == ["out.yaml"]
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_generate_with_serializer(backend, monkeypatch, tmp_path):
+    monkeypatch.setattr(
+        generator,
+        "_cli_snapshot",
+        lambda config, session=None: HassSnapshot(["light.a", "sensor.t"]),
+    )
+    results = {}
+    for name in ("python", backend):
+        config_path = tmp_path / f"{name}.yaml"
+        config_path.write_text(
+            yaml.safe_dump({"auto_discover": False, "serializer": name, "rooms": ROOMS})
+        )
+        output = tmp_path / f"{name}-out.yaml"
+        generator.generate_dashboard(config_path, output)
+        results[name] = yaml.safe_load(output.read_text())
+    assert results[backend] == results["python"]
@@ -29,31 +29,140 @@ class DummyServices:
         self._registry = {}
     def has_service(self, domain, service):
         return (domain, service) in self._registry
-    def async_register(self, domain, service, func):
+    def async_register(self, domain, service, func, **kwargs):
         self._registry[(domain, service)] = func
     def async_remove(self, domain, service):
         self._registry.pop((domain, service), None)
 
-class DummyHass:
+class DummyBus:
     def __init__(self):
+        self.listeners = []
+    def async_listen(self, event_type, func, **kwargs):
+        self.listeners.append((event_type, func))
+        return lambda: self.listeners.remove((event_type, func))
+
+class DummyConfig:
+    def __init__(self, base):
+        self._base = Path(base)
+    def path(self, *parts):
+        return str(self._base.joinpath(*parts))
+
+class DummyEntry:
+    def __init__(self, entry_id, options=None, data=None):
+        self.entry_id = entry_id
+        self.options = options or {}
+        self.data = data or {}
+        self.unload_callbacks = []
+    def async_on_unload(self, func):
+        self.unload_callbacks.append(func)
+    def add_update_listener(self, listener):
+        return lambda: None
+
+class DummyConfigEntries:
+    def __init__(self, hass):
+        self.hass = hass
+        self.entries = {}
+        self.reloads = 0
+    async def async_reload(self, entry_id):
+        self.reloads += 1
+        entry = self.entries[entry_id]
+        await sd.async_unload_entry(self.hass, entry)
+        for func in entry.unload_callbacks:
+            result = func()
+            if asyncio.iscoroutine(result):
+                await result
+        entry.unload_callbacks = []
+        await sd.async_setup_entry(self.hass, entry)
+
+class DummyHass:
+    def __init__(self, base="."):
         self.services = DummyServices()
         self.data = {}
+        self.bus = DummyBus()
+        self.config = DummyConfig(base)
+        self.config_entries = DummyConfigEntries(self)
+    async def async_add_executor_job(self, func, *args):
+        return func(*args)
 
-def test_generate_service(monkeypatch):
-    hass = DummyHass()
-    entry = types.SimpleNamespace(entry_id="1")
+def test_generate_service(monkeypatch, tmp_path):
+    hass = DummyHass(tmp_path)
+    entry = DummyEntry("1")
     called = {"count": 0}
 
-    async def fake_gen(h):
+    async def fake_gen(h, force=False, cancel=None, index=None, conditions=(), users=()):
         called["count"] += 1
 
     monkeypatch.setattr(sd, "_generate_dashboard_files", fake_gen)
+    monkeypatch.setattr(sd.RegistryIndex, "async_build", classmethod(lambda cls, h: cls()))
 
     asyncio.run(sd.async_setup_entry(hass, entry))
     assert hass.services.has_service(sd.DOMAIN, "generate")
     handler = hass.services._registry[(sd.DOMAIN, "generate")]
-    asyncio.run(handler(None))
+    asyncio.run(handler(types.SimpleNamespace(data={})))
     assert called["count"] == 2
 
     asyncio.run(sd.async_unload_entry(hass, entry))
     assert not hass.services.has_service(sd.DOMAIN, "generate")
+    for func in entry.unload_callbacks:
+        func()
+    assert hass.bus.listeners == []
+
+
+def test_generate_service_response(monkeypatch, tmp_path):
+    hass = DummyHass(tmp_path)
+    entry = DummyEntry("1")
+
+    async def fake_gen(h, force=False, cancel=None, index=None, conditions=(), users=()):
+        return sd.GenerationResult("abc", skipped=not force, duration=0.5)
+
+    monkeypatch.setattr(sd, "_generate_dashboard_files", fake_gen)
+    monkeypatch.setattr(sd.RegistryIndex, "async_build", classmethod(lambda cls, h: cls()))
+
+    async def scenario():
+        await sd.async_setup_entry(hass, entry)
+        handler = hass.services._registry[(sd.DOMAIN, "generate")]
+        call = types.SimpleNamespace(data={"force": True}, return_response=True)
+        response = await handler(call)
+        no_wait = await handler(types.SimpleNamespace(data={"wait": False}))
+        queued = await handler(
+            types.SimpleNamespace(data={"wait": False}, return_response=True)
+        )
+        await sd.async_unload_entry(hass, entry)
+        return response, no_wait, queued
+
+    response, no_wait, queued = asyncio.run(scenario())
+    assert no_wait is None
+    assert queued == {"queued": True}
+    assert response["success"] is True
+    assert response["skipped"] is False
+    assert response["duration"] == 0.5
+    assert response["stats"]["generation"]["requests"] == 2
+
+
+def test_toggling_auto_regenerate_reloads_entry(monkeypatch, tmp_path):
+    hass = DummyHass(tmp_path)
+    entry = DummyEntry("1")
+    hass.config_entries.entries["1"] = entry
+
+    async def fake_gen(h, force=False, cancel=None, index=None, conditions=(), users=()):
+        return None
+
+    monkeypatch.setattr(sd, "_generate_dashboard_files", fake_gen)
+    monkeypatch.setattr(sd.RegistryIndex, "async_build", classmethod(lambda cls, h: cls()))
+
+    async def scenario():
+        await sd.async_setup_entry(hass, entry)
+        assert hass.bus.listeners
+        entry.options = {sd.CONF_AUTO_REGENERATE: False, sd.CONF_DEBOUNCE: 1}
+        await sd._async_options_updated(hass, entry)
+        listeners = list(hass.bus.listeners)
+        # Other option changes do not reload
+        entry.options = {sd.CONF_AUTO_REGENERATE: False, sd.CONF_DEBOUNCE: 2}
+        await sd._async_options_updated(hass, entry)
+        await sd.async_unload_entry(hass, entry)
+        return listeners
+
+    listeners = asyncio.run(scenario())
+    assert listeners == []
+    assert hass.config_entries.reloads == 1
+    assert hass.data[sd.DOMAIN] == {}
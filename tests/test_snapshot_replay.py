@@ -0,0 +1,131 @@
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import pytest
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import types
+
+dummy = types.ModuleType("dummy")
+sys.modules.setdefault("homeassistant", dummy)
+core_mod = types.ModuleType("core")
+core_mod.HomeAssistant = object
+sys.modules.setdefault("homeassistant.core", core_mod)
+sys.modules.setdefault("homeassistant.helpers", types.ModuleType("helpers"))
+helpers_mod = sys.modules["homeassistant.helpers"]
+helpers_mod.area_registry = types.ModuleType("area_registry")
+helpers_mod.device_registry = types.ModuleType("device_registry")
+helpers_mod.entity_registry = types.ModuleType("entity_registry")
+sys.modules.setdefault("homeassistant.helpers.area_registry", helpers_mod.area_registry)
+sys.modules.setdefault("homeassistant.helpers.device_registry", helpers_mod.device_registry)
+sys.modules.setdefault("homeassistant.helpers.entity_registry", helpers_mod.entity_registry)
+sys.modules.setdefault("homeassistant.config_entries", types.ModuleType("config_entries"))
+sys.modules["homeassistant.config_entries"].ConfigEntry = object
+
+from custom_components.smart_dashboard import generator
+from custom_components.smart_dashboard.snapshot import (
+    HassSnapshot,
+    load_snapshot,
+    save_snapshot,
+)
+
+
+def _snapshot():
+    return HassSnapshot(
+        entities=["light.a", "light.b"],
+        areas={"kitchen": "Kitchen"},
+        device_areas={"dev1": "kitchen"},
+        entity_devices={"light.a": "dev1"},
+        lovelace={"views": [{"title": "Imported", "cards": [{"type": "light"}]}]},
+    )
+
+
+def _no_network(*args, **kwargs):
+    raise AssertionError("network access during replay")
+
+
+def test_roundtrip(tmp_path):
+    path = tmp_path / "home.snapshot"
+    save_snapshot(_snapshot(), path)
+    assert path.read_bytes()[:2] == b"\x1f\x8b"
+    loaded = load_snapshot(path)
+    assert loaded.to_dict() == _snapshot().to_dict()
+    assert loaded.digest == _snapshot().digest
+
+
+def test_plain_json_export_is_accepted(tmp_path):
+    path = tmp_path / "export.json"
+    path.write_text(json.dumps({"entities": ["light.a"]}))
+    assert load_snapshot(path).entities == ["light.a"]
+
+
+def test_replay_within_ttl_does_not_fetch(monkeypatch, tmp_path):
+    path = tmp_path / "home.snapshot"
+    save_snapshot(_snapshot(), path)
+    monkeypatch.setattr(generator, "fetch_snapshot", _no_network)
+    assert generator.load_cli_snapshot(path, ttl=60).entities == ["light.a", "light.b"]
+    assert generator.load_cli_snapshot(path).entities == ["light.a", "light.b"]
+
+
+def test_expired_snapshot_is_refreshed(monkeypatch, tmp_path):
+    path = tmp_path / "home.snapshot"
+    save_snapshot(HassSnapshot(["light.old"]), path)
+    old = time.time() - 120
+    os.utime(path, (old, old))
+    monkeypatch.setenv("HASS_TOKEN", "abc")
+    calls = []
+
+    def fake_fetch(url, token, registries, lovelace, session):
+        calls.append((registries, lovelace))
+        return _snapshot()
+
+    monkeypatch.setattr(generator, "fetch_snapshot", fake_fetch)
+    record = tmp_path / "copy.snapshot"
+    snap = generator.load_cli_snapshot(path, ttl=60, record_path=record)
+    assert calls == [(True, True)]
+    assert snap.entities == ["light.a", "light.b"]
+    assert load_snapshot(path).entities == snap.entities
+    assert load_snapshot(record).entities == snap.entities
+
+
+def test_missing_snapshot_without_token_fails(monkeypatch, tmp_path):
+    monkeypatch.delenv("HASS_TOKEN", raising=False)
+    with pytest.raises(ValueError):
+        generator.load_cli_snapshot(tmp_path / "missing.snapshot")
+
+
+def test_generate_offline_from_snapshot(monkeypatch, tmp_path):
+    monkeypatch.setattr(generator, "fetch_snapshot", _no_network)
+    monkeypatch.setattr(generator, "_cli_snapshot", _no_network)
+    monkeypatch.setattr(
+        "custom_components.smart_dashboard.plugins.lovelace_cards_loader.requests.get",
+        _no_network,
+    )
+    config_path = tmp_path / "smart_dashboard.yaml"
+    config_path.write_text(
+        yaml.safe_dump(
+            {
+                "auto_discover": True,
+                "load_lovelace_cards": True,
+                "rooms": [
+                    {
+                        "name": "Manual",
+                        "cards": [
+                            {"type": "light", "entity": "light.a"},
+                            {"type": "light", "entity": "light.gone"},
+                        ],
+                    }
+                ],
+            }
+        )
+    )
+    output = tmp_path / "out.yaml"
+    generator.generate_dashboard(config_path, output, snapshot=_snapshot())
+    views = {v["title"]: v for v in yaml.safe_load(output.read_text())["views"]}
+    assert {"Kitchen", "Imported", "Manual"} <= set(views)
+    assert "light.gone" not in output.read_text()
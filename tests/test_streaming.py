@@ -0,0 +1,68 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import types
+
+dummy = types.ModuleType("dummy")
+sys.modules.setdefault("homeassistant", dummy)
+core_mod = types.ModuleType("core")
+core_mod.HomeAssistant = object
+sys.modules.setdefault("homeassistant.core", core_mod)
+sys.modules.setdefault("homeassistant.helpers", types.ModuleType("helpers"))
+helpers_mod = sys.modules["homeassistant.helpers"]
+helpers_mod.area_registry = types.ModuleType("area_registry")
+helpers_mod.device_registry = types.ModuleType("device_registry")
+helpers_mod.entity_registry = types.ModuleType("entity_registry")
+sys.modules.setdefault("homeassistant.helpers.area_registry", helpers_mod.area_registry)
+sys.modules.setdefault("homeassistant.helpers.device_registry", helpers_mod.device_registry)
+sys.modules.setdefault("homeassistant.helpers.entity_registry", helpers_mod.entity_registry)
+sys.modules.setdefault("homeassistant.config_entries", types.ModuleType("config_entries"))
+sys.modules["homeassistant.config_entries"].ConfigEntry = object
+
+from custom_components.smart_dashboard.streaming import (
+    StateRecord,
+    iter_json_array,
+    iter_states,
+)
+
+
+def _chunks(data, size):
+    raw = json.dumps(data, ensure_ascii=False, indent=1).encode()
+    return [raw[i:i + size] for i in range(0, len(raw), size)]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, 100000])
+def test_array_split_at_any_boundary(size):
+    data = [
+        {"entity_id": "sensor.ü", "attributes": {"x": [1, {"y": None}], "s": "a,]"}},
+        2.5e10,
+        -17,
+        "text",
+        True,
+        None,
+        [],
+    ]
+    assert list(iter_json_array(_chunks(data, size))) == data
+
+
+def test_truncated_array_raises():
+    with pytest.raises(ValueError):
+        list(iter_json_array([b'[{"entity_id": "light.a"}, 1']))
+
+
+def test_states_keep_only_selected_attributes():
+    states = [
+        {
+            "entity_id": "weather.home",
+            "state": "sunny",
+            "attributes": {"friendly_name": "Home", "forecast": [{"t": 1}] * 100},
+        },
+        {"state": "orphan"},
+    ]
+    records = list(iter_states(_chunks(states, 5)))
+    assert records == [StateRecord("weather.home", "sunny", {"friendly_name": "Home"})]
@@ -0,0 +1,95 @@
+import asyncio
+import json
+import sys
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import types
+
+dummy = types.ModuleType("dummy")
+sys.modules.setdefault("homeassistant", dummy)
+core_mod = types.ModuleType("core")
+core_mod.HomeAssistant = object
+sys.modules.setdefault("homeassistant.core", core_mod)
+sys.modules.setdefault("homeassistant.helpers", types.ModuleType("helpers"))
+helpers_mod = sys.modules["homeassistant.helpers"]
+helpers_mod.area_registry = types.ModuleType("area_registry")
+helpers_mod.device_registry = types.ModuleType("device_registry")
+helpers_mod.entity_registry = types.ModuleType("entity_registry")
+sys.modules.setdefault("homeassistant.helpers.area_registry", helpers_mod.area_registry)
+sys.modules.setdefault("homeassistant.helpers.device_registry", helpers_mod.device_registry)
+sys.modules.setdefault("homeassistant.helpers.entity_registry", helpers_mod.entity_registry)
+sys.modules.setdefault("homeassistant.config_entries", types.ModuleType("config_entries"))
+sys.modules["homeassistant.config_entries"].ConfigEntry = object
+
+from custom_components.smart_dashboard import translation
+from custom_components.smart_dashboard.translation import (
+    SLOT_LANG,
+    Localizer,
+    Text,
+    preload_translations,
+    t,
+    translate,
+)
+
+
+def test_preload_and_translate():
+    preload_translations()
+    assert translation.translations_preloaded()
+    assert translate("overview", "ru", "Overview") == "Обзор"
+    assert translate("missing_key", "ru", "Fallback") == "Fallback"
+    assert translate("overview", "xx", "Overview") == "Overview"
+
+
+def test_formatted_template():
+    preload_translations()
+    assert translate("device_count", "en", "{count} devices", count=3) == "3 devices"
+    assert translate("device_count", "xx", "{count} devices", count=2) == "2 devices"
+
+
+def test_nested_sections_skipped(tmp_path):
+    (tmp_path / "zz.json").write_text(
+        json.dumps({"room": "Zimmer", "config": {"step": {}}})
+    )
+    preload_translations(tmp_path)
+    assert translation.get_translations("zz") == {"room": "Zimmer"}
+
+
+def test_async_shim():
+    assert asyncio.run(t("devices", "en", "Devices")) == "Devices"
+
+
+def test_threaded_lookups():
+    results = []
+
+    def worker():
+        results.append(translate("room", "fr", "Room"))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+    assert results == ["Pièce"] * 8
+
+
+def test_slots_are_filled_per_language():
+    preload_translations()
+    label = translate("device_count", SLOT_LANG, "{count} devices", count=2)
+    assert isinstance(label, Text) and label == "2 devices"
+    shared = {"title": translate("overview", SLOT_LANG, "Overview")}
+    doc = {"views": [shared, shared], "label": label, "other": "plain"}
+    localizer = Localizer(doc)
+    assert len(localizer) == 2
+    assert localizer.localized == [shared, shared]
+    localizer.apply("ru")
+    assert doc["views"][1]["title"] == "Обзор" and doc["other"] == "plain"
+    localizer.apply("en")
+    assert doc == {
+        "views": [{"title": "Overview"}] * 2,
+        "label": "2 devices",
+        "other": "plain",
+    }
+    assert type(doc["label"]) is str
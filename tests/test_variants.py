@@ -0,0 +1,147 @@
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import types
+
+dummy = types.ModuleType("dummy")
+sys.modules.setdefault("homeassistant", dummy)
+core_mod = types.ModuleType("core")
+core_mod.HomeAssistant = object
+sys.modules.setdefault("homeassistant.core", core_mod)
+sys.modules.setdefault("homeassistant.helpers", types.ModuleType("helpers"))
+helpers_mod = sys.modules["homeassistant.helpers"]
+helpers_mod.area_registry = types.ModuleType("area_registry")
+helpers_mod.device_registry = types.ModuleType("device_registry")
+helpers_mod.entity_registry = types.ModuleType("entity_registry")
+sys.modules.setdefault("homeassistant.helpers.area_registry", helpers_mod.area_registry)
+sys.modules.setdefault("homeassistant.helpers.device_registry", helpers_mod.device_registry)
+sys.modules.setdefault("homeassistant.helpers.entity_registry", helpers_mod.entity_registry)
+sys.modules.setdefault("homeassistant.config_entries", types.ModuleType("config_entries"))
+sys.modules["homeassistant.config_entries"].ConfigEntry = object
+
+from custom_components import smart_dashboard as sd
+from custom_components.smart_dashboard import generator
+from custom_components.smart_dashboard.snapshot import HassSnapshot
+from custom_components.smart_dashboard.variants import variant_path, variant_slugs
+
+USERS = ["alice", "bob", "Carol Smith", "dave"]
+KNOWN = ["light.a", "light.b", "sensor.t", "switch.s"]
+
+
+def _config(dedup):
+    return {
+        "auto_discover": False,
+        "deduplicate": dedup,
+        "rooms": [
+            {
+                "name": "Admin",
+                "conditions": ["user in ('alice', 'Carol Smith')"],
+                "cards": [
+                    {"type": "light", "entity": "light.a"},
+                    {"type": "sensor", "entity": "sensor.t"},
+                ],
+            },
+            {
+                "name": "Living",
+                "cards": [
+                    {"type": "light", "entity": "light.a"},
+                    {"type": "light", "entity": "light.b"},
+                    {"type": "light", "entity": "light.gone"},
+                ],
+            },
+            {
+                "name": "Bob",
+                "conditions": ["user == 'bob'"],
+                "cards": [{"type": "switch", "entity": "switch.s"}],
+            },
+        ],
+        "sidebar": [
+            {"name": "Home", "view": "overview"},
+            {"name": "Admin", "view": "admin", "condition": "user != 'bob'"},
+        ],
+    }
+
+
+@pytest.mark.parametrize("dedup", ["room", "dashboard"])
+def test_variants_match_separate_runs(monkeypatch, tmp_path, dedup):
+    config_path = tmp_path / "smart_dashboard.yaml"
+    config_path.write_text(yaml.safe_dump(_config(dedup)))
+    snapshot = HassSnapshot(KNOWN)
+    monkeypatch.setenv("DASHBOARD_USER", "dave")
+    output = tmp_path / "out" / "smart_dashboard.yaml"
+    output.parent.mkdir()
+    result = generator.generate_dashboard(
+        config_path, output, snapshot=snapshot, users=USERS
+    )
+    assert result.written
+    # alice and Carol Smith see the same rooms; dave matches the default
+    assert result.counters["variants"] == 3
+
+    for user in USERS:
+        monkeypatch.setenv("DASHBOARD_USER", user)
+        single = tmp_path / f"single_{user}.yaml"
+        generator.generate_dashboard(config_path, single, snapshot=snapshot)
+        assert variant_path(output, user).read_text() == single.read_text()
+    assert variant_path(output, "Carol Smith").name == "smart_dashboard_carol_smith.yaml"
+
+    monkeypatch.setenv("DASHBOARD_USER", "dave")
+    again = generator.generate_dashboard(
+        config_path, output, snapshot=snapshot, users=USERS
+    )
+    assert again.skipped
+    variant_path(output, "bob").unlink()
+    assert not generator.generate_dashboard(
+        config_path, output, snapshot=snapshot, users=USERS
+    ).skipped
+
+
+def test_variant_dashboards_registered(tmp_path):
+    hass = SimpleNamespace(config=SimpleNamespace(path=lambda name: str(tmp_path / name)))
+    sd._ensure_dashboard_entry(hass, ["alice", "Carol Smith"])
+    dashboards = yaml.safe_load((tmp_path / "configuration.yaml").read_text())[
+        "lovelace"
+    ]["dashboards"]
+    assert set(dashboards) == {
+        "smart-dashboard",
+        "smart-dashboard-alice",
+        "smart-dashboard-carol-smith",
+    }
+    assert dashboards["smart-dashboard-carol-smith"]["filename"] == (
+        "dashboards/smart_dashboard_carol_smith.yaml"
+    )
+
+
+def test_colliding_user_names_get_distinct_variants(monkeypatch, tmp_path):
+    users = ["Bob", "bob", "!!!", "bob 2"]
+    assert variant_slugs(users) == {
+        "Bob": "bob", "bob": "bob_2", "!!!": "user", "bob 2": "bob_2_2"
+    }
+    config_path = tmp_path / "smart_dashboard.yaml"
+    config_path.write_text(yaml.safe_dump(_config("room")))
+    output = tmp_path / "smart_dashboard.yaml"
+    monkeypatch.setenv("DASHBOARD_USER", "dave")
+    generator.generate_dashboard(
+        config_path, output, snapshot=HassSnapshot(KNOWN), users=users
+    )
+    # Only lowercase "bob" sees the Bob room
+    bob = yaml.safe_load((tmp_path / "smart_dashboard_bob_2.yaml").read_text())
+    other = yaml.safe_load((tmp_path / "smart_dashboard_bob.yaml").read_text())
+    assert "Bob" in [view.get("title") for view in bob["views"]]
+    assert "Bob" not in [view.get("title") for view in other["views"]]
+    assert (tmp_path / "smart_dashboard_user.yaml").exists()
+
+    hass = SimpleNamespace(config=SimpleNamespace(path=lambda name: str(tmp_path / name)))
+    sd._ensure_dashboard_entry(hass, users)
+    dashboards = yaml.safe_load((tmp_path / "configuration.yaml").read_text())[
+        "lovelace"
+    ]["dashboards"]
+    assert dashboards["smart-dashboard-bob-2"]["filename"] == (
+        "dashboards/smart_dashboard_bob_2.yaml"
+    )
+    assert len(dashboards) == 1 + len(users)
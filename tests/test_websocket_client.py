@@ -0,0 +1,105 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import types
+
+dummy = types.ModuleType("dummy")
+sys.modules.setdefault("homeassistant", dummy)
+core_mod = types.ModuleType("core")
+core_mod.HomeAssistant = object
+sys.modules.setdefault("homeassistant.core", core_mod)
+sys.modules.setdefault("homeassistant.helpers", types.ModuleType("helpers"))
+helpers_mod = sys.modules["homeassistant.helpers"]
+helpers_mod.area_registry = types.ModuleType("area_registry")
+helpers_mod.device_registry = types.ModuleType("device_registry")
+helpers_mod.entity_registry = types.ModuleType("entity_registry")
+sys.modules.setdefault("homeassistant.helpers.area_registry", helpers_mod.area_registry)
+sys.modules.setdefault("homeassistant.helpers.device_registry", helpers_mod.device_registry)
+sys.modules.setdefault("homeassistant.helpers.entity_registry", helpers_mod.entity_registry)
+sys.modules.setdefault("homeassistant.config_entries", types.ModuleType("config_entries"))
+sys.modules["homeassistant.config_entries"].ConfigEntry = object
+
+from custom_components.smart_dashboard import websocket_client
+from custom_components.smart_dashboard.auto_discovery import discover_devices
+from custom_components.smart_dashboard.websocket_client import (
+    HassWebSocketClient,
+    WebSocketError,
+    async_fetch_snapshot,
+    fetch_snapshot,
+    websocket_url,
+)
+from fake_hass_ws import FakeHassWebSocket, sample_responses
+
+
+def test_websocket_url():
+    assert websocket_url("http://h:8123/") == "ws://h:8123/api/websocket"
+    assert websocket_url("https://h") == "wss://h/api/websocket"
+
+
+def test_commands_are_pipelined_over_one_connection():
+    with FakeHassWebSocket(sample_responses(), latency=0.05) as server:
+        snap = asyncio.run(async_fetch_snapshot(server.url, "abc", lovelace=True))
+    assert server.connections == 1
+    assert server.max_in_flight == 5
+    assert server.commands[0] == "get_states"
+    assert snap.entities == ["light.a", "light.b", "sensor.c"]
+    # Entity level area overrides the device area
+    assert snap.entity_areas() == {"light.a": "Kitchen", "light.b": "Hall"}
+    assert snap.lovelace["views"][0]["title"] == "Imported"
+
+
+def test_replies_are_matched_by_id():
+    async def scenario(url):
+        async with HassWebSocketClient(url, "abc") as client:
+            first = await client.send_command("config/area_registry/list")
+            second = await client.send_command("get_states")
+            return await second, await first
+
+    with FakeHassWebSocket(sample_responses()) as server:
+        states, areas = asyncio.run(scenario(server.url))
+    assert states[0]["entity_id"] == "light.a"
+    assert areas[0]["area_id"] == "kitchen"
+
+
+def test_failed_registry_command_leaves_mapping_empty():
+    with FakeHassWebSocket(
+        sample_responses(), fail={"config/area_registry/list"}
+    ) as server:
+        snap = asyncio.run(async_fetch_snapshot(server.url, "abc"))
+    assert snap.areas == {}
+    assert len(snap.entities) == 3
+
+
+def test_invalid_token_raises():
+    with FakeHassWebSocket(sample_responses(), token="other") as server:
+        with pytest.raises(WebSocketError):
+            asyncio.run(async_fetch_snapshot(server.url, "abc"))
+
+
+def test_fetch_snapshot_falls_back_to_rest(monkeypatch):
+    calls = []
+
+    def fake_rest(cls, url, token, **kwargs):
+        calls.append(url)
+        return websocket_client.HassSnapshot(["light.x"])
+
+    monkeypatch.setattr(
+        websocket_client.HassSnapshot, "fetch", classmethod(fake_rest)
+    )
+    with FakeHassWebSocket(sample_responses(), token="other") as server:
+        snap = fetch_snapshot(server.url, "abc")
+    assert calls == [server.url]
+    assert snap.entities == ["light.x"]
+
+
+def test_discover_devices_uses_websocket():
+    with FakeHassWebSocket(sample_responses()) as server:
+        rooms = discover_devices(server.url, "abc", "en")
+    assert {room["name"] for room in rooms} == {"Kitchen", "Hall", "Auto Detected"}